@@ -0,0 +1,62 @@
+"""
+Benchmark - ConversationMemory.add_message költsége az előzmény méretének függvényében
+
+Futtatás (a projekt gyökeréből):
+    python benchmarks/bench_conversation_memory.py
+"""
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.conversation_memory import ConversationMemory
+
+
+def _message(i: int) -> dict:
+    return {
+        "role": "user" if i % 2 == 0 else "assistant",
+        "content": f"Üzenet {i}: " + "lorem ipsum dolor sit amet " * 8,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def bench_legacy(size: int, appends: int) -> float:
+    """Régi viselkedés: minden üzenet után a teljes JSON fájl újraírása (ms / üzenet)"""
+    messages = [_message(i) for i in range(size)]
+    with tempfile.TemporaryDirectory() as tmp:
+        memory_file = Path(tmp) / "global.json"
+        started = time.perf_counter()
+        for i in range(appends):
+            messages.append(_message(size + i))
+            with open(memory_file, 'w', encoding='utf-8') as f:
+                json.dump({"project": "global", "messages": messages,
+                           "updated": datetime.now().isoformat()}, f, indent=2, ensure_ascii=False)
+        return (time.perf_counter() - started) * 1000 / appends
+
+
+def bench_append_only(size: int, appends: int, fsync_policy: str = "batch") -> float:
+    """Append-only napló write-behind pufferrel (ms / üzenet, a végső flush-sal együtt)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(Path(tmp) / "global.jsonl", 'w', encoding='utf-8') as f:
+            for i in range(size):
+                f.write(json.dumps({"op": "add", "message": _message(i)}, ensure_ascii=False) + "\n")
+
+        memory = ConversationMemory(project_name="global", storage_dir=tmp, fsync_policy=fsync_policy)
+        started = time.perf_counter()
+        for i in range(appends):
+            memory.add_message("user", _message(size + i)["content"])
+        memory.flush()
+        return (time.perf_counter() - started) * 1000 / appends
+
+
+if __name__ == "__main__":
+    print(f"{'előzmény':>10} | {'régi (teljes újraírás)':>24} | {'append-only, batch fsync':>26} | {'append-only, always fsync':>27}")
+    for size in (10_000, 100_000):
+        legacy = bench_legacy(size, appends=5 if size >= 100_000 else 20)
+        batched = bench_append_only(size, appends=2000)
+        always = bench_append_only(size, appends=200, fsync_policy="always")
+        print(f"{size:>10} | {legacy:>21.3f} ms | {batched:>23.4f} ms | {always:>24.4f} ms")
@@ -0,0 +1,122 @@
+"""
+Benchmark - Könyvtár bejárás: rglob / régi scandir + fnmatch vs. DirWalker (szekvenciális és párhuzamos)
+
+Futtatás (a projekt gyökeréből):
+    python benchmarks/bench_dir_walk.py
+"""
+import os
+import sys
+import time
+import fnmatch
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.dir_walker import DirWalker
+from core.file_index import DEFAULT_IGNORED
+
+GITIGNORE = "*.log\n/generated/\ncoverage/\n!keep.log\n"
+
+
+def _make_tree(root: Path, size: int):
+    """size forrásfájl 1000 könyvtárban, mellette kihagyandó fájlok (node_modules, *.pyc, .gitignore szerintiek)"""
+    for i in range(size):
+        directory = root / f"pkg{i % 50}" / f"mod{i % 1000 // 50}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{i}.py").write_bytes(b"x = 1\n")
+        if i % 5 == 0:
+            (directory / f"file{i}.pyc").write_bytes(b"")
+            (directory / f"run{i}.log").write_bytes(b"")
+    for name in ("node_modules", "generated", "coverage"):
+        for i in range(size // 10):
+            directory = root / name / f"lib{i % 200}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"index{i}.js").write_bytes(b"")
+    (root / ".gitignore").write_text(GITIGNORE, encoding="utf-8")
+
+
+def _rglob(root: Path):
+    """A régi FileManager.list_directory(recursive=True): rglob + külön is_file / is_dir"""
+    files, directories = [], []
+    for item in root.rglob('*'):
+        if item.is_file():
+            files.append(str(item.relative_to(root)))
+        elif item.is_dir():
+            directories.append(str(item.relative_to(root)))
+    return files, directories
+
+
+def _old_walk(root: str):
+    """A régi FileIndex._walk: scandir, de nevenként fnmatch és nincs .gitignore"""
+    names = {p for p in DEFAULT_IGNORED if not any(c in p for c in "*?[")}
+    globs = [p for p in DEFAULT_IGNORED if p not in names]
+    files, directories = {}, set()
+    stack = [(root, "")]
+    while stack:
+        abs_dir, rel_dir = stack.pop()
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                if entry.name.startswith('.') or entry.name in names or \
+                        any(fnmatch.fnmatch(entry.name, p) for p in globs):
+                    continue
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    directories.add(rel_path)
+                    stack.append((entry.path, rel_path))
+                elif entry.is_file():
+                    files[rel_path] = (entry.path, entry.stat())
+    return files, directories
+
+
+@contextmanager
+def _latency(seconds: float):
+    """Hálózati meghajtó szimuláció: minden könyvtár olvasás késleltetett"""
+    original = os.scandir
+    
+    def slow_scandir(path="."):
+        time.sleep(seconds)
+        return original(path)
+    
+    os.scandir = slow_scandir
+    try:
+        yield
+    finally:
+        os.scandir = original
+
+
+def _timed(label: str, function, repeat: int = 3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label}: {best * 1000:.0f} ms ({len(result[0])} fájl, {len(result[1])} könyvtár)")
+    return result
+
+
+def main(size: int = 50_000, latency_ms: float = 2.0, workers: int = 16):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        started = time.perf_counter()
+        _make_tree(root, size)
+        print(f"{size} forrásfájl generálva: {time.perf_counter() - started:.1f} s")
+        
+        _timed("rglob + is_file/is_dir (régi list_directory)", lambda: _rglob(root))
+        _timed("scandir + fnmatch + stat (régi FileIndex)", lambda: _old_walk(str(root)))
+        walker = DirWalker(str(root), DEFAULT_IGNORED)
+        _timed("DirWalker + stat", walker.walk)
+        _timed("DirWalker stat nélkül", lambda: walker.walk(with_stat=False))
+        parallel = DirWalker(str(root), DEFAULT_IGNORED, workers=workers)
+        _timed(f"DirWalker {workers} szál + stat", parallel.walk)
+        
+        with _latency(latency_ms / 1000):
+            _timed(f"DirWalker, {latency_ms:g} ms / könyvtár késleltetés", walker.walk, repeat=1)
+            _timed(f"DirWalker {workers} szál, {latency_ms:g} ms / könyvtár késleltetés", parallel.walk, repeat=1)
+
+
+if __name__ == "__main__":
+    main()
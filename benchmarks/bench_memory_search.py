@@ -0,0 +1,58 @@
+"""
+Benchmark - ConversationMemory.search_relevant lekérdezési idő 100k üzenetnél
+
+Futtatás (a projekt gyökeréből):
+    python benchmarks/bench_memory_search.py
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.conversation_memory import ConversationMemory
+
+VOCABULARY = [f"szo{i}" for i in range(20000)] + [
+    "python", "fastapi", "nginx", "docker", "ollama", "cache", "stream", "projekt",
+    "fájl", "hiba", "endpoint", "memória", "index", "modell", "kérés", "válasz"
+]
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 40)))
+
+
+def main(size: int = 100_000, queries: int = 1000):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = ConversationMemory(project_name="bench", storage_dir=tmp, fsync_policy="never")
+        started = time.perf_counter()
+        for i in range(size):
+            memory.add_message("user" if i % 2 == 0 else "assistant", _text(rng))
+        memory.flush()
+        print(f"{size} üzenet indexelve: {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        reloaded = ConversationMemory(project_name="bench", storage_dir=tmp, fsync_policy="never")
+        print(f"Újratöltés (perzisztált index, újraépítés nélkül): {time.perf_counter() - started:.2f} s")
+
+        query_texts = [" ".join(rng.choice(VOCABULARY) for _ in range(3)) for _ in range(queries)]
+        started = time.perf_counter()
+        for query in query_texts:
+            reloaded.search_relevant(query, limit=5)
+        bm25_ms = (time.perf_counter() - started) * 1000 / queries
+
+        started = time.perf_counter()
+        for query in query_texts[:20]:
+            query_lower = query.lower()
+            [m for m in reloaded.messages if query_lower in m["content"].lower()][:5]
+        linear_ms = (time.perf_counter() - started) * 1000 / 20
+
+        print(f"BM25 index lekérdezés: {bm25_ms:.3f} ms / query")
+        print(f"Lineáris substring keresés (régi): {linear_ms:.3f} ms / query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark - /api/project/search: trigram index vs. lineáris fájl szkennelés 50k fájlos repón
+
+Futtatás (a projekt gyökeréből):
+    python benchmarks/bench_trigram_search.py
+"""
+import random
+import re
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.file_index import FileIndex
+from core.trigram_index import TrigramIndex
+
+KEYWORDS = ["def", "return", "import", "class", "self", "if", "for", "in", "None", "True"]
+
+
+_word_rng = random.Random(7)
+WORDS = sorted({"".join(_word_rng.choice(string.ascii_lowercase) for _ in range(_word_rng.randint(4, 9)))
+                for _ in range(5000)})
+
+
+def _identifier(rng: random.Random) -> str:
+    return "_".join(rng.choice(WORDS) for _ in range(2)) + str(rng.randint(0, 500))
+
+
+def _source(rng: random.Random) -> str:
+    lines = []
+    for _ in range(rng.randint(15, 30)):
+        indent = "    " * rng.randint(0, 2)
+        words = [rng.choice(KEYWORDS) if rng.random() < 0.3 else _identifier(rng) for _ in range(rng.randint(3, 8))]
+        lines.append(indent + " ".join(words))
+    return "\n".join(lines) + "\n"
+
+
+def _linear_old(index: FileIndex, query: str, limit: int = 10):
+    """A korábbi get_relevant_files: max 3 mélység, csak az első 500 karakter"""
+    query_lower = query.lower()
+    relevant = []
+    for file_path in index.files(max_depth=3):
+        if query_lower in file_path.lower():
+            relevant.append(file_path)
+        content = index.read_text(file_path)
+        if content and query_lower in content[:500].lower() and file_path not in relevant:
+            relevant.append(file_path)
+        if len(relevant) >= limit:
+            break
+    return relevant
+
+
+def _linear_full(index: FileIndex, query: str):
+    """Teljes tartalom lineáris keresése (a trigram index eredményével egyenértékű)"""
+    query_lower = query.lower()
+    return [path for path in index.files(text_only=True)
+            if query_lower in (index.read_text(path) or "").lower()]
+
+
+def main(size: int = 50_000, queries: int = 200):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "repo"
+        started = time.perf_counter()
+        for i in range(size):
+            directory = root / f"pkg{i % 50}" / f"mod{i % 1000 // 50}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"file{i}.py").write_text(_source(rng), encoding="utf-8")
+        print(f"{size} fájl generálva: {time.perf_counter() - started:.1f} s")
+
+        file_index = FileIndex(str(root), index_dir=str(Path(tmp) / "index"), use_watcher=False)
+        started = time.perf_counter()
+        file_index.refresh()
+        print(f"FileIndex szkennelés: {time.perf_counter() - started:.1f} s")
+
+        search_index = TrigramIndex(file_index)
+        started = time.perf_counter()
+        search_index.build()
+        stats = search_index.get_stats()
+        print(f"Trigram index építés: {time.perf_counter() - started:.1f} s "
+              f"({stats['trigrams']} trigram, {stats['postings']} posting)")
+
+        query_texts = [_identifier(rng) for _ in range(queries)]
+        started = time.perf_counter()
+        for query in query_texts:
+            search_index.search(query, limit=10)
+        trigram_ms = (time.perf_counter() - started) * 1000 / queries
+
+        started = time.perf_counter()
+        for query in query_texts[:20]:
+            # pl. user_[a-z]+123\b
+            prefix, number = query.split("_")[0], re.search(r"\d+$", query).group()
+            search_index.search(prefix + r"_[a-z]+" + number + r"\b", regex=True)
+        regex_ms = (time.perf_counter() - started) * 1000 / 20
+
+        started = time.perf_counter()
+        for query in query_texts[:3]:
+            _linear_old(file_index, query)
+        old_ms = (time.perf_counter() - started) * 1000 / 3
+
+        started = time.perf_counter()
+        for query in query_texts[:3]:
+            expected = set(_linear_full(file_index, query))
+            found = {r["path"] for r in search_index.search(query, limit=size) if r["hits"]}
+            assert found == expected, query
+        full_ms = (time.perf_counter() - started) * 1000 / 3
+
+        print(f"Trigram substring keresés: {trigram_ms:.2f} ms / query")
+        print(f"Trigram regex keresés: {regex_ms:.2f} ms / query")
+        print(f"Régi lineáris keresés (első 500 karakter): {old_ms:.0f} ms / query")
+        print(f"Teljes lineáris keresés (+ egyezés ellenőrzés): {full_ms:.0f} ms / query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Cache Warmer - Response cache előmelegítése a kérés naplóból
+"""
+import json
+import os
+import hashlib
+import time
+import threading
+import logging
+import multiprocessing
+from collections import Counter, deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+
+from core.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """A leggyakoribb korábbi kérések újrajátszása a cache-be üresjárat idején
+    
+    A napló méret alapján forog (max_log_bytes után <napló>.1 lesz, az előző forgatott törlődik),
+    a max_prompt_chars-nál hosszabb promptok (pl. teljes chat előzmények) csak hash-ként
+    kerülnek bele: ezek a gyakoriság statisztikában szerepelnek, de nem játszhatók újra.
+    """
+    
+    # Ezek a mezők azonosítják a kérést (a gyakoriság számításhoz)
+    KEY_FIELDS = ("kind", "namespace", "prompt", "prompt_hash", "file_path", "start_line", "end_line",
+                  "refactor_type", "model", "temperature")
+    
+    def __init__(self, response_cache: ResponseCache,
+                 log_file: str = "./logs/requests.jsonl",
+                 cpu_budget: float = 0.2,
+                 idle_seconds: int = 300,
+                 max_load: float = 0.5,
+                 top_n: int = 20,
+                 max_log_entries: int = 20000,
+                 max_log_bytes: int = 8 * 1024 * 1024,
+                 max_prompt_chars: int = 4000,
+                 busy: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            response_cache: A melegítendő cache
+            log_file: Kérés napló (JSON Lines)
+            cpu_budget: Időarány (0-1), amennyit a melegítés a CPU-ból elvihet
+            idle_seconds: Ennyi másodperc forgalommentesség után számít üresjáratnak
+            max_load: Maximális 1 perces load average / CPU mag, e fölött nem melegít
+            top_n: Ennyi leggyakoribb kérést játszik vissza
+            max_log_entries: A napló utolsó ennyi bejegyzését elemzi
+            max_log_bytes: E méret fölött a napló forog (legfeljebb két fájl marad)
+            max_prompt_chars: Ennél hosszabb prompt helyett csak a hash-e kerül a naplóba
+            busy: True, ha épp fut LLM kérés (pl. egy hosszú stream chat); ilyenkor nincs üresjárat
+        """
+        self.cache = response_cache
+        self.log_file = Path(log_file)
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.cpu_budget = min(max(cpu_budget, 0.01), 1.0)
+        self.idle_seconds = idle_seconds
+        self.max_load = max_load
+        self.top_n = top_n
+        self.max_log_entries = max_log_entries
+        self.max_log_bytes = max_log_bytes
+        self.max_prompt_chars = max_prompt_chars
+        self.busy = busy
+        
+        # kind -> (melegítő függvény, cache ellenőrző függvény)
+        self.handlers: Dict[str, Tuple[Callable[[Dict], bool], Callable[[Dict], bool]]] = {}
+        
+        self.last_activity = time.monotonic()
+        self.last_run: Optional[str] = None
+        self.warmed_total = 0
+        self._lock = threading.Lock()
+        # Egyszerre egy melegítési kör (háttér szál vagy kézi indítás)
+        self._run_lock = threading.Lock()
+        # ((napló aláírások), bejegyzések): változatlan naplót nem olvasunk újra
+        self._log_cache: Optional[Tuple[Tuple, List[Dict]]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def register_handler(self, kind: str, warm: Callable[[Dict], bool],
+                         is_cached: Callable[[Dict], bool]):
+        """Kérés típus regisztrálása
+        
+        Args:
+            kind: Kérés típus (pl. chat, generate, explain, refactor)
+            warm: Újragenerálja és cache-be teszi a kérést, True ha sikerült
+            is_cached: True, ha a kérés válasza már a cache-ben van
+        """
+        self.handlers[kind] = (warm, is_cached)
+    
+    def touch(self):
+        """Élő forgalom jelzése (üresjárat számításhoz)"""
+        self.last_activity = time.monotonic()
+    
+    def record(self, kind: str, **fields):
+        """Kérés naplózása (és élő forgalom jelzése)"""
+        self.touch()
+        entry = {"ts": datetime.now().isoformat(), "kind": kind}
+        entry.update({k: v for k, v in fields.items() if v is not None})
+        prompt = entry.get("prompt")
+        if isinstance(prompt, str) and len(prompt) > self.max_prompt_chars:
+            del entry["prompt"]
+            entry["prompt_hash"] = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:32]
+        try:
+            line = json.dumps(entry, ensure_ascii=False)
+            with self._lock:
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+                    size = f.tell()
+                if size > self.max_log_bytes:
+                    self.log_file.replace(self._rotated_file())
+        except Exception as e:
+            logger.warning(f"Request log write error: {e}")
+    
+    def _rotated_file(self) -> Path:
+        return self.log_file.with_name(self.log_file.name + ".1")
+    
+    def _read_log(self) -> List[Dict]:
+        """Napló utolsó bejegyzéseinek beolvasása (a forgatott résszel együtt)"""
+        files = [path for path in (self._rotated_file(), self.log_file) if path.exists()]
+        try:
+            signature = tuple((str(path), path.stat().st_mtime_ns, path.stat().st_size) for path in files)
+        except OSError:
+            signature = None
+        cached = self._log_cache
+        if cached is not None and signature is not None and cached[0] == signature:
+            return cached[1]
+        
+        entries = deque(maxlen=self.max_log_entries)
+        for path in files:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entries.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+            except Exception as e:
+                logger.warning(f"Request log read error: {e}")
+        result = list(entries)
+        if signature is not None:
+            self._log_cache = (signature, result)
+        return result
+    
+    def _entry_key(self, entry: Dict) -> Tuple:
+        return tuple(entry.get(field) for field in self.KEY_FIELDS)
+    
+    def analyze(self) -> Tuple[int, List[Tuple[Dict, int]]]:
+        """Leggyakoribb kérések meghatározása
+        
+        Returns:
+            (összes kérés, [(kérés, darabszám), ...] csökkenő gyakoriság szerint)
+        """
+        entries = [e for e in self._read_log() if e.get("kind") in self.handlers]
+        counts = Counter(self._entry_key(e) for e in entries)
+        samples = {}
+        for entry in entries:
+            samples[self._entry_key(entry)] = entry
+        
+        # Csak az ismétlődő kérések érdemesek melegítésre
+        top = [(samples[key], count) for key, count in counts.most_common(self.top_n) if count > 1]
+        return len(entries), top
+    
+    def report(self) -> Dict:
+        """Melegítési jelentés a várható találati arány növekedéssel"""
+        total, top = self.analyze()
+        candidates = []
+        covered = 0
+        projected_hits = 0
+        
+        for entry, count in top:
+            is_cached = self._is_cached(entry)
+            if is_cached:
+                covered += count
+            else:
+                projected_hits += count
+            candidates.append({
+                "kind": entry.get("kind"),
+                "prompt": (entry.get("prompt") or "")[:80] or None,
+                "file_path": entry.get("file_path"),
+                "count": count,
+                "cached": is_cached,
+                "replayable": "prompt_hash" not in entry
+            })
+        
+        return {
+            "total_requests": total,
+            "candidates": candidates,
+            "covered_share": round(covered / total, 4) if total else 0.0,
+            # Ha a korábbi forgalom megismétlődik, ennyivel nő a találati arány
+            "projected_hit_rate_gain": round(projected_hits / total, 4) if total else 0.0,
+            "warmed_total": self.warmed_total,
+            "last_run": self.last_run,
+            "idle": self.is_idle()
+        }
+    
+    def _is_cached(self, entry: Dict) -> bool:
+        handler = self.handlers.get(entry.get("kind"))
+        if not handler or "prompt_hash" in entry:
+            return False
+        try:
+            return handler[1](entry)
+        except Exception:
+            return False
+    
+    def is_idle(self) -> bool:
+        """Üresjárat: nincs élő forgalom, nem fut LLM kérés és a gép terhelése alacsony"""
+        if time.monotonic() - self.last_activity < self.idle_seconds:
+            return False
+        if self.busy is not None and self.busy():
+            return False
+        try:
+            load = os.getloadavg()[0] / multiprocessing.cpu_count()
+            return load < self.max_load
+        except (AttributeError, OSError):
+            # Windows: nincs load average
+            return True
+    
+    @property
+    def running(self) -> bool:
+        """Fut-e épp melegítési kör"""
+        return self._run_lock.locked()
+    
+    def run_once(self, force: bool = False) -> int:
+        """Egy melegítési kör (ha már fut egy, azonnal visszatér)
+        
+        Args:
+            force: Üresjárat ellenőrzés nélkül (a CPU budget így is érvényes)
+        
+        Returns:
+            Melegített bejegyzések száma
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._run(force)
+        finally:
+            self._run_lock.release()
+    
+    def _run(self, force: bool) -> int:
+        warmed = 0
+        _, top = self.analyze()
+        for entry, _ in top:
+            if self._stop.is_set() or (not force and not self.is_idle()):
+                break
+            if "prompt_hash" in entry or self._is_cached(entry):
+                continue
+            
+            started = time.monotonic()
+            try:
+                if self.handlers[entry["kind"]][0](entry):
+                    warmed += 1
+            except Exception as e:
+                logger.warning(f"Cache warmup error ({entry.get('kind')}): {e}")
+            elapsed = time.monotonic() - started
+            
+            # CPU budget: a munka ideje arányában pihenünk (duty cycle)
+            self._stop.wait(elapsed * (1 - self.cpu_budget) / self.cpu_budget)
+        
+        self.warmed_total += warmed
+        self.last_run = datetime.now().isoformat()
+        if warmed:
+            logger.info(f"Cache warmup: {warmed} entries warmed")
+        return warmed
+    
+    def start(self, interval: int = 60):
+        """Háttér melegítés indítása (üresjáratban fut)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        
+        def loop():
+            while not self._stop.wait(interval):
+                if self.is_idle():
+                    self.run_once()
+        
+        self._thread = threading.Thread(target=loop, name="cache-warmer", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Háttér melegítés leállítása"""
+        self._stop.set()
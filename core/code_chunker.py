@@ -0,0 +1,159 @@
+"""
+Code Chunker - Forrásfájlok szintaxis alapú darabolása (függvények, osztályok, blokkok)
+"""
+import ast
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Definíció kezdetek nem Python nyelvekben (behúzás nélküli sorok)
+DEFINITION_PATTERN = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:pub(?:\(\w+\))?\s+)?(?:async\s+)?(?:static\s+)?"
+    r"(?:(?:function\*?|class|interface|type|enum|struct|impl|trait|fn|func|def|module|namespace)\b|"
+    r"(?:const|let|var)\s+\w+\s*(?::[^=]+)?=\s*(?:async\s+)?(?:\([^)]*\)|\w+)\s*=>)"
+)
+DEFINITION_NAME_PATTERN = re.compile(
+    r"(?:function\*?|class|interface|type|enum|struct|impl|trait|fn|func|def|module|namespace|const|let|var)\s+(\w+)"
+)
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s")
+
+
+@dataclass
+class Chunk:
+    """Egy fájlrészlet (1-től számozott, zárt sortartomány)"""
+    path: str
+    start_line: int
+    end_line: int
+    kind: str
+    name: Optional[str]
+    text: str
+
+
+def _split_long(path: str, lines: List[str], start: int, end: int, kind: str,
+                name: Optional[str], max_lines: int) -> List[Chunk]:
+    """Túl hosszú szakasz darabolása, lehetőleg üres soroknál"""
+    chunks = []
+    while start <= end:
+        stop = min(start + max_lines - 1, end)
+        if stop < end:
+            # Az ablak második felében lévő utolsó üres sornál vágunk
+            for i in range(stop, start + max_lines // 2, -1):
+                if not lines[i - 1].strip():
+                    stop = i
+                    break
+        text = "\n".join(lines[start - 1:stop])
+        if text.strip():
+            chunks.append(Chunk(path, start, stop, kind, name, text))
+        start = stop + 1
+    return chunks
+
+
+def _python_chunks(path: str, source: str, lines: List[str], max_lines: int) -> List[Chunk]:
+    """Python: legfelső szintű függvények és osztályok (nagy osztálynál metódusonként), köztük blokkok"""
+    tree = ast.parse(source)
+    spans = []
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        # A közvetlenül előtte álló megjegyzés sorok is a szakaszhoz tartoznak
+        while start > 1 and lines[start - 2].lstrip().startswith("#"):
+            start -= 1
+        end = node.end_lineno or node.lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            spans.append((start, end, "function", node.name))
+        elif isinstance(node, ast.ClassDef):
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            if end - start + 1 <= max_lines or not methods:
+                spans.append((start, end, "class", node.name))
+                continue
+            # Osztály fejléc (docstring, attribútumok) az első metódusig, utána metódusonként
+            cursor = start
+            for method in methods:
+                method_start = min([method.lineno] + [d.lineno for d in method.decorator_list])
+                if method_start > cursor:
+                    spans.append((cursor, method_start - 1, "class", node.name))
+                spans.append((method_start, method.end_lineno, "method", f"{node.name}.{method.name}"))
+                cursor = method.end_lineno + 1
+            if cursor <= end:
+                spans.append((cursor, end, "class", node.name))
+        else:
+            spans.append((start, end, "block", None))
+    return _merge_blocks(path, lines, spans, max_lines)
+
+
+def _merge_blocks(path: str, lines: List[str], spans, max_lines: int) -> List[Chunk]:
+    """Egymást követő "block" szakaszok (importok, konstansok) összevonása, a többi darabolása"""
+    chunks = []
+    pending = None
+    for start, end, kind, name in spans:
+        if kind == "block":
+            if pending and end - pending[0] + 1 <= max_lines:
+                pending = (pending[0], end)
+                continue
+            if pending:
+                chunks.extend(_split_long(path, lines, pending[0], pending[1], "block", None, max_lines))
+            pending = (start, end)
+            continue
+        if pending:
+            chunks.extend(_split_long(path, lines, pending[0], pending[1], "block", None, max_lines))
+            pending = None
+        chunks.extend(_split_long(path, lines, start, end, kind, name, max_lines))
+    if pending:
+        chunks.extend(_split_long(path, lines, pending[0], pending[1], "block", None, max_lines))
+    return chunks
+
+
+def _merge_small(chunks: List[Chunk], lines: List[str], min_lines: int, max_lines: int) -> List[Chunk]:
+    """A nagyon rövid darabok hozzácsatolása az előzőhöz (a túl kevés szöveg zajos találatot ad)"""
+    merged: List[Chunk] = []
+    for chunk in chunks:
+        previous = merged[-1] if merged else None
+        if (previous is not None and chunk.end_line - chunk.start_line + 1 < min_lines
+                and chunk.end_line - previous.start_line + 1 <= max_lines):
+            previous.end_line = chunk.end_line
+            previous.text = "\n".join(lines[previous.start_line - 1:chunk.end_line])
+            continue
+        merged.append(chunk)
+    return merged
+
+
+def _boundary_chunks(path: str, lines: List[str], max_lines: int, markdown: bool) -> List[Chunk]:
+    """Más nyelvek: vágás a behúzás nélküli definícióknál (markdown-nál a címsoroknál)"""
+    boundaries = []
+    for number, line in enumerate(lines, 1):
+        if markdown:
+            if MARKDOWN_HEADING.match(line):
+                boundaries.append((number, "section", line.lstrip("#").strip()[:80]))
+        elif line[:1] not in (" ", "\t") and DEFINITION_PATTERN.match(line):
+            match = DEFINITION_NAME_PATTERN.search(line)
+            boundaries.append((number, "definition", match.group(1) if match else None))
+    
+    if not boundaries or boundaries[0][0] > 1:
+        boundaries.insert(0, (1, "block", None))
+    spans = []
+    for i, (start, kind, name) in enumerate(boundaries):
+        end = boundaries[i + 1][0] - 1 if i + 1 < len(boundaries) else len(lines)
+        spans.append((start, end, kind, name))
+    chunks = _merge_blocks(path, lines, spans, max_lines)
+    return _merge_small(chunks, lines, 5, max_lines) if markdown else chunks
+
+
+def chunk_source(path: str, source: str, max_lines: int = 60) -> List[Chunk]:
+    """Fájl darabolása szintaxis szerint
+    
+    Args:
+        path: Fájl útvonal (a nyelvet a kiterjesztés adja)
+        source: Fájl tartalma
+        max_lines: Egy darab maximális hossza sorban
+    
+    Returns:
+        Darabok a fájlbeli sorrendben
+    """
+    lines = source.splitlines()
+    if not lines:
+        return []
+    if path.endswith(".py"):
+        try:
+            return _python_chunks(path, source, lines, max_lines)
+        except (SyntaxError, ValueError):
+            pass
+    return _boundary_chunks(path, lines, max_lines, markdown=path.endswith(".md"))
@@ -0,0 +1,444 @@
+"""
+Code Retriever - Kódrészletek embedding alapú visszakeresése a projekt kontextushoz
+"""
+import re
+import heapq
+import json
+import math
+import zlib
+import hashlib
+import logging
+import threading
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.file_index import FileIndex, Changes
+from core.code_chunker import chunk_source
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+IDENTIFIER_PATTERN = re.compile(r"[^\W\d]\w+")
+# Gyakori kulcsszavak / töltelékszavak, amelyek nem hordoznak jelentést a kereséshez
+STOPWORDS = {
+    "self", "return", "def", "class", "import", "from", "if", "else", "elif", "for", "in",
+    "is", "not", "and", "or", "none", "true", "false", "try", "except", "with", "as", "the",
+    "a", "an", "of", "to", "const", "let", "var", "function", "this", "new", "str", "int",
+    "dict", "list", "optional", "az", "a", "egy", "és", "is", "nem", "ha", "de"
+}
+CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+class HashingEmbedder:
+    """Modell nélküli embedding: azonosítók és részszavaik feature hash-elése fix dimenzióra
+    
+    Lexikális hasonlóságot mér (közös azonosítók, snake_case / camelCase tagok), ezért
+    kódkeresésre offline is használható; ha van embedding modell, az OllamaEmbedder pontosabb.
+    """
+    
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hash-{dim}"
+    
+    def _features(self, text: str):
+        for token in IDENTIFIER_PATTERN.findall(text):
+            lowered = token.lower()
+            if lowered in STOPWORDS:
+                continue
+            yield lowered, 1.0
+            parts = [p.lower() for piece in token.split("_") for p in CAMEL_PATTERN.findall(piece)]
+            if len(parts) > 1:
+                for part in parts:
+                    if len(part) > 1 and part not in STOPWORDS:
+                        yield part, 0.5
+    
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            counts: Dict[str, float] = {}
+            for feature, weight in self._features(text):
+                counts[feature] = counts.get(feature, 0.0) + weight
+            vector = [0.0] * self.dim
+            for feature, count in counts.items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                vector[h % self.dim] += (1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+            vectors.append(_normalize(vector))
+        return vectors
+
+
+class OllamaEmbedder:
+    """Embedding az Ollama /api/embed végpontján keresztül (pl. nomic-embed-text)"""
+    
+    def __init__(self, llm_service, model: str):
+        self.llm = llm_service
+        self.model = model
+        self.name = f"ollama:{model}"
+        self.dim: Optional[int] = None
+    
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        vectors = [_normalize(v) for v in self.llm.embed(texts, model=self.model)]
+        if vectors and self.dim is None:
+            self.dim = len(vectors[0])
+        return vectors
+
+
+class VectorStore:
+    """float32 vektorok sorfolytonos bináris fájlban (sor = row * dim * 4 byte)
+    
+    NumPy-val a vektorok egy mátrixban vannak és a keresés egy mátrix-vektor szorzás;
+    NumPy nélkül egy lapos array('f') tárolja őket és a skalárszorzat Pythonban fut.
+    """
+    
+    def __init__(self, path: Path, dim: int):
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+        if np is not None:
+            self._matrix = np.zeros((0, dim), dtype=np.float32)
+        else:
+            self._flat = array('f')
+    
+    def load(self, rows: int):
+        """Az első `rows` sor betöltése a fájlból"""
+        if not self.path.exists():
+            return
+        count = min(rows, self.path.stat().st_size // (self.dim * 4))
+        if np is not None:
+            matrix = np.fromfile(self.path, dtype=np.float32, count=count * self.dim)
+            self._matrix = matrix.reshape(count, self.dim).copy()
+        else:
+            self._flat = array('f')
+            with open(self.path, 'rb') as f:
+                self._flat.fromfile(f, count * self.dim)
+        self.rows = count
+    
+    def _ensure(self, rows: int):
+        if rows <= self.rows:
+            return
+        if np is not None:
+            if rows > len(self._matrix):
+                grown = np.zeros((max(rows, len(self._matrix) * 2, 64), self.dim), dtype=np.float32)
+                grown[:len(self._matrix)] = self._matrix
+                self._matrix = grown
+        else:
+            self._flat.extend([0.0] * ((rows - self.rows) * self.dim))
+        self.rows = rows
+    
+    def write(self, vectors: Dict[int, List[float]]):
+        """Sorok beírása memóriába és a fájlba (csak a változott sorok)"""
+        if not vectors:
+            return
+        self._ensure(max(vectors) + 1)
+        mode = 'r+b' if self.path.exists() else 'w+b'
+        with open(self.path, mode) as f:
+            for row, vector in sorted(vectors.items()):
+                packed = array('f', vector)
+                if np is not None:
+                    self._matrix[row] = vector
+                else:
+                    self._flat[row * self.dim:(row + 1) * self.dim] = packed
+                f.seek(row * self.dim * 4)
+                packed.tofile(f)
+    
+    def top_k(self, query: List[float], rows: List[int], k: int) -> List[tuple]:
+        """A megadott sorok közül a query vektorral legnagyobb skalárszorzatú k sor: [(pontszám, sor)]"""
+        if not rows or k <= 0:
+            return []
+        if np is not None:
+            index = np.asarray(rows, dtype=np.int64)
+            scores = (self._matrix[:self.rows] @ np.asarray(query, dtype=np.float32))[index]
+            if len(scores) > k:
+                best = np.argpartition(-scores, k)[:k]
+            else:
+                best = np.arange(len(scores))
+            best = best[np.argsort(-scores[best])]
+            return [(float(scores[i]), rows[i]) for i in best]
+        dim = self.dim
+        flat = self._flat
+        scored = ((sum(a * b for a, b in zip(flat[row * dim:(row + 1) * dim], query)), row) for row in rows)
+        return heapq.nlargest(k, scored)
+    
+    def get(self, row: int) -> List[float]:
+        if np is not None:
+            return self._matrix[row].tolist()
+        return self._flat[row * self.dim:(row + 1) * self.dim].tolist()
+
+
+class CodeRetriever:
+    """Szintaxis alapú kódrészletek vektor indexe
+    
+    A fájlokat függvényekre / osztályokra / blokkokra daraboljuk, a darabokat beágyazzuk és
+    a vektorokat a lemezen tároljuk (data/index/vectors.f32 + chunks.json). A FileIndex
+    értesítései alapján csak a változott fájlokat daraboljuk újra, és csak azokat a
+    darabokat ágyazzuk be, amelyek szövege új (egy függvény módosítása egy embedding).
+    """
+    
+    def __init__(self, file_index: FileIndex, embedder: Optional[Callable] = None,
+                 index_dir: Optional[str] = None, max_lines: int = 60,
+                 max_file_size: int = 256 * 1024, batch_size: int = 32):
+        """
+        Args:
+            file_index: Projekt fájl index
+            embedder: Embedding függvény (name és dim attribútummal); None = HashingEmbedder
+            index_dir: Index könyvtár (None = a FileIndex könyvtára)
+            max_lines: Egy darab maximális hossza sorban
+            max_file_size: Ennél nagyobb fájlokat nem darabolunk
+            batch_size: Egy embedding kérésben ennyi darab
+        """
+        self.file_index = file_index
+        self.embedder = embedder or HashingEmbedder()
+        self.index_dir = Path(index_dir) if index_dir else file_index.index_dir
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.meta_file = self.index_dir / "chunks.json"
+        self.vector_file = self.index_dir / "vectors.f32"
+        self.max_lines = max_lines
+        self.max_file_size = max_file_size
+        self.batch_size = batch_size
+        
+        self.dim: Optional[int] = getattr(self.embedder, "dim", None)
+        self._store: Optional[VectorStore] = None
+        # sor -> [útvonal, kezdő sor, záró sor, fajta, név, szöveg hash]
+        self._chunks: Dict[int, list] = {}
+        self._file_rows: Dict[str, List[int]] = {}
+        self._file_hashes: Dict[str, Optional[str]] = {}
+        self._by_text: Dict[str, int] = {}
+        self._rows = 0
+        self._free: List[int] = []
+        self._lock = threading.RLock()
+        # Egyszerre csak egy frissítés fut (építő szál / változás értesítés): a _index_file
+        # két zár szakasza között a reuse sorok így nem szabadulhatnak fel és osztódhatnak ki újra
+        self._apply_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        self.embedded_chunks = 0
+        self.reused_chunks = 0
+        
+        self._load()
+        file_index.subscribe(self._on_changes)
+    
+    def _load(self):
+        """Perzisztált index betöltése (más embedderrel készült indexet eldobunk)"""
+        if not self.meta_file.exists():
+            return
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("embedder") != self.embedder.name or not data.get("dim"):
+                logger.info("Code retrieval index built with another embedder, rebuilding")
+                return
+            self.dim = data["dim"]
+            self._store = VectorStore(self.vector_file, self.dim)
+            self._store.load(data["rows"])
+            if self._store.rows < data["rows"]:
+                raise ValueError("vector file is shorter than the metadata")
+            self._rows = data["rows"]
+            self._file_hashes = data["files"]
+            self._chunks = {int(row): meta for row, meta in data["chunks"].items()}
+            for row, meta in self._chunks.items():
+                self._file_rows.setdefault(meta[0], []).append(row)
+                self._by_text[meta[5]] = row
+            used = set(self._chunks)
+            self._free = [row for row in range(self._rows) if row not in used]
+        except Exception as e:
+            logger.warning(f"Code retrieval index load error: {e}")
+            self._store = None
+            self._chunks, self._file_rows, self._file_hashes, self._by_text = {}, {}, {}, {}
+            self._rows, self._free = 0, []
+    
+    def _save(self):
+        """Metaadatok mentése (a vektorok soronként már kiíródtak)"""
+        # A zár alatt írunk: az építő szál és a változás értesítés ugyanazt a temp fájlt használja
+        with self._lock:
+            data = {
+                "embedder": self.embedder.name,
+                "dim": self.dim,
+                "rows": self._rows,
+                "files": self._file_hashes,
+                "chunks": {str(row): meta for row, meta in self._chunks.items()}
+            }
+            temp_file = self.meta_file.with_suffix(".json.tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            temp_file.replace(self.meta_file)
+    
+    @staticmethod
+    def _embed_text(path: str, name: Optional[str], text: str) -> str:
+        return f"{path} {name or ''}\n{text}"
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self.embedder(texts[i:i + self.batch_size]))
+        return vectors
+    
+    def _index_file(self, path: str) -> List[int]:
+        """Fájl újradarabolása; visszaadja a felszabadult sorokat
+        
+        A felszabadult sorokat csak a metaadatok mentése után szabad újra kiosztani, különben
+        egy összeomlás után a régi metaadat felülírt vektorra mutatna.
+        """
+        entry = self.file_index.get(path)
+        if entry is None or not entry.is_text or entry.size > self.max_file_size:
+            return self._remove_file(path)
+        if path in self._file_hashes and self._file_hashes[path] == entry.hash and entry.hash:
+            return []
+        content = self.file_index.read_text(path)
+        chunks = chunk_source(path, content or "", self.max_lines)
+        
+        texts = [self._embed_text(path, c.name, c.text) for c in chunks]
+        digests = [hashlib.blake2b(t.encode("utf-8"), digest_size=12).hexdigest() for t in texts]
+        with self._lock:
+            reuse = {d: self._by_text[d] for d in digests if d in self._by_text}
+        missing = [i for i, d in enumerate(digests) if d not in reuse]
+        # Az embedding a zár nélkül fut (modell hívás is lehet)
+        fresh = self._embed([texts[i] for i in missing]) if missing else []
+        
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(fresh[0]) if fresh else getattr(self.embedder, "dim", None)
+            if self._store is None:
+                if self.dim is None:
+                    return []
+                # Új index: a korábbi (pl. más embedderrel készült) vektor fájl eldobása
+                self.vector_file.unlink(missing_ok=True)
+                self._store = VectorStore(self.vector_file, self.dim)
+            
+            vectors: Dict[int, List[float]] = {}
+            rows = []
+            fresh_by_index = dict(zip(missing, fresh))
+            for i, (chunk, digest) in enumerate(zip(chunks, digests)):
+                row = self._free.pop() if self._free else self._allocate()
+                if i in fresh_by_index:
+                    vectors[row] = fresh_by_index[i]
+                    self.embedded_chunks += 1
+                else:
+                    vectors[row] = self._store.get(reuse[digest])
+                    self.reused_chunks += 1
+                rows.append(row)
+            self._store.write(vectors)
+            
+            freed = self._remove_file(path)
+            for row, chunk, digest in zip(rows, chunks, digests):
+                self._chunks[row] = [path, chunk.start_line, chunk.end_line, chunk.kind, chunk.name, digest]
+                self._by_text[digest] = row
+            self._file_rows[path] = rows
+            self._file_hashes[path] = entry.hash
+            return freed
+    
+    def _allocate(self) -> int:
+        row = self._rows
+        self._rows += 1
+        return row
+    
+    def _remove_file(self, path: str) -> List[int]:
+        with self._lock:
+            rows = self._file_rows.pop(path, [])
+            self._file_hashes.pop(path, None)
+            for row in rows:
+                meta = self._chunks.pop(row, None)
+                if meta and self._by_text.get(meta[5]) == row:
+                    del self._by_text[meta[5]]
+            return rows
+    
+    def _apply(self, paths: List[str], removed: List[str]):
+        with self._apply_lock:
+            freed = []
+            for path in removed:
+                freed.extend(self._remove_file(path))
+            for path in paths:
+                try:
+                    freed.extend(self._index_file(path))
+                except Exception as e:
+                    logger.warning(f"Code retrieval index error ({path}): {e}")
+            try:
+                self._save()
+            except Exception as e:
+                logger.warning(f"Code retrieval index save error: {e}")
+                return
+            with self._lock:
+                self._free.extend(freed)
+    
+    def _on_changes(self, changes: Changes):
+        """FileIndex értesítés: a változott fájlok újradarabolása"""
+        self._apply(changes.get("added", []) + changes.get("modified", []), changes.get("removed", []))
+    
+    def build(self):
+        """Index építése / szinkronizálása (a nem változott fájlokat átugorja)"""
+        paths = self.file_index.files(text_only=True)
+        current = set(paths)
+        with self._lock:
+            stale = [path for path in self._file_rows if path not in current]
+        self._apply(paths, stale)
+        self._ready.set()
+        logger.info(f"Code retrieval index ready: {len(self._chunks)} chunks "
+                    f"({self.embedded_chunks} embedded, {self.reused_chunks} reused)")
+    
+    def start(self):
+        """Index építése háttér szálon"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.build, name="code-retriever", daemon=True)
+        self._thread.start()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Megvárja az első építést (ha nem fut, szinkron épít)"""
+        if not self._ready.is_set() and (self._thread is None or not self._thread.is_alive()):
+            self.build()
+        return self._ready.wait(timeout)
+    
+    def search(self, query: str, top_k: int = 8) -> List[Dict]:
+        """A query-hez leginkább hasonló kódrészletek
+        
+        Returns:
+            [{"path", "start_line", "end_line", "kind", "name", "score", "text"}] csökkenő pontszám szerint
+        """
+        self.wait_ready()
+        query_vector = self.embedder([query])[0]
+        with self._lock:
+            if self._store is None or not self._chunks:
+                return []
+            ranked = self._store.top_k(query_vector, list(self._chunks), top_k)
+            hits = [(score, self._chunks[row]) for score, row in ranked]
+        
+        results = []
+        contents: Dict[str, List[str]] = {}
+        for score, (path, start, end, kind, name, _) in hits:
+            if path not in contents:
+                contents[path] = (self.file_index.read_text(path) or "").splitlines()
+            results.append({
+                "path": path,
+                "start_line": start,
+                "end_line": end,
+                "kind": kind,
+                "name": name,
+                "score": round(float(score), 4),
+                "text": "\n".join(contents[path][start - 1:end])
+            })
+        return results
+    
+    def get_stats(self) -> Dict:
+        """Index statisztika"""
+        with self._lock:
+            return {
+                "ready": self._ready.is_set(),
+                "embedder": self.embedder.name,
+                "dim": self.dim,
+                "numpy": np is not None,
+                "files": len(self._file_rows),
+                "chunks": len(self._chunks),
+                "rows": self._rows,
+                "free_rows": len(self._free),
+                "embedded_chunks": self.embedded_chunks,
+                "reused_chunks": self.reused_chunks
+            }
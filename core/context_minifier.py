@@ -0,0 +1,373 @@
+"""
+Context Minifier - Forráskód tömörítése prompt kontextusnak (kommentek, üres sorok, literál táblák)
+"""
+import io
+import re
+import ast
+import tokenize
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from core.file_index import EXTENSION_LANGUAGES
+from core.conversation_memory import estimate_tokens
+
+HASH_COMMENT_LANGUAGES = {"python", "ruby", "shell", "yaml", "toml"}
+C_COMMENT_LANGUAGES = {"javascript", "typescript", "java", "cpp", "c", "rust", "go", "php", "swift", "kotlin", "css"}
+EXTRA_LANGUAGES = {".sh": "shell", ".yml": "yaml", ".yaml": "yaml", ".toml": "toml", ".h": "c", ".xml": "html",
+                   ".vue": "html", ".svelte": "html"}
+
+# Megtartandó kommentek (fordítói / linter direktívák)
+PRAGMA_COMMENT = re.compile(r"#!|#\s*(?:-\*-|type:|noqa|pragma|pylint:|fmt:)|//\s*(?:@ts-|eslint|go:|nolint)")
+HEADER_KEYWORDS = re.compile(r"licen[cs]e|copyright|spdx|all rights reserved", re.IGNORECASE)
+GENERATED_MARKER = re.compile(r"@generated|do not edit|auto-?generated|generated by", re.IGNORECASE)
+# Csak literálokból álló sor (táblázat, lista, dict elem)
+LITERAL_LINE = re.compile(
+    r"""^\s*[\[{(]?\s*(?:(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|(?:-?[\d.]+(?:e-?\d+)?|0x[\da-fA-F]+|"""
+    r"""true|false|null|True|False|None)(?![\w.]))\s*[:=,]?\s*)+[\]})]?\s*[,;]?\s*$"""
+)
+
+
+@dataclass
+class MinifiedText:
+    """Tömörített szöveg sor megfeleltetéssel
+    
+    line_map[i] a tömörített szöveg (i + 1). sorának eredeti sorszáma (1-től számozva).
+    """
+    text: str
+    line_map: List[int] = field(default_factory=list)
+    original_tokens: int = 0
+    tokens: int = 0
+    header: str = ""
+    
+    @property
+    def saved_tokens(self) -> int:
+        return max(self.original_tokens - self.tokens, 0)
+    
+    def original_line(self, line: int) -> int:
+        """A tömörített szöveg egy sorának eredeti sorszáma"""
+        if not self.line_map:
+            return line
+        return self.line_map[min(max(line, 1), len(self.line_map)) - 1]
+    
+    def stats(self) -> dict:
+        return {
+            "original_tokens": self.original_tokens,
+            "tokens": self.tokens,
+            "saved_tokens": self.saved_tokens
+        }
+
+
+def detect_language(path: str) -> Optional[str]:
+    suffix = Path(path).suffix.lower()
+    return EXTENSION_LANGUAGES.get(suffix) or EXTRA_LANGUAGES.get(suffix)
+
+
+def _comment(language: Optional[str], text: str) -> str:
+    """Megjegyzés sor a nyelv szintaxisával (az elhagyott részek jelölésére)"""
+    if language in HASH_COMMENT_LANGUAGES:
+        return f"# {text}"
+    if language == "sql":
+        return f"-- {text}"
+    if language in ("html", "css"):
+        return f"/* {text} */" if language == "css" else f"<!-- {text} -->"
+    return f"// {text}"
+
+
+def _strip_python(source: str, lines: List[str]) -> List[Optional[str]]:
+    """Python: kommentek törlése tokenize-zal, többsoros docstringek az első sorukra"""
+    result: List[Optional[str]] = list(lines)
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type != tokenize.COMMENT or PRAGMA_COMMENT.match(token.string):
+            continue
+        row, column = token.start
+        result[row - 1] = result[row - 1][:column].rstrip()
+    
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return result
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        body = node.body
+        if not body or not isinstance(body[0], ast.Expr) or not isinstance(getattr(body[0], "value", None), ast.Constant) \
+                or not isinstance(body[0].value.value, str):
+            continue
+        start, end = body[0].lineno, body[0].end_lineno or body[0].lineno
+        if end == start:
+            continue
+        indent = lines[start - 1][:len(lines[start - 1]) - len(lines[start - 1].lstrip())]
+        summary = next((line.strip() for line in body[0].value.value.splitlines() if line.strip()), "")
+        result[start - 1] = f'{indent}"""{summary.replace(chr(34) * 3, "")}"""'
+        for number in range(start + 1, end + 1):
+            result[number - 1] = None
+    return result
+
+
+def _strip_c_like(source: str, language: str) -> List[str]:
+    """C-szerű nyelvek: // és /* */ kommentek törlése (stringek és template literálok kihagyva)"""
+    quotes = "\"'`" if language != "rust" else "\"`"
+    out = []
+    i, length = 0, len(source)
+    while i < length:
+        char = source[i]
+        if char in quotes:
+            j = i + 1
+            while j < length and source[j] != char and (char == "`" or source[j] != "\n"):
+                j += 2 if source[j] == "\\" else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif source.startswith("//", i) and language != "css":
+            j = source.find("\n", i)
+            j = length if j < 0 else j
+            comment = source[i:j]
+            out.append(comment if PRAGMA_COMMENT.match(comment) else "")
+            i = j
+        elif source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            j = length if j < 0 else j + 2
+            # A sorok száma nem változhat (sor megfeleltetés)
+            out.append("\n" * source.count("\n", i, j))
+            i = j
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out).split("\n")
+
+
+def _string_end(source: str, i: int, language: str) -> int:
+    """A source[i]-nél kezdődő string literál utáni pozíció
+    
+    Shell és Ruby idézőjeles stringben a ${...} / $(...) illetve #{...} behelyettesítés
+    kódként olvasódik (benne újabb stringekkel). YAML/TOML stringek sorvégig tartanak (a TOML
+    három idézőjeles stringje kivételével), SQL-ben és shell aposztrófos stringben nincs escape.
+    """
+    length = len(source)
+    quote = source[i]
+    if language == "toml" and source.startswith(quote * 3, i):
+        end = source.find(quote * 3, i + 3)
+        return length if end < 0 else end + 3
+    escapes = language != "sql" and not (language == "shell" and quote == "'")
+    single_line = language in ("yaml", "toml")
+    j = i + 1
+    while j < length:
+        char = source[j]
+        if char == "\\" and escapes:
+            j += 2
+        elif char == quote:
+            return j + 1
+        elif char == "\n" and single_line:
+            return j
+        elif quote == '"' and language == "ruby" and source.startswith("#{", j):
+            j = _block_end(source, j + 2, "{", "}", language)
+        elif quote == '"' and language == "shell" and source.startswith(("${", "$("), j):
+            j = _block_end(source, j + 2, source[j + 1], "}" if source[j + 1] == "{" else ")", language)
+        else:
+            j += 1
+    return length
+
+
+def _block_end(source: str, j: int, opener: str, closer: str, language: str) -> int:
+    """Behelyettesítés (a nyitó zárójel után) végének pozíciója, a beágyazott stringeket átugorva"""
+    depth = 1
+    length = len(source)
+    while j < length:
+        char = source[j]
+        if char in "\"'":
+            j = _string_end(source, j, language)
+            continue
+        if char == opener:
+            depth += 1
+        elif char == closer:
+            depth -= 1
+            if depth == 0:
+                return j + 1
+        j += 1
+    return length
+
+
+def _is_hash_comment(source: str, i: int, language: str) -> bool:
+    """# kommentet kezd-e (stringen kívül)
+    
+    YAML-ban csak szóköz vagy sor eleje után, shell-ben szó elején (így ${#arr[@]}, $#, a#b
+    nem komment), Ruby-ban és TOML-ban nem közvetlenül azonosító vagy $ után.
+    """
+    previous = source[i - 1] if i else "\n"
+    if previous.isspace():
+        return True
+    if language == "shell":
+        return previous in ";&|()"
+    if language in ("ruby", "toml"):
+        return not (previous.isalnum() or previous in "_$")
+    return False
+
+
+def _opens_string(source: str, i: int, language: str) -> bool:
+    """Idézőjel stringet nyit-e: YAML/TOML-ban csak érték elején (így a "don't" nem)"""
+    if language not in ("yaml", "toml"):
+        return True
+    previous = source[i - 1] if i else "\n"
+    return previous.isspace() or previous in ":[{,=-?"
+
+
+def _strip_scanned(source: str, language: str) -> List[str]:
+    """Hash (#), SQL (-- és /* */) és HTML (<!-- -->) kommentek törlése stringeket követő szkennerrel
+    
+    A sorok száma nem változik (sor megfeleltetés). HTML-ben a stringek csak a tag-eken belül
+    számítanak (a szövegben lévő aposztróf nem nyit stringet).
+    """
+    out = []
+    i, length = 0, len(source)
+    in_tag = False
+    while i < length:
+        char = source[i]
+        if language == "html":
+            if in_tag and char in "\"'":
+                end = source.find(char, i + 1)
+                end = length if end < 0 else end + 1
+                out.append(source[i:end])
+                i = end
+                continue
+            if not in_tag and source.startswith("<!--", i):
+                end = source.find("-->", i + 4)
+                end = length if end < 0 else end + 3
+                out.append("\n" * source.count("\n", i, end))
+                i = end
+                continue
+            if char == "<" and i + 1 < length and (source[i + 1].isalpha() or source[i + 1] in "/!?"):
+                in_tag = True
+            elif char == ">":
+                in_tag = False
+            out.append(char)
+            i += 1
+        elif char in "\"'" and _opens_string(source, i, language):
+            end = _string_end(source, i, language)
+            out.append(source[i:end])
+            i = end
+        elif (char == "#" and language != "sql" and _is_hash_comment(source, i, language)) or \
+                (language == "sql" and source.startswith("--", i)):
+            end = source.find("\n", i)
+            end = length if end < 0 else end
+            comment = source[i:end]
+            out.append(comment if PRAGMA_COMMENT.match(comment) else "")
+            i = end
+        elif language == "sql" and source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = length if end < 0 else end + 2
+            out.append("\n" * source.count("\n", i, end))
+            i = end
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out).split("\n")
+
+
+def _header_end(lines: List[str], language: Optional[str]) -> int:
+    """A fájl eleji licenc / banner komment blokk vége (0, ha nincs)"""
+    prefixes = ("#",) if language in HASH_COMMENT_LANGUAGES else ("--",) if language == "sql" else ("//", "/*", "*")
+    end = 0
+    comment_lines = 0
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if number == 1 and stripped.startswith("#!"):
+            continue
+        if stripped.startswith(prefixes) or (comment_lines and stripped.endswith("*/")):
+            if PRAGMA_COMMENT.match(stripped):
+                continue
+            comment_lines += 1
+            end = number
+        elif stripped and not (language == "html" and stripped.startswith("<!--")):
+            break
+    block = "\n".join(lines[:end])
+    if comment_lines >= 5 or (comment_lines and HEADER_KEYWORDS.search(block)):
+        return end
+    return 0
+
+
+def minify(source: str, path: str = "", language: Optional[str] = None, level: str = "full",
+           max_literal_lines: int = 8, max_generated_lines: int = 20) -> MinifiedText:
+    """Forráskód tömörítése prompt kontextusnak
+    
+    Args:
+        source: Fájl tartalma
+        path: Fájl útvonal (a nyelvet a kiterjesztés adja, ha nincs megadva)
+        language: Nyelv felülírása
+        level: "full" = kommentek, üres sor sorozatok, literál táblák, generált kód; "header" = csak a
+            fájl eleji licenc / banner blokk (a szerkesztett kód ehhez visszailleszthető)
+        max_literal_lines: Az ennél hosszabb literál táblák közepe elhagyva
+        max_generated_lines: Generált fájlból ennyi sor marad
+    
+    Returns:
+        MinifiedText a sor megfeleltetéssel és a token megtakarítással
+    """
+    language = language or detect_language(path)
+    lines = source.split("\n")
+    original_tokens = estimate_tokens(source)
+    
+    header_end = _header_end(lines, language)
+    header = "\n".join(lines[:header_end]) + "\n" if header_end else ""
+    if level == "header":
+        text = "\n".join(lines[header_end:])
+        return MinifiedText(text, list(range(header_end + 1, len(lines) + 1)), original_tokens,
+                            estimate_tokens(text), header)
+    
+    try:
+        if language == "python":
+            stripped: List[Optional[str]] = _strip_python(source, lines)
+        elif language in C_COMMENT_LANGUAGES:
+            stripped = _strip_c_like(source, language)
+        elif language in HASH_COMMENT_LANGUAGES or language in ("sql", "html"):
+            stripped = _strip_scanned(source, language)
+        else:
+            stripped = list(lines)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        stripped = list(lines)
+    if len(stripped) != len(lines):
+        stripped = list(lines)
+    
+    # Csak-komment sorok és üres sor sorozatok elhagyása (a shebang a fejléc előtt marad)
+    kept: List[tuple] = []
+    for number, (original, line) in enumerate(zip(lines, stripped), 1):
+        if line is None or (number <= header_end and not (number == 1 and original.startswith("#!"))):
+            continue
+        line = line.rstrip()
+        if not line.strip():
+            if original.strip() or not kept or not kept[-1][1].strip():
+                continue
+        kept.append((number, line))
+    while kept and not kept[-1][1].strip():
+        kept.pop()
+    
+    # Generált kód: csak az eleje
+    if GENERATED_MARKER.search("\n".join(lines[:10])) and len(kept) > max_generated_lines:
+        omitted = len(kept) - max_generated_lines
+        marker_line = kept[max_generated_lines][0]
+        kept = kept[:max_generated_lines] + [(marker_line, _comment(language, f"... generált kód, {omitted} sor elhagyva"))]
+    else:
+        kept = _collapse_literals(kept, language, max_literal_lines)
+    
+    text = "\n".join(line for _, line in kept)
+    return MinifiedText(text, [number for number, _ in kept], original_tokens, estimate_tokens(text), header)
+
+
+def _collapse_literals(kept: List[tuple], language: Optional[str], max_lines: int) -> List[tuple]:
+    """Hosszú, csak literálokból álló sorozatok: az első néhány és az utolsó sor marad"""
+    result = []
+    i = 0
+    while i < len(kept):
+        j = i
+        while j < len(kept) and kept[j][1].strip() and LITERAL_LINE.match(kept[j][1]):
+            j += 1
+        if j - i > max_lines:
+            run = kept[i:j]
+            indent = run[0][1][:len(run[0][1]) - len(run[0][1].lstrip())]
+            omitted = len(run) - 4
+            result.extend(run[:3])
+            result.append((run[3][0], indent + _comment(language, f"... {omitted} hasonló sor elhagyva")))
+            result.append(run[-1])
+            i = j
+        else:
+            result.append(kept[i])
+            i += 1
+    return result
@@ -0,0 +1,261 @@
+"""
+Context Packer - Prompt kontextus összeállítása token budget-re (fájlok, kódrészletek, memória)
+"""
+import re
+import hashlib
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.code_chunker import chunk_source
+from core.conversation_memory import estimate_tokens
+
+TERM_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+ELISION = "⋮"
+
+
+@dataclass
+class Snippet:
+    """Kontextus jelölt (fájl, kódrészlet, definíció, memória)
+    
+    Fájlhoz tartozó részletnél a szöveg a start_line..end_line (1-től számozott, zárt) sorok
+    tartalma; teljes fájlnál a sortartomány üresen hagyható. Tömörített szövegnél (kihagyott
+    sorok) a line_map adja a szöveg soronkénti eredeti sorszámát.
+    """
+    text: str
+    score: float = 0.0
+    source: str = "file"
+    path: Optional[str] = None
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    name: Optional[str] = None
+    line_map: Optional[List[int]] = None
+    
+    def line_number(self, offset: int) -> int:
+        """A szöveg offset. (0-tól számozott) sorának eredeti sorszáma"""
+        if self.line_map:
+            return self.line_map[min(offset, len(self.line_map) - 1)]
+        return (self.start_line or 1) + offset
+    
+    def slice(self, begin: int, end: int, text: Optional[str] = None) -> "Snippet":
+        """A szöveg [begin, end) sorai (eredeti sorszámokkal)"""
+        lines = self.text.splitlines()
+        return replace(
+            self,
+            text=text if text is not None else "\n".join(lines[begin:end]),
+            start_line=self.line_number(begin),
+            end_line=self.line_number(end - 1),
+            line_map=self.line_map[begin:end] if self.line_map else None
+        )
+
+
+def query_terms(text: str) -> Set[str]:
+    """A query azonosító jellegű szavai kisbetűsen (snake_case részekre bontva is)"""
+    terms = set()
+    for word in TERM_PATTERN.findall(text or ""):
+        word = word.lower()
+        terms.add(word)
+        terms.update(part for part in word.split("_") if len(part) > 2)
+    return terms
+
+
+def relevant_spans(snippet: Snippet, query: Optional[str], max_tokens: int) -> List[Snippet]:
+    """Teljes fájl szűkítése a query-hez illő szakaszokra (függvények, osztályok, blokkok)
+    
+    A szakaszok a query szavainak előfordulása szerint rangsorolódnak (query nélkül a fájl
+    eleje marad meg), és a budget-be férő legjobbak maradnak meg fájlbeli sorrendben.
+    """
+    terms = query_terms(query or "")
+    chunks = chunk_source(snippet.path or "", snippet.text)
+    ranked = []
+    for order, chunk in enumerate(chunks):
+        words = [word.lower() for word in TERM_PATTERN.findall(chunk.text)]
+        hits = sum(1 for word in words if word in terms) + (3 if chunk.name and chunk.name.lower() in terms else 0)
+        ranked.append((-hits, order, chunk))
+    ranked.sort(key=lambda item: item[:2])
+    
+    selected = []
+    budget = max_tokens
+    for _, _, chunk in ranked:
+        cost = estimate_tokens(chunk.text) + 2
+        if cost > budget:
+            continue
+        budget -= cost
+        selected.append(chunk)
+    return [
+        replace(snippet.slice(chunk.start_line - 1, chunk.end_line, chunk.text), name=chunk.name or snippet.name)
+        for chunk in sorted(selected, key=lambda c: c.start_line)
+    ]
+
+
+class ContextPacker:
+    """Relevancia pontszámos jelöltek bepakolása egy token budget-be
+    
+    A jelöltek csökkenő pontszám szerint kerülnek be. Az azonos fájl már bekerült soraival
+    átfedő részletekből csak a még hiányzó sorok maradnak, a szó szerint ismétlődő szöveg
+    kimarad. A budget-be nem férő teljes fájlok a releváns szakaszaikra szűkülnek, a többi
+    túl nagy részlet a végéről rövidül. Az eredmény fájlonként, sorrendben renderelődik.
+    """
+    
+    def __init__(self, max_tokens: int = 2000, min_tokens: int = 24):
+        """
+        Args:
+            max_tokens: Token budget a teljes kontextusra
+            min_tokens: Ennél kisebb maradék budget-be már nem rövidítünk részletet
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+    
+    @staticmethod
+    def _header(snippet: Snippet) -> str:
+        if snippet.path is None:
+            return f"--- {snippet.name or snippet.source} ---"
+        label = f" ({snippet.name})" if snippet.name else ""
+        return f"--- {snippet.path}:{snippet.start_line}-{snippet.end_line}{label} ---"
+    
+    @staticmethod
+    def _uncovered(snippet: Snippet, covered: List[Tuple[int, int]]) -> List[Snippet]:
+        """A részlet még be nem került sortartományai"""
+        lines = snippet.text.splitlines()
+        parts = []
+        run_start = None
+        for offset in range(len(lines) + 1):
+            number = snippet.line_number(offset)
+            free = offset < len(lines) and not any(start <= number <= end for start, end in covered)
+            if free and run_start is None:
+                run_start = offset
+            elif not free and run_start is not None:
+                part = snippet.slice(run_start, offset)
+                if part.text.strip():
+                    parts.append(part)
+                run_start = None
+        return parts
+    
+    def _truncate(self, snippet: Snippet, budget: int) -> Optional[Snippet]:
+        """A részlet eleje, ami még belefér a budget-be"""
+        kept = []
+        cost = estimate_tokens(self._header(snippet)) + 1
+        for line in snippet.text.splitlines():
+            line_cost = len(line) // 4 + 1
+            if cost + line_cost > budget:
+                break
+            kept.append(line)
+            cost += line_cost
+        if not kept or not "\n".join(kept).strip():
+            return None
+        if snippet.path is None:
+            return replace(snippet, text="\n".join(kept + [ELISION]))
+        return snippet.slice(0, len(kept), "\n".join(kept + [ELISION]))
+    
+    def pack(self, snippets: List[Snippet], query: Optional[str] = None,
+             max_tokens: Optional[int] = None) -> Dict:
+        """Jelöltek bepakolása
+        
+        Args:
+            snippets: Jelöltek (bármilyen sorrendben)
+            query: A kérés szövege (teljes fájlok szűkítéséhez)
+            max_tokens: A példány budget-jének felülírása
+        
+        Returns:
+            {"text", "tokens", "max_tokens", "included": [...], "dropped": [...]}
+        """
+        budget = max_tokens or self.max_tokens
+        remaining = budget
+        covered: Dict[str, List[Tuple[int, int]]] = {}
+        seen_text = set()
+        included: List[Tuple[int, Snippet, bool]] = []
+        dropped = []
+        
+        def report(snippet: Snippet, **extra) -> Dict:
+            return {"source": snippet.source, "path": snippet.path, "name": snippet.name,
+                    "start_line": snippet.start_line, "end_line": snippet.end_line,
+                    "score": round(snippet.score, 4), **extra}
+        
+        order = sorted(enumerate(snippets), key=lambda item: (-item[1].score, item[0]))
+        for position, snippet in order:
+            if not snippet.text.strip():
+                continue
+            if snippet.path is not None and snippet.start_line is None:
+                line_count = max(len(snippet.text.splitlines()), 1)
+                snippet = replace(snippet, start_line=snippet.line_number(0),
+                                  end_line=snippet.line_number(line_count - 1))
+            digest = hashlib.blake2b(snippet.text.strip().encode("utf-8"), digest_size=12).digest()
+            if digest in seen_text:
+                dropped.append(report(snippet, reason="duplicate"))
+                continue
+            
+            parts = [snippet]
+            if snippet.path is not None:
+                parts = self._uncovered(snippet, covered.get(snippet.path, []))
+                if not parts:
+                    dropped.append(report(snippet, reason="duplicate"))
+                    continue
+            
+            count = len(included)
+            for part in parts:
+                trimmed = False
+                cost = estimate_tokens(self._header(part)) + estimate_tokens(part.text)
+                if cost > remaining and part.path is not None and part.source == "file":
+                    # Teljes fájl: a releváns szakaszai
+                    spans = relevant_spans(part, query, remaining - estimate_tokens(self._header(part)))
+                    spans = [span for span in spans
+                             if not any(start <= span.start_line and span.end_line <= end
+                                        for start, end in covered.get(span.path, []))]
+                    for span in spans:
+                        span_cost = estimate_tokens(self._header(span)) + estimate_tokens(span.text)
+                        if span_cost > remaining:
+                            continue
+                        remaining -= span_cost
+                        covered.setdefault(span.path, []).append((span.start_line, span.end_line))
+                        included.append((position, span, True))
+                    if spans:
+                        continue
+                if cost > remaining:
+                    part = self._truncate(part, remaining) if remaining >= self.min_tokens else None
+                    if part is None:
+                        continue
+                    cost = estimate_tokens(self._header(part)) + estimate_tokens(part.text)
+                    trimmed = True
+                remaining -= cost
+                if part.path is not None:
+                    covered.setdefault(part.path, []).append((part.start_line, part.end_line))
+                included.append((position, part, trimmed))
+            if len(included) == count:
+                dropped.append(report(snippet, reason="budget"))
+            seen_text.add(digest)
+        
+        text = self._render(included)
+        return {
+            "text": text,
+            "tokens": estimate_tokens(text) if text else 0,
+            "max_tokens": budget,
+            "included": [report(part, tokens=estimate_tokens(part.text), trimmed=trimmed)
+                         for _, part, trimmed in included],
+            "dropped": dropped
+        }
+    
+    def _render(self, included: List[Tuple[int, Snippet, bool]]) -> str:
+        """Fájlonként (a legjobb részlet sorrendjében), fájlon belül sorrendben"""
+        groups: Dict[Optional[str], List[Snippet]] = {}
+        first: Dict[Optional[str], int] = {}
+        for rank, (_, part, _) in enumerate(included):
+            key = part.path if part.path is not None else f"\0{rank}"
+            groups.setdefault(key, []).append(part)
+            first.setdefault(key, rank)
+        blocks = []
+        for key in sorted(groups, key=first.get):
+            merged: List[Snippet] = []
+            for part in sorted(groups[key], key=lambda p: p.start_line or 0):
+                previous = merged[-1] if merged else None
+                # Egymás utáni sortartományok egy blokkba
+                if (previous is not None and part.path is not None and previous.end_line is not None
+                        and part.start_line == previous.end_line + 1 and not previous.text.endswith(ELISION)):
+                    line_map = None
+                    if previous.line_map or part.line_map:
+                        line_map = [previous.line_number(i) for i in range(len(previous.text.splitlines()))] + \
+                                   [part.line_number(i) for i in range(len(part.text.splitlines()))]
+                    merged[-1] = replace(previous, text=f"{previous.text}\n{part.text}",
+                                         end_line=part.end_line, line_map=line_map)
+                    continue
+                merged.append(part)
+            blocks.extend(f"{self._header(part)}\n{part.text}\n" for part in merged)
+        return "\n".join(blocks)
@@ -1,49 +1,396 @@
 """
 Conversation Memory - Beszélgetési memória kezelés
 """
+import os
 import json
+import time
+import atexit
+import logging
+import threading
+import weakref
+from array import array
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+from core.memory_index import MemoryIndex
+
+logger = logging.getLogger(__name__)
+
+# fsync szabályok: "always" = minden üzenet után, "batch" = minden kiírt köteg után,
+# "never" = az operációs rendszerre bízzuk
+FSYNC_POLICIES = ("always", "batch", "never")
+
+
+def estimate_tokens(text: str) -> int:
+    """Token szám becslése (kb. 4 karakter / token)"""
+    return len(text) // 4 + 1
+
+
+class _WriteBehindFlusher:
+    """Közös háttér író szál az összes memória példányhoz"""
+    
+    def __init__(self, tick: float = 0.25):
+        self.tick = tick
+        self._memories = weakref.WeakSet()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush_all)
+    
+    def register(self, memory: "ConversationMemory"):
+        with self._lock:
+            self._memories.add(memory)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="memory-writer", daemon=True)
+                self._thread.start()
+    
+    def wake(self):
+        self._wakeup.set()
+    
+    def _loop(self):
+        while True:
+            self._wakeup.wait(self.tick)
+            self._wakeup.clear()
+            now = time.monotonic()
+            for memory in list(self._memories):
+                if memory.flush_due(now):
+                    try:
+                        memory.flush()
+                    except Exception as e:
+                        logger.error(f"Memory flush error: {e}")
+    
+    def flush_all(self):
+        for memory in list(self._memories):
+            try:
+                memory.flush()
+            except Exception as e:
+                logger.error(f"Memory flush error: {e}")
+
+
+_flusher = _WriteBehindFlusher()
+
 
 class ConversationMemory:
-    """Beszélgetési memória kezelője"""
+    """Beszélgetési memória kezelője
+    
+    A memória egy append-only JSON Lines naplóban (<projekt>.jsonl) tárolódik. Az új üzenetek
+    egy pufferbe kerülnek, amit egy háttér szál kötegekben ír ki (write-behind), így egy
+    üzenet hozzáadása O(1) és nem írja újra a teljes előzményt.
     
-    def __init__(self, project_name: str = "global", storage_dir: str = "./data/memory"):
+    A RAM-ban csak a legutóbbi `hot_window` üzenet van (`messages`); a régebbieket a napló
+    byte offsetjei alapján olvassuk vissza. A régi szakaszokat a MemorySummarizer gördülő
+    összefoglalóvá sűríti, ami szintén a naplóba kerül ("summary" rekord).
+    """
+    
+    def __init__(self, project_name: str = "global", storage_dir: str = "./data/memory",
+                 flush_interval: float = 1.0, batch_size: int = 64,
+                 fsync_policy: str = "batch", compact_ratio: float = 2.0,
+                 hot_window: int = 200):
+        """
+        Args:
+            project_name: Projekt neve (a napló fájl neve)
+            storage_dir: Tároló könyvtár
+            flush_interval: Puffer kiírásának maximális késleltetése másodpercben
+            batch_size: Ennyi függő üzenet esetén azonnal kiírjuk a puffert
+            fsync_policy: "always", "batch" vagy "never"
+            compact_ratio: Ha a napló rekordjai ennyiszer többen vannak az élő üzeneteknél,
+                tömörítjük a naplót
+            hot_window: Ennyi legutóbbi üzenetet tartunk a memóriában
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync_policy}")
+        
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.project_name = project_name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync_policy = fsync_policy
+        self.compact_ratio = compact_ratio
+        self.hot_window = max(hot_window, 1)
+        
+        # Forró ablak: a legutóbbi hot_window üzenet
         self.messages: List[Dict] = []
+        # Összes üzenet száma (az üzenet azonosító a sorszáma)
+        self.message_count = 0
+        # Gördülő összefoglaló: {"end": az első nem összefoglalt üzenet, "text": ..., "timestamp": ...}
+        self.summary: Optional[Dict] = None
+        
+        self._offsets = array("q")
+        self._log_size = 0
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._pending_since = 0.0
+        self._log_records = 0
+        self._epoch = 0
+        self._lock = threading.RLock()
+        self.index = MemoryIndex(self._get_index_file())
+        
         self._load_memory()
+        _flusher.register(self)
     
     def _get_memory_file(self) -> Path:
-        """Memória fájl útvonala"""
+        """Memória napló útvonala"""
+        return self.storage_dir / f"{self.project_name}.jsonl"
+    
+    def _get_index_file(self) -> Path:
+        """Keresési index útvonala (a memória napló mellett)"""
+        return self.storage_dir / f"{self.project_name}.index.jsonl"
+    
+    def _get_legacy_file(self) -> Path:
+        """Régi (teljes JSON) memória fájl útvonala"""
         return self.storage_dir / f"{self.project_name}.json"
     
+    @property
+    def summarized_until(self) -> int:
+        """Az első, még össze nem foglalt üzenet sorszáma"""
+        return self.summary["end"] if self.summary else 0
+    
+    def approx_bytes(self) -> int:
+        """Becsült memória használat (forró ablak, offsetek, keresési index)"""
+        hot = sum(len(m.get("content", "")) + 200 for m in self.messages)
+        summary = len(self.summary["text"]) if self.summary else 0
+        return hot + summary + self._pending_bytes + self._offsets.itemsize * len(self._offsets) + self.index.approx_bytes()
+    
+    def _reset_state(self):
+        self.messages = []
+        self.message_count = 0
+        self.summary = None
+        self._offsets = array("q")
+        self._log_size = 0
+        self._log_records = 0
+        self._pending = []
+        self._pending_bytes = 0
+        self._epoch += 1
+    
     def _load_memory(self):
-        """Memória betöltése"""
+        """Memória betöltése a naplóból (sérült utolsó sor esetén visszaállítással)"""
+        self._reset_state()
         memory_file = self._get_memory_file()
-        if memory_file.exists():
-            try:
-                with open(memory_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.messages = data.get("messages", [])
-            except:
-                self.messages = []
+        
+        self.index = MemoryIndex(self._get_index_file())
+        
+        if not memory_file.exists():
+            self._migrate_legacy()
         else:
+            self._read_log(memory_file)
+        
+        self._sync_index()
+    
+    def _read_log(self, memory_file: Path):
+        """Napló végigolvasása: offsetek, forró ablak és összefoglaló felépítése"""
+        valid_size = 0
+        try:
+            with open(memory_file, 'rb') as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        # Félbeszakadt írás (összeomlás) - csak a csonka utolsó sort dobjuk el
+                        break
+                    offset = valid_size
+                    valid_size += len(raw)
+                    try:
+                        record = json.loads(raw)
+                    except json.JSONDecodeError:
+                        # Sérült köztes sor: kihagyjuk, a mögötte lévő rekordok megmaradnak
+                        logger.warning(f"Skipping corrupt record in {memory_file.name} at offset {offset}")
+                        continue
+                    self._apply_record(record, offset)
+                    self._log_records += 1
+            
+            if valid_size < memory_file.stat().st_size:
+                logger.warning(f"Memory log {memory_file.name} torn final record truncated ({valid_size} bytes kept)")
+                with open(memory_file, 'r+b') as f:
+                    f.truncate(valid_size)
+        except Exception as e:
+            logger.error(f"Memory log read error: {e}")
+            self._reset_state()
+            return
+        
+        self._log_size = valid_size
+    
+    def _sync_index(self):
+        """Perzisztált index betöltése; csak a hiányzó (pl. összeomláskor elveszett) üzenetek indexelése"""
+        self.index.load()
+        if self.index.doc_count > self.message_count:
+            # Az index újabb, mint a napló (pl. törlés után) - újraépítés
+            self.index.clear()
+        
+        start = self.index.doc_count
+        while start < self.message_count:
+            end = min(start + 1000, self.message_count)
+            for doc_id, message in enumerate(self.read_messages(start, end), start):
+                self.index.add(doc_id, message.get("content", ""), message.get("timestamp"))
+            start = end
+        self.index.flush()
+    
+    def _apply_record(self, record: Dict, offset: int):
+        """Napló rekord alkalmazása a memóriára"""
+        op = record.get("op", "add")
+        if op == "add":
+            self._offsets.append(offset)
+            self.message_count += 1
+            self.messages.append(record["message"])
+            if len(self.messages) > self.hot_window:
+                del self.messages[0]
+        elif op == "summary":
+            self.summary = {"end": record["end"], "text": record["text"], "timestamp": record.get("timestamp")}
+        elif op == "clear":
             self.messages = []
+            self.message_count = 0
+            self.summary = None
+            self._offsets = array("q")
     
-    def _save_memory(self):
-        """Memória mentése"""
-        memory_file = self._get_memory_file()
-        data = {
-            "project": self.project_name,
-            "messages": self.messages,
-            "updated": datetime.now().isoformat()
-        }
-        with open(memory_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    def read_messages(self, start: int, end: int) -> List[Dict]:
+        """Üzenetek [start, end) sorszám tartományban (a régebbieket a naplóból olvassuk)"""
+        with self._lock:
+            start = max(start, 0)
+            end = min(end, self.message_count)
+            if start >= end:
+                return []
+            hot_start = self.message_count - len(self.messages)
+            if start >= hot_start:
+                return self.messages[start - hot_start:end - hot_start]
+            
+            disk_end = min(end, hot_start)
+            if self._offsets[disk_end - 1] >= self._log_size:
+                self.flush()
+            
+            result = []
+            with open(self._get_memory_file(), 'rb') as f:
+                f.seek(self._offsets[start])
+                for raw in f:
+                    record = json.loads(raw)
+                    if record.get("op", "add") == "add":
+                        result.append(record["message"])
+                        if len(result) >= disk_end - start:
+                            break
+            
+            if end > hot_start:
+                result.extend(self.messages[:end - hot_start])
+            return result
+    
+    def _migrate_legacy(self):
+        """Régi <projekt>.json fájl átalakítása naplóvá"""
+        legacy_file = self._get_legacy_file()
+        if not legacy_file.exists():
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            memory_file = self._get_memory_file()
+            temp_file = memory_file.with_suffix(".jsonl.tmp")
+            with open(temp_file, 'wb') as f:
+                for message in data.get("messages", []):
+                    f.write(json.dumps({"op": "add", "message": message}, ensure_ascii=False).encode("utf-8") + b"\n")
+                f.flush()
+                if self.fsync_policy != "never":
+                    os.fsync(f.fileno())
+            temp_file.replace(memory_file)
+            
+            self._read_log(memory_file)
+            legacy_file.replace(legacy_file.with_suffix(".json.migrated"))
+            logger.info(f"Memory '{self.project_name}' migrated to append-only log ({self.message_count} messages)")
+        except Exception as e:
+            logger.error(f"Memory migration error: {e}")
+            self._reset_state()
+    
+    def _append_record(self, record: Dict):
+        """Rekord a write-behind pufferbe"""
+        # Kódolt byte-ok, bináris hozzáfűzéssel: a napló offsetek platformtól (sorvég
+        # konverziótól) függetlenül pontosak
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(line)
+            self._pending_bytes += len(line)
+            pending = len(self._pending)
+        if self.fsync_policy == "always":
+            self.flush()
+        elif pending >= self.batch_size:
+            _flusher.wake()
+    
+    def flush_due(self, now: float) -> bool:
+        """Esedékes-e a puffer kiírása (köteg méret vagy időkorlát alapján)"""
+        pending = self._pending
+        return bool(pending) and (
+            len(pending) >= self.batch_size or now - self._pending_since >= self.flush_interval
+        )
+    
+    def flush(self):
+        """Függő rekordok kiírása a naplóba"""
+        with self._lock:
+            if not self._pending:
+                return
+            lines, self._pending = self._pending, []
+            memory_file = self._get_memory_file()
+            try:
+                with open(memory_file, 'ab') as f:
+                    f.write(b"".join(lines))
+                    f.flush()
+                    if self.fsync_policy != "never":
+                        os.fsync(f.fileno())
+            except Exception:
+                # Sikertelen írás: a rekordok visszakerülnek a pufferbe, a részleges írást levágjuk
+                self._pending = lines + self._pending
+                try:
+                    if memory_file.exists() and memory_file.stat().st_size > self._log_size:
+                        with open(memory_file, 'r+b') as f:
+                            f.truncate(self._log_size)
+                except OSError as e:
+                    logger.error(f"Memory log truncate error: {e}")
+                raise
+            self._log_size += self._pending_bytes
+            self._pending_bytes = 0
+            self._log_records += len(lines)
+            self.index.flush(fsync=self.fsync_policy != "never")
+            
+            if self._log_records > max(self.compact_ratio * (self.message_count + 1), 1000):
+                self._compact()
+    
+    def _compact(self):
+        """Napló tömörítése: az élő üzenetek és a legutóbbi összefoglaló, atomikus cserével"""
+        with self._lock:
+            memory_file = self._get_memory_file()
+            temp_file = memory_file.with_suffix(".jsonl.tmp")
+            offsets = array("q")
+            size = 0
+            with open(temp_file, 'wb') as out:
+                if self._offsets and memory_file.exists():
+                    with open(memory_file, 'rb') as f:
+                        # A korábbi (törölt) rekordokat átugorjuk
+                        f.seek(self._offsets[0])
+                        for raw in f:
+                            if json.loads(raw).get("op", "add") == "add":
+                                offsets.append(size)
+                                out.write(raw)
+                                size += len(raw)
+                if self.summary:
+                    line = json.dumps({"op": "summary", **self.summary}, ensure_ascii=False).encode("utf-8") + b"\n"
+                    out.write(line)
+                    size += len(line)
+                out.flush()
+                if self.fsync_policy != "never":
+                    os.fsync(out.fileno())
+            temp_file.replace(memory_file)
+            self._offsets = offsets
+            self._log_size = size
+            self._log_records = len(offsets) + (1 if self.summary else 0)
+    
+    def compact(self):
+        """Napló tömörítése (a függő rekordok kiírása után)"""
+        with self._lock:
+            self.flush()
+            self._compact()
+    
+    def close(self):
+        """Puffer kiírása (pl. leállításkor vagy kiürítés előtt)"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Memory flush error: {e}")
     
     def add_message(self, role: str, content: str):
         """Üzenet hozzáadása"""
@@ -52,16 +399,58 @@ class ConversationMemory:
             "content": content,
             "timestamp": datetime.now().isoformat()
         }
-        self.messages.append(message)
-        self._save_memory()
+        with self._lock:
+            doc_id = self.message_count
+            # A rekord a függő puffer végére kerül - ez lesz az offsetje
+            self._offsets.append(self._log_size + self._pending_bytes)
+            self.message_count += 1
+            self.messages.append(message)
+            if len(self.messages) > self.hot_window:
+                del self.messages[0]
+            self.index.add(doc_id, content, message["timestamp"])
+            self._append_record({"op": "add", "message": message})
+    
+    def pending_summary_span(self, keep_recent: int, min_span: int) -> Optional[Tuple[int, int, int]]:
+        """Összefoglalásra váró szakasz
+        
+        Args:
+            keep_recent: Ennyi legutóbbi üzenet szó szerint marad (nem foglaljuk össze)
+            min_span: Legalább ennyi összefoglalatlan üzenet kell
+        
+        Returns:
+            (kezdet, vég, epoch) vagy None
+        """
+        with self._lock:
+            start = self.summarized_until
+            end = self.message_count - keep_recent
+            if end - start < max(min_span, 1):
+                return None
+            return start, end, self._epoch
+    
+    def add_summary(self, end: int, text: str, epoch: int) -> bool:
+        """Gördülő összefoglaló rögzítése az első `end` üzenetről
+        
+        Returns:
+            False, ha a memória közben megváltozott (törlés, projekt váltás)
+        """
+        with self._lock:
+            if epoch != self._epoch or end <= self.summarized_until or end > self.message_count:
+                return False
+            self.summary = {"end": end, "text": text.strip(), "timestamp": datetime.now().isoformat()}
+            self._append_record({"op": "summary", **self.summary})
+            return True
     
     def get_summary(self, limit: int = 10) -> str:
         """Memória összefoglalója"""
-        if not self.messages:
+        if not self.message_count:
             return "Nincs beszélgetési memória."
         
+        summary = ""
+        if self.summary:
+            summary += f"Korábbi beszélgetés összefoglalója:\n{self.summary['text']}\n\n"
+        
         recent = self.messages[-limit:]
-        summary = "Legutóbbi beszélgetés:\n"
+        summary += "Legutóbbi beszélgetés:\n"
         for msg in recent:
             role = msg.get("role", "unknown")
             content = msg.get("content", "")[:200]
@@ -69,33 +458,119 @@ class ConversationMemory:
         
         return summary
     
-    def search_relevant(self, query: str, limit: int = 5) -> List[Dict]:
-        """Releváns üzenetek keresése"""
-        query_lower = query.lower()
-        relevant = []
+    def _summary_text(self, max_tokens: int) -> Optional[str]:
+        """Gördülő összefoglaló szövege legfeljebb max_tokens hosszan"""
+        if not self.summary:
+            return None
+        text = self.summary["text"]
+        limit = max_tokens * 4
+        return text[:limit] + "..." if len(text) > limit else text
+    
+    def _recent_within_budget(self, budget: int) -> Tuple[int, List[Dict], int]:
+        """A legutóbbi, még össze nem foglalt üzenetek a forró ablakból, amíg a budget engedi
+        
+        Returns:
+            (első kiválasztott sorszám, üzenetek időrendben, maradék budget)
+        """
+        selected = []
+        first = self.message_count
+        hot_start = self.message_count - len(self.messages)
+        for doc_id in range(self.message_count - 1, max(self.summarized_until, hot_start) - 1, -1):
+            msg = self.messages[doc_id - hot_start]
+            cost = estimate_tokens(msg.get("content", "")) + 4
+            if cost > budget:
+                break
+            budget -= cost
+            selected.append(msg)
+            first = doc_id
+        selected.reverse()
+        return first, selected, budget
+    
+    def get_memory_context(self, max_tokens: int = 1500, query: Optional[str] = None,
+                           summary_share: float = 0.4) -> str:
+        """Token budget-hez igazított memória kontextus prompt építéshez
         
-        for msg in self.messages:
-            content = msg.get("content", "").lower()
-            if query_lower in content:
-                relevant.append(msg)
-                if len(relevant) >= limit:
-                    break
+        Sorrend: gördülő összefoglaló (legfeljebb a budget `summary_share` része), a kérdéshez
+        releváns régebbi üzenetek, majd a legutóbbi, még össze nem foglalt üzenetek
+        (a legfrissebbektől visszafelé, amíg a budget engedi).
+        """
+        with self._lock:
+            budget = max_tokens
+            parts = []
+            
+            summary = self._summary_text(int(max_tokens * summary_share))
+            if summary:
+                block = f"Korábbi beszélgetés összefoglalója:\n{summary}\n"
+                budget -= estimate_tokens(block)
+                parts.append(block)
+            
+            first_recent, recent, budget = self._recent_within_budget(budget)
+            
+            if query and budget > 0:
+                relevant = []
+                for doc_id, _ in self.index.search(query, limit=5):
+                    if doc_id >= first_recent:
+                        continue
+                    msg = self.read_messages(doc_id, doc_id + 1)[0]
+                    line = f"{msg.get('role', 'user').upper()}: {msg.get('content', '')}\n"
+                    cost = estimate_tokens(line)
+                    if cost <= budget:
+                        budget -= cost
+                        relevant.append(line)
+                if relevant:
+                    parts.append("Releváns korábbi üzenetek:\n" + "".join(relevant))
+            
+            if recent:
+                parts.append("Legutóbbi üzenetek:\n" + "".join(
+                    f"{msg.get('role', 'user').upper()}: {msg.get('content', '')}\n" for msg in recent
+                ))
+            return "\n".join(parts)
+    
+    def get_context_messages(self, max_tokens: int = 3000, summary_share: float = 0.3) -> List[Dict[str, str]]:
+        """Chat üzenetek prompt építéshez a token budget-en belül
         
-        return relevant
+        A gördülő összefoglaló system üzenetként kerül az elejére, utána a legutóbbi,
+        még össze nem foglalt üzenetek időrendben.
+        """
+        with self._lock:
+            budget = max_tokens
+            result = []
+            
+            summary = self._summary_text(int(max_tokens * summary_share))
+            if summary:
+                content = f"Korábbi beszélgetés összefoglalója:\n{summary}"
+                budget -= estimate_tokens(content)
+                result.append({"role": "system", "content": content})
+            
+            _, recent, _ = self._recent_within_budget(budget)
+            result.extend({"role": msg.get("role", "user"), "content": msg.get("content", "")} for msg in recent)
+            return result
+    
+    def search_relevant(self, query: str, limit: int = 5) -> List[Dict]:
+        """Releváns üzenetek keresése (BM25 + frissesség, a legjobb találatok elöl)"""
+        with self._lock:
+            hits = self.index.search(query, limit=limit)
+            results = []
+            for doc_id, _ in hits:
+                results.extend(self.read_messages(doc_id, doc_id + 1))
+            return results
     
     def get_recent(self, n: int = 10) -> List[Dict]:
         """Legutóbbi üzenetek"""
-        return self.messages[-n:] if self.messages else []
+        return self.read_messages(self.message_count - n, self.message_count) if n > 0 else []
     
     def clear(self):
         """Memória törlése"""
-        self.messages = []
-        memory_file = self._get_memory_file()
-        if memory_file.exists():
-            memory_file.unlink()
+        with self._lock:
+            self._reset_state()
+            self.index.clear()
+            memory_file = self._get_memory_file()
+            if memory_file.exists():
+                memory_file.unlink()
     
     def switch_project(self, project_name: str):
         """Projekt váltás"""
-        self.project_name = project_name
-        self._load_memory()
-
+        with self._lock:
+            self.flush()
+            self.project_name = project_name
+            self._load_memory()
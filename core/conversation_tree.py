@@ -0,0 +1,295 @@
+"""
+Conversation Tree - Tartalom-címzett, elágazó beszélgetés tárolás
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationTree:
+    """Üzenet csomópontok fája, ahol a csomópont azonosítója a szülő azonosítójából és az
+    üzenet tartalmából képzett hash
+    
+    Két előzmény közös előtagja így ugyanazokra a csomópontokra képeződik le, és csak egyszer
+    tárolódik; egy korábbi üzenet szerkesztése új ágat nyit a módosított üzenettől. A csomópontok
+    egy append-only JSON Lines fájlba kerülnek, a memóriában csak a szülő és a fájl offset van.
+    
+    A fa névterekre (pl. felhasználónként) oszlik: a névtér az azonosító része, és egy csomópont
+    csak a saját névteréből olvasható vagy folytatható. A csomópontok száma max_nodes-ra
+    korlátos: fölötte a legrégebben használt ágak kiesnek (a megtartottak ősei maradnak), és a
+    napló újraíródik.
+    """
+    
+    def __init__(self, storage_file: str = "./data/memory/conversation_tree.jsonl",
+                 fsync: bool = False, max_evaluated: int = 1024, max_nodes: int = 100_000,
+                 keep_ratio: float = 0.75):
+        """
+        Args:
+            storage_file: Csomópont napló
+            fsync: Minden írás után fsync
+            max_evaluated: Ennyi kulcs (pl. felhasználó) utoljára kiértékelt ágát jegyezzük meg
+            max_nodes: Legfeljebb ennyi csomópontot tárolunk
+            keep_ratio: Kilakoltatáskor a max_nodes ekkora része marad meg
+        """
+        self.storage_file = Path(storage_file)
+        self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.max_nodes = max(max_nodes, 1)
+        self.keep_ratio = min(max(keep_ratio, 0.1), 1.0)
+        
+        # csomópont -> (szülő, offset, névtér), használat szerinti (LRU) sorrendben
+        self._nodes: "OrderedDict[str, Tuple[Optional[str], int, Optional[str]]]" = OrderedDict()
+        self._children: Dict[Optional[str], List[str]] = {}
+        self._size = 0
+        self._lock = threading.RLock()
+        
+        # kulcs -> az utoljára kiértékelt ág levele (LRU)
+        self._evaluated: "OrderedDict[str, str]" = OrderedDict()
+        self.max_evaluated = max_evaluated
+        
+        self.reused_nodes = 0
+        self.stored_nodes = 0
+        self.evicted_nodes = 0
+        
+        self._load()
+    
+    @staticmethod
+    def node_id(parent_id: Optional[str], role: str, content: str, namespace: str = "") -> str:
+        """Csomópont azonosító (a névtértől és a teljes előtagtól függ, a szülő azonosítóján keresztül)"""
+        digest = hashlib.sha256()
+        digest.update(namespace.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update((parent_id or "").encode())
+        digest.update(b"\x00")
+        digest.update(role.encode())
+        digest.update(b"\x00")
+        digest.update(content.encode("utf-8"))
+        return digest.hexdigest()[:32]
+    
+    def _load(self):
+        """Csomópontok betöltése (csonka utolsó sor eldobásával)"""
+        if not self.storage_file.exists():
+            return
+        valid_size = 0
+        try:
+            with open(self.storage_file, 'rb') as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(raw)
+                    except json.JSONDecodeError:
+                        break
+                    self._index(record["id"], record.get("parent"), valid_size, record.get("ns"))
+                    valid_size += len(raw)
+            
+            if valid_size < self.storage_file.stat().st_size:
+                with open(self.storage_file, 'r+b') as f:
+                    f.truncate(valid_size)
+        except Exception as e:
+            logger.error(f"Conversation tree read error: {e}")
+        self._size = valid_size
+    
+    def _index(self, node_id: str, parent_id: Optional[str], offset: int, namespace: Optional[str]):
+        if node_id in self._nodes:
+            return
+        self._nodes[node_id] = (parent_id, offset, namespace)
+        self._children.setdefault(parent_id, []).append(node_id)
+    
+    def owns(self, namespace: str, node_id: str) -> bool:
+        """A csomópont létezik és a névtérhez tartozik"""
+        node = self._nodes.get(node_id)
+        return node is not None and node[2] == namespace
+    
+    def add_path(self, messages: List[Dict[str, str]], parent_id: Optional[str] = None,
+                 namespace: str = "") -> List[str]:
+        """Üzenetek felvétele a fában (a már létező csomópontokat újrahasználja)
+        
+        Args:
+            messages: Üzenetek időrendben
+            parent_id: Az első üzenet szülője (None = gyökér), a névtér saját csomópontja
+            namespace: A hívó névtere (pl. felhasználó)
+        
+        Returns:
+            Az üzenetek csomópont azonosítói
+        """
+        ids = []
+        lines = []
+        new_nodes = []
+        with self._lock:
+            if parent_id is not None and not self.owns(namespace, parent_id):
+                raise KeyError(f"Unknown conversation node: {parent_id}")
+            offset = self._size
+            for msg in messages:
+                role = msg.get("role", "user")
+                content = msg.get("content", "")
+                node_id = self.node_id(parent_id, role, content, namespace)
+                if node_id in self._nodes:
+                    self.reused_nodes += 1
+                    self._nodes.move_to_end(node_id)
+                else:
+                    line = json.dumps({
+                        "id": node_id,
+                        "parent": parent_id,
+                        "ns": namespace,
+                        "role": role,
+                        "content": content,
+                        "ts": datetime.now().isoformat()
+                    }, ensure_ascii=False).encode("utf-8") + b"\n"
+                    new_nodes.append((node_id, parent_id, offset, namespace))
+                    offset += len(line)
+                    lines.append(line)
+                    self.stored_nodes += 1
+                ids.append(node_id)
+                parent_id = node_id
+            
+            if lines:
+                with open(self.storage_file, 'ab') as f:
+                    f.write(b"".join(lines))
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                # Csak sikeres írás után kerülnek az indexbe
+                for node in new_nodes:
+                    self._index(*node)
+                self._size = offset
+                if len(self._nodes) > self.max_nodes:
+                    self._evict(protect=ids)
+        return ids
+    
+    def _evict(self, protect: List[str]):
+        """A legrégebben használt csomópontok eldobása és a napló újraírása
+        
+        A legutóbb használt csomópontok (és a protect ág) az őseikkel együtt maradnak, így
+        minden megtartott ág a gyökérig olvasható marad.
+        """
+        keep = set()
+        
+        def keep_branch(node_id: Optional[str]):
+            while node_id is not None and node_id not in keep and node_id in self._nodes:
+                keep.add(node_id)
+                node_id = self._nodes[node_id][0]
+        
+        for node_id in protect:
+            keep_branch(node_id)
+        target = int(self.max_nodes * self.keep_ratio)
+        for node_id in reversed(self._nodes):
+            if len(keep) >= target:
+                break
+            keep_branch(node_id)
+        
+        temp_file = self.storage_file.with_suffix(".jsonl.tmp")
+        nodes: "OrderedDict[str, Tuple[Optional[str], int, Optional[str]]]" = OrderedDict()
+        offset = 0
+        with open(self.storage_file, 'rb') as source, open(temp_file, 'wb') as out:
+            # A régi LRU sorrend megmarad; a szülők előbb kerülnek a fájlba, mint a gyerekek
+            for node_id, (parent, old_offset, namespace) in sorted(
+                    ((node_id, node) for node_id, node in self._nodes.items() if node_id in keep),
+                    key=lambda item: item[1][1]):
+                source.seek(old_offset)
+                line = source.readline()
+                out.write(line)
+                nodes[node_id] = (parent, offset, namespace)
+                offset += len(line)
+            out.flush()
+            if self.fsync:
+                os.fsync(out.fileno())
+        temp_file.replace(self.storage_file)
+        
+        self.evicted_nodes += len(self._nodes) - len(nodes)
+        self._nodes = OrderedDict((node_id, nodes[node_id]) for node_id in self._nodes if node_id in nodes)
+        self._children = {}
+        for node_id, (parent, _, _) in self._nodes.items():
+            self._children.setdefault(parent, []).append(node_id)
+        self._size = offset
+        for key in [key for key, node_id in self._evaluated.items() if node_id not in nodes]:
+            del self._evaluated[key]
+        logger.info(f"Conversation tree: {len(nodes)} nodes kept, {self.evicted_nodes} evicted in total")
+    
+    def get_path(self, node_id: str, namespace: str = "") -> List[Dict[str, str]]:
+        """A gyökértől a csomópontig tartó üzenetek (csak a névtér saját csomópontjára)"""
+        with self._lock:
+            if not self.owns(namespace, node_id):
+                raise KeyError(f"Unknown conversation node: {node_id}")
+            self._nodes.move_to_end(node_id)
+            chain = []
+            current = node_id
+            while current is not None:
+                if current not in self._nodes:
+                    raise KeyError(f"Unknown conversation node: {current}")
+                parent, offset, _ = self._nodes[current]
+                chain.append(offset)
+                current = parent
+            
+            messages = []
+            with open(self.storage_file, 'rb') as f:
+                for offset in reversed(chain):
+                    f.seek(offset)
+                    record = json.loads(f.readline())
+                    messages.append({"role": record["role"], "content": record["content"]})
+            return messages
+    
+    def depth(self, node_id: Optional[str]) -> int:
+        """Csomópont mélysége (a gyökér üzenet 1)"""
+        depth = 0
+        while node_id is not None:
+            node_id = self._nodes[node_id][0]
+            depth += 1
+        return depth
+    
+    def common_prefix(self, a: Optional[str], b: Optional[str]) -> Optional[str]:
+        """Két csomópont legmélyebb közös őse (a közös előtag utolsó csomópontja)"""
+        ancestors = set()
+        while a is not None:
+            ancestors.add(a)
+            a = self._nodes[a][0]
+        while b is not None and b not in ancestors:
+            b = self._nodes[b][0]
+        return b
+    
+    def mark_evaluated(self, key: str, node_id: str):
+        """Az LLM a kulcshoz tartozó kérésben eddig az ágig értékelte ki a beszélgetést"""
+        with self._lock:
+            self._evaluated[key] = node_id
+            self._evaluated.move_to_end(key)
+            while len(self._evaluated) > self.max_evaluated:
+                self._evaluated.popitem(last=False)
+    
+    def shared_prefix(self, key: str, node_id: Optional[str]) -> Tuple[Optional[str], int]:
+        """Az utoljára kiértékelt ág és a csomópontig tartó előzmény közös előtagja
+        
+        Returns:
+            (közös előtag utolsó csomópontja, előtag hossza üzenetben)
+        """
+        with self._lock:
+            previous = self._evaluated.get(key)
+            if previous is None or node_id is None:
+                return None, 0
+            prefix = self.common_prefix(previous, node_id)
+            return prefix, self.depth(prefix)
+    
+    def children(self, node_id: Optional[str]) -> List[str]:
+        """Közvetlen gyerekek (ágak) azonosítói"""
+        with self._lock:
+            return list(self._children.get(node_id, []))
+    
+    def get_stats(self) -> Dict:
+        """Tárolási statisztika"""
+        with self._lock:
+            return {
+                "nodes": len(self._nodes),
+                "max_nodes": self.max_nodes,
+                "branch_points": sum(1 for kids in self._children.values() if len(kids) > 1),
+                "stored_nodes": self.stored_nodes,
+                "reused_nodes": self.reused_nodes,
+                "evicted_nodes": self.evicted_nodes,
+                "storage_bytes": self._size
+            }
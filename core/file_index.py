@@ -0,0 +1,431 @@
+"""
+File Index - Perzisztens, inkrementálisan frissülő projekt fájl index
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from core.dir_walker import DirWalker
+from core.read_cache import ReadCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# Kiterjesztés -> programozási nyelv
+EXTENSION_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.jsx': 'javascript',
+    '.tsx': 'typescript',
+    '.html': 'html',
+    '.css': 'css',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.rs': 'rust',
+    '.go': 'go',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.sql': 'sql'
+}
+
+TEXT_EXTENSIONS = {
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.html', '.css', '.json',
+    '.md', '.txt', '.yml', '.yaml', '.xml', '.csv', '.sql', '.sh',
+    '.bat', '.ps1', '.go', '.rs', '.java', '.cpp', '.c', '.h',
+    '.php', '.rb', '.swift', '.kt', '.dart', '.vue', '.svelte',
+    '.toml', '.ini', '.cfg', '.conf', '.log'
+}
+
+DEFAULT_IGNORED = {
+    '__pycache__', '.git', 'node_modules', '.venv', 'venv',
+    'env', '.env', 'dist', 'build', '.pytest_cache',
+    '.idea', '.vscode', '*.pyc', '*.pyo', '*.pyd',
+    '.DS_Store', 'Thumbs.db', 'logs', 'data'
+}
+
+# Változás értesítés: {"added": [...], "modified": [...], "removed": [...]}
+Changes = Dict[str, List[str]]
+
+
+@dataclass
+class FileEntry:
+    """Egy indexelt fájl adatai"""
+    path: str
+    size: int
+    mtime_ns: int
+    hash: Optional[str]
+    language: Optional[str]
+    is_text: bool
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """watchdog esemény kezelő: a változott útvonalakat az indexnek adja"""
+    
+    def __init__(self, index: "FileIndex"):
+        self.index = index
+    
+    def on_any_event(self, event):
+        # Könyvtár "modified" esemény minden benne lévő változásnál jön, a fájl események elegendők
+        if event.is_directory and event.event_type == "modified":
+            return
+        paths = [getattr(event, "src_path", None), getattr(event, "dest_path", None)]
+        self.index._mark_dirty(p for p in paths if p)
+
+
+class FileIndex:
+    """Projekt fájlok indexe (útvonal, méret, mtime, tartalom hash, nyelv)
+    
+    Az index JSON-ban perzisztálódik, így induláskor csak a megváltozott (méret vagy mtime)
+    fájlokat kell újra hash-elni. Ha a watchdog elérhető, a változásokat inotify/FSEvents
+    jelzi, különben időközönkénti mtime szkennelés frissít. A feliratkozók (pl. keresési
+    indexek) minden frissítés után megkapják a változott fájlok listáját.
+    """
+    
+    def __init__(self, base_path: str = ".", index_dir: str = "./data/index",
+                 ignored_patterns: Optional[Set[str]] = None,
+                 scan_interval: float = 10.0, use_watcher: bool = True,
+                 max_file_size: int = 10 * 1024 * 1024, use_gitignore: bool = True,
+                 scan_workers: int = 0, read_cache: Optional[ReadCache] = None):
+        """
+        Args:
+            base_path: Indexelt gyökér könyvtár
+            index_dir: Index fájlok könyvtára
+            ignored_patterns: Kihagyott nevek / glob minták
+            scan_interval: mtime szkennelés gyakorisága másodpercben (watcher nélkül)
+            use_watcher: watchdog használata, ha telepítve van
+            max_file_size: Ennél nagyobb fájlok tartalmát nem hash-eljük
+            use_gitignore: A .gitignore szerint kihagyott fájlok nem kerülnek az indexbe
+            scan_workers: Párhuzamos könyvtár olvasó szálak (hálózati meghajtóhoz; 0 = szekvenciális)
+            read_cache: Közös olvasási cache (pl. a FileManager-rel megosztva)
+        """
+        self.base_path = Path(base_path).resolve()
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.index_dir / "files.json"
+        # A saját index könyvtárunkat sosem indexeljük (különben minden mentés újabb változás lenne)
+        self._index_dir_abs = str(self.index_dir.resolve())
+        self.ignored_patterns = set(ignored_patterns or DEFAULT_IGNORED)
+        self.walker = DirWalker(str(self.base_path), self.ignored_patterns, use_gitignore=use_gitignore,
+                                workers=scan_workers, excluded_paths=[self._index_dir_abs])
+        self.scan_interval = scan_interval
+        self.use_watcher = use_watcher and Observer is not None
+        self.max_file_size = max_file_size
+        self.read_cache = read_cache or ReadCache()
+        
+        self.entries: Dict[str, FileEntry] = {}
+        self.directories: Set[str] = set()
+        self.last_scan: Optional[float] = None
+        self.scan_count = 0
+        
+        self._subscribers: List[Callable[[Changes], None]] = []
+        self._lock = threading.RLock()
+        self._dirty: Set[str] = set()
+        self._dirty_event = threading.Event()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        
+        self._load()
+    
+    def _load(self):
+        """Perzisztált index betöltése"""
+        if not self.index_file.exists():
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("base_path") != str(self.base_path):
+                return
+            self.entries = {path: FileEntry(path, *values) for path, values in data.get("files", {}).items()}
+            self.directories = set(data.get("directories", []))
+            self._ready.set()
+        except Exception as e:
+            logger.warning(f"File index load error: {e}")
+            self.entries = {}
+            self.directories = set()
+    
+    def _save(self):
+        """Index mentése (atomikus cserével)"""
+        with self._lock:
+            data = {
+                "base_path": str(self.base_path),
+                "files": {
+                    path: [e.size, e.mtime_ns, e.hash, e.language, e.is_text]
+                    for path, e in self.entries.items()
+                },
+                "directories": sorted(self.directories)
+            }
+        temp_file = self.index_file.with_suffix(".json.tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        temp_file.replace(self.index_file)
+    
+    def is_ignored(self, name: str) -> bool:
+        """Kihagyandó fájl/könyvtár név"""
+        return self.walker.is_ignored_name(name)
+    
+    def _hash_file(self, path: str, size: int) -> Optional[str]:
+        if size > self.max_file_size:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        except OSError:
+            return None
+        return digest.hexdigest()
+    
+    def _make_entry(self, rel_path: str, abs_path: str, stat: os.stat_result) -> FileEntry:
+        suffix = os.path.splitext(rel_path)[1].lower()
+        return FileEntry(
+            path=rel_path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            hash=self._hash_file(abs_path, stat.st_size),
+            language=EXTENSION_LANGUAGES.get(suffix),
+            is_text=suffix in TEXT_EXTENSIONS
+        )
+    
+    def _build_entries(self, files: Dict) -> Dict[str, FileEntry]:
+        """Változott fájlok új bejegyzései (stat + hash) a zár nélkül"""
+        with self._lock:
+            known = {}
+            for rel_path in files:
+                old = self.entries.get(rel_path)
+                if old is not None:
+                    known[rel_path] = (old.size, old.mtime_ns)
+        
+        fresh = {}
+        for rel_path, (abs_path, stat) in files.items():
+            if known.get(rel_path) != (stat.st_size, stat.st_mtime_ns):
+                fresh[rel_path] = self._make_entry(rel_path, abs_path, stat)
+        return fresh
+    
+    def _apply_scan(self, files: Dict, fresh: Dict[str, FileEntry], directories: Set[str],
+                    prefix: Optional[str], changes: Changes):
+        """Szkennelés eredményének bevezetése (prefix = a részfa gyökere, None = teljes fa); zár alatt hívandó"""
+        def in_scope(path: str) -> bool:
+            return prefix is None or path == prefix or path.startswith(prefix + "/")
+        
+        for rel_path, entry in fresh.items():
+            self._swap_entry(rel_path, entry, changes)
+        for rel_path in [p for p in self.entries if in_scope(p) and p not in files]:
+            del self.entries[rel_path]
+            changes["removed"].append(rel_path)
+        self.directories = {d for d in self.directories if not in_scope(d)} | directories
+    
+    def _swap_entry(self, rel_path: str, entry: FileEntry, changes: Changes):
+        """Előre elkészített bejegyzés beállítása, ha a mérete vagy az mtime-ja változott"""
+        old = self.entries.get(rel_path)
+        if old is not None and old.size == entry.size and old.mtime_ns == entry.mtime_ns:
+            return
+        if old is None:
+            changes["added"].append(rel_path)
+        elif old.hash != entry.hash or entry.hash is None:
+            changes["modified"].append(rel_path)
+        self.entries[rel_path] = entry
+    
+    def refresh(self) -> Changes:
+        """Teljes mtime szkennelés; csak a változott fájlokat hash-eli újra"""
+        files, directories = self.walker.walk()
+        fresh = self._build_entries(files)
+        changes: Changes = {"added": [], "modified": [], "removed": []}
+        with self._lock:
+            self._apply_scan(files, fresh, directories, None, changes)
+            self.last_scan = time.time()
+            self.scan_count += 1
+        
+        self._ready.set()
+        self._publish(changes)
+        return changes
+    
+    def update_paths(self, paths: Iterable[str]) -> Changes:
+        """Megadott útvonalak (abszolút vagy relatív) célzott frissítése
+        
+        Fájlnál csak az adott fájlt, könyvtárnál (létrejött, átnevezett, törölt) a részfát
+        szkenneli újra. A stat és a hash a zár nélkül készül, a zár csak a cseréhez kell.
+        """
+        scans = []
+        for path in sorted(set(paths)):
+            abs_path = Path(path) if os.path.isabs(path) else self.base_path / path
+            if str(abs_path).startswith(self._index_dir_abs):
+                continue
+            rel_path = self.relative_path(str(abs_path))
+            if not rel_path or rel_path == "." or self.walker.is_ignored(rel_path, abs_path.is_dir()):
+                continue
+            
+            if abs_path.is_file():
+                files = {rel_path: (str(abs_path), abs_path.stat())}
+                scans.append((rel_path, files, self._build_entries(files), None))
+            elif abs_path.is_dir():
+                files, directories = self.walker.walk(str(abs_path), rel_path)
+                scans.append((rel_path, files, self._build_entries(files), directories | {rel_path}))
+            else:
+                # Törölt fájl vagy könyvtár: a részfa minden bejegyzése megy
+                scans.append((rel_path, {}, {}, set()))
+        
+        changes: Changes = {"added": [], "modified": [], "removed": []}
+        with self._lock:
+            for rel_path, files, fresh, directories in scans:
+                if directories is not None:
+                    self._apply_scan(files, fresh, directories, rel_path, changes)
+                    continue
+                for path, entry in fresh.items():
+                    self._swap_entry(path, entry, changes)
+                parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else None
+                while parent:
+                    self.directories.add(parent)
+                    parent = parent.rsplit("/", 1)[0] if "/" in parent else None
+        
+        self._publish(changes)
+        return changes
+    
+    def subscribe(self, callback: Callable[[Changes], None]):
+        """Feliratkozás a változásokra (a hívás a frissítő szálon történik)"""
+        self._subscribers.append(callback)
+    
+    def _publish(self, changes: Changes):
+        if not any(changes.values()):
+            return
+        try:
+            self._save()
+        except Exception as e:
+            logger.warning(f"File index save error: {e}")
+        for callback in list(self._subscribers):
+            try:
+                callback(changes)
+            except Exception as e:
+                logger.error(f"File index subscriber error: {e}")
+    
+    def _mark_dirty(self, paths: Iterable[str]):
+        with self._lock:
+            self._dirty.update(paths)
+        self._dirty_event.set()
+    
+    def start(self):
+        """Háttér frissítés indítása (watcher vagy mtime polling)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        
+        if self.use_watcher:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_ChangeHandler(self), str(self.base_path), recursive=True)
+                self._observer.start()
+            except Exception as e:
+                logger.warning(f"File watcher unavailable, falling back to mtime scanning: {e}")
+                self._observer = None
+        
+        def loop():
+            # Első szkennelés: a leállás alatti változások felderítése
+            self.refresh()
+            while not self._stop.is_set():
+                if self._observer is not None:
+                    self._dirty_event.wait(self.scan_interval)
+                    if self._stop.is_set():
+                        break
+                    # Rövid várakozás, hogy az egy mentéshez tartozó eseményeket együtt kezeljük
+                    time.sleep(0.2)
+                    self._dirty_event.clear()
+                    with self._lock:
+                        dirty, self._dirty = self._dirty, set()
+                    if dirty:
+                        self.update_paths(dirty)
+                else:
+                    if self._stop.wait(self.scan_interval):
+                        break
+                    self.refresh()
+        
+        self._thread = threading.Thread(target=loop, name="file-index", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Háttér frissítés leállítása"""
+        self._stop.set()
+        self._dirty_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Megvárja, amíg van használható index (betöltött vagy első szkennelés)"""
+        if not self._ready.is_set() and (self._thread is None or not self._thread.is_alive()):
+            self.refresh()
+        return self._ready.wait(timeout)
+    
+    def files(self, max_depth: Optional[int] = None, text_only: bool = False) -> List[str]:
+        """Indexelt fájlok (rendezve), opcionálisan mélységkorláttal"""
+        self.wait_ready()
+        with self._lock:
+            return sorted(
+                path for path, entry in self.entries.items()
+                if (max_depth is None or path.count("/") < max_depth)
+                and (not text_only or entry.is_text)
+            )
+    
+    def list_directories(self, max_depth: Optional[int] = None) -> List[str]:
+        """Indexelt könyvtárak (rendezve), opcionálisan mélységkorláttal"""
+        self.wait_ready()
+        with self._lock:
+            return sorted(d for d in self.directories if max_depth is None or d.count("/") < max_depth)
+    
+    def relative_path(self, path: str) -> Optional[str]:
+        """Abszolút vagy relatív útvonal az index kulcs formájában (None, ha a gyökéren kívül esik)"""
+        candidate = Path(path)
+        if candidate.is_absolute():
+            try:
+                return candidate.resolve().relative_to(self.base_path).as_posix()
+            except ValueError:
+                return None
+        return candidate.as_posix()
+    
+    def get(self, path: str) -> Optional[FileEntry]:
+        """Fájl bejegyzés útvonal alapján"""
+        self.wait_ready()
+        rel_path = self.relative_path(path)
+        return self.entries.get(rel_path) if rel_path else None
+    
+    def read_text(self, path: str) -> Optional[str]:
+        """Szöveges fájl tartalma (None, ha nincs az indexben vagy bináris)"""
+        entry = self.get(path)
+        if entry is None or not entry.is_text or entry.size > self.max_file_size:
+            return None
+        try:
+            return self.read_cache.read(str(self.base_path / entry.path), lambda path: True).content
+        except OSError:
+            return None
+    
+    def get_stats(self) -> Dict:
+        """Index statisztika"""
+        with self._lock:
+            return {
+                "base_path": str(self.base_path),
+                "files": len(self.entries),
+                "directories": len(self.directories),
+                "text_files": sum(1 for e in self.entries.values() if e.is_text),
+                "total_bytes": sum(e.size for e in self.entries.values()),
+                "watcher": self._observer is not None,
+                "last_scan": self.last_scan,
+                "scan_count": self.scan_count,
+                "scan_workers": self.walker.workers,
+                "gitignore": self.walker.use_gitignore
+            }
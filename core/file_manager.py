@@ -2,59 +2,87 @@
 File Manager - Fájl műveletek kezelése
 """
 import os
+import asyncio
+import tempfile
+import stat as stat_module
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 import mimetypes
 
+from core.dir_walker import DirWalker
+from core.file_index import DEFAULT_IGNORED
+from core.read_cache import ReadCache
+from core.range_reader import open_map, read_bytes, read_lines
+
+# Feltöltésnél ennyi byte gyűlik össze egy (szálon futó) lemez írás előtt
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+# A folyamat umask-ja (csak beállítással olvasható ki, ezért egyszer, importkor)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 
 class FileManager:
     """Fájl műveletek kezelője"""
     
-    def __init__(self, base_path: str = "."):
+    def __init__(self, base_path: str = ".", read_cache: Optional[ReadCache] = None):
         self.base_path = Path(base_path).resolve()
+        self.walker = DirWalker(str(self.base_path), DEFAULT_IGNORED)
+        # Változatlan fájlok ismételt olvasása memóriából (stat aláírás szerint)
+        self.read_cache = read_cache or ReadCache()
+    
+    def stat_file(self, file_path: str) -> Tuple[Path, Optional[os.stat_result], Optional[Dict]]:
+        """Olvasandó fájl ellenőrzése: (útvonal, stat, hiba válasz vagy None)"""
+        path = self._resolve_path(file_path)
+        
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            stat = None
+        if stat is None:
+            return path, None, {
+                "content": None,
+                "exists": False,
+                "error": f"File not found: {file_path}"
+            }
+        
+        if not stat_module.S_ISREG(stat.st_mode):
+            return path, None, {
+                "content": None,
+                "exists": False,
+                "error": f"Path is not a file: {file_path}"
+            }
+        
+        if not str(path).startswith(str(self.base_path)):
+            return path, None, {
+                "content": None,
+                "exists": False,
+                "error": "Access denied: File outside base path"
+            }
+        return path, stat, None
     
     def read_file(self, file_path: str) -> Dict:
         """Fájl olvasása"""
         try:
-            path = self._resolve_path(file_path)
+            path, stat, error = self.stat_file(file_path)
+            if error:
+                return error
             
-            if not path.exists():
-                return {
-                    "content": None,
-                    "exists": False,
-                    "error": f"File not found: {file_path}"
-                }
-            
-            if not path.is_file():
-                return {
-                    "content": None,
-                    "exists": False,
-                    "error": f"Path is not a file: {file_path}"
-                }
-            
-            if not str(path).startswith(str(self.base_path)):
-                return {
-                    "content": None,
-                    "exists": False,
-                    "error": "Access denied: File outside base path"
-                }
-            
-            if path.stat().st_size > 10 * 1024 * 1024:
+            if stat.st_size > 10 * 1024 * 1024:
                 return {
                     "content": None,
                     "exists": True,
-                    "error": "File too large (max 10MB)"
+                    "error": "File too large (max 10MB) - read it in ranges (offset/length or start_line/end_line)"
                 }
             
-            if self._is_text_file(path):
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
+            cached = self.read_cache.read(str(path), lambda p: self._is_text_file(Path(p)), stat)
+            if cached.is_text:
                 return {
-                    "content": content,
+                    "content": cached.content,
                     "exists": True,
                     "error": None,
-                    "size": len(content),
-                    "lines": len(content.splitlines())
+                    "size": len(cached.content),
+                    "lines": cached.line_count
                 }
             else:
                 return {
@@ -70,6 +98,57 @@ class FileManager:
                 "error": str(e)
             }
     
+    def read_range(self, file_path: str, offset: Optional[int] = None, length: Optional[int] = None,
+                   start_line: Optional[int] = None, end_line: Optional[int] = None,
+                   max_bytes: int = 1024 * 1024) -> Dict:
+        """Fájl részlet olvasása mmap-pel (méret korlát nélkül, a fájl nem töltődik be egészben)
+        
+        Args:
+            file_path: Fájl útvonal
+            offset: Byte tartomány kezdete (negatív = a fájl végétől)
+            length: Byte tartomány hossza (legfeljebb max_bytes)
+            start_line: Sor ablak első sora, 1-től (negatív = az utolsó N sor); a sor index cache-elt
+            end_line: Sor ablak utolsó sora (zárt; None = a fájl vége)
+            max_bytes: A visszaadott részlet maximális mérete
+        """
+        try:
+            path, stat, error = self.stat_file(file_path)
+            if error:
+                return error
+            if not self._is_text_file(path):
+                return {
+                    "content": None,
+                    "exists": True,
+                    "error": "Binary file - cannot read as text"
+                }
+            
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = open_map(f)
+                try:
+                    if data is None:
+                        # Üres fájl (nem mappelhető)
+                        result = {"content": "", "offset": 0, "end_offset": 0, "truncated": False}
+                        if start_line is not None:
+                            result.update(start_line=1, end_line=0, total_lines=0)
+                    elif start_line is not None:
+                        index = self.read_cache.line_index(str(path), stat, data)
+                        result = read_lines(data, index, start_line, end_line, max_bytes)
+                    else:
+                        result = read_bytes(data, stat.st_size, offset or 0, min(length or max_bytes, max_bytes))
+                finally:
+                    if data is not None:
+                        data.close()
+            
+            return {**result, "exists": True, "error": None, "size": stat.st_size}
+        
+        except Exception as e:
+            return {
+                "content": None,
+                "exists": False,
+                "error": str(e)
+            }
+    
     def write_file(self, file_path: str, content: str, create_dirs: bool = True) -> Dict:
         """Fájl írása"""
         try:
@@ -89,6 +168,7 @@ class FileManager:
                 with open(temp_path, 'w', encoding='utf-8', buffering=8192) as f:
                     f.write(content)
                 temp_path.replace(path)
+                self.read_cache.invalidate(str(path))
             except Exception:
                 if temp_path.exists():
                     temp_path.unlink()
@@ -106,6 +186,77 @@ class FileManager:
                 "error": str(e)
             }
     
+    async def write_stream(self, file_path: str, chunks: AsyncIterator[bytes], create_dirs: bool = True,
+                           max_bytes: Optional[int] = None) -> Dict:
+        """Fájl írása darabonként érkező tartalomból (feltöltés)
+        
+        A darabok (legfeljebb WRITE_BUFFER_BYTES pufferelve, az írás szálon, az event loop-ot
+        nem blokkolva) egy egyedi ideiglenes fájlba kerülnek, ami a végén atomikusan a helyére
+        kerül, így a memória igény nem függ a fájl méretétől. A jogosultság a felülírt fájlé,
+        új fájlnál a write_file-lal egyező (0666 & ~umask). Hiba, megszakadt feltöltés vagy
+        max_bytes túllépése esetén az eredeti fájl változatlan marad.
+        """
+        try:
+            path = self._resolve_path(file_path)
+            
+            if not str(path).startswith(str(self.base_path)):
+                return {
+                    "success": False,
+                    "error": "Access denied: File outside base path"
+                }
+            
+            if create_dirs and not path.parent.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Rejtett (ponttal kezdődő) név: a fájl index nem veszi fel a félkész fájlt
+            fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            size = 0
+            loop = asyncio.get_running_loop()
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    buffer = bytearray()
+                    async for chunk in chunks:
+                        size += len(chunk)
+                        if max_bytes is not None and size > max_bytes:
+                            break
+                        buffer += chunk
+                        if len(buffer) >= WRITE_BUFFER_BYTES:
+                            await loop.run_in_executor(None, f.write, bytes(buffer))
+                            buffer.clear()
+                    if buffer:
+                        await loop.run_in_executor(None, f.write, bytes(buffer))
+                if max_bytes is not None and size > max_bytes:
+                    os.unlink(temp_name)
+                    return {
+                        "success": False,
+                        "error": f"File too large (max {max_bytes} bytes)",
+                        "too_large": True
+                    }
+                try:
+                    mode = stat_module.S_IMODE(os.stat(path).st_mode)
+                except FileNotFoundError:
+                    mode = 0o666 & ~_UMASK
+                os.chmod(temp_name, mode)
+                os.replace(temp_name, path)
+                self.read_cache.invalidate(str(path))
+            except BaseException:
+                if os.path.exists(temp_name):
+                    os.unlink(temp_name)
+                raise
+            
+            return {
+                "success": True,
+                "error": None,
+                "path": str(path),
+                "size": size
+            }
+        
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
     def delete_file(self, file_path: str) -> Dict:
         """Fájl törlése"""
         try:
@@ -125,6 +276,7 @@ class FileManager:
             
             if path.is_file():
                 path.unlink()
+                self.read_cache.invalidate(str(path))
             elif path.is_dir():
                 return {
                     "success": False,
@@ -142,8 +294,13 @@ class FileManager:
                 "error": str(e)
             }
     
-    def list_directory(self, dir_path: str = ".", recursive: bool = False) -> Dict:
-        """Könyvtár tartalmának listázása"""
+    def list_directory(self, dir_path: str = ".", recursive: bool = False, filtered: bool = False) -> Dict:
+        """Könyvtár tartalmának listázása
+        
+        Args:
+            filtered: A kihagyott nevek (DEFAULT_IGNORED, rejtett) és a .gitignore szerinti
+                bejegyzések elhagyása (mindkét módban; alapértelmezés: minden bejegyzés)
+        """
         try:
             path = self._resolve_path(dir_path)
             
@@ -164,19 +321,31 @@ class FileManager:
             files = []
             directories = []
             
-            if recursive:
-                for item in path.rglob('*'):
-                    if item.is_file():
-                        files.append(str(item.relative_to(self.base_path)))
-                    elif item.is_dir():
-                        directories.append(str(item.relative_to(self.base_path)))
+            prefix = path.relative_to(self.base_path).as_posix() if path != self.base_path else ""
+            if recursive and filtered:
+                # Közös bejáró: DirEntry típusok, kihagyott nevek és .gitignore szabályok
+                found, found_dirs = self.walker.walk(str(path), prefix, with_stat=False)
+                files = [str(Path(rel_path)) for rel_path in found]
+                directories = [str(Path(rel_path)) for rel_path in found_dirs]
             else:
-                for item in path.iterdir():
-                    rel_path = item.relative_to(self.base_path)
-                    if item.is_file():
-                        files.append(str(rel_path))
-                    elif item.is_dir():
-                        directories.append(str(rel_path))
+                # scandir: a típus a DirEntry-ből jön; a szimlinkelt könyvtárak listázódnak, de
+                # (mint az rglob-nál) nem járjuk be őket
+                stack = [(str(path), prefix)]
+                while stack:
+                    abs_dir, rel_dir = stack.pop()
+                    with os.scandir(abs_dir) as it:
+                        for item in it:
+                            rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                            is_dir = item.is_dir()
+                            if filtered and ((is_dir and item.is_symlink()) or self.walker.is_ignored(rel_path, is_dir)):
+                                # Mint a bejárónál (és a fájl indexnél): szimlinkelt könyvtár nélkül
+                                continue
+                            if is_dir:
+                                directories.append(str(Path(rel_path)))
+                                if recursive and not item.is_symlink():
+                                    stack.append((item.path, rel_path))
+                            elif item.is_file():
+                                files.append(str(Path(rel_path)))
             
             return {
                 "files": sorted(files),
@@ -0,0 +1,258 @@
+"""
+File Summaries - Fájlonkénti összefoglalók tartalom hash szerint (olcsó kódbázis kontextus)
+"""
+import re
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.file_index import FileIndex, Changes
+from core.context_minifier import minify, detect_language
+from core.conversation_memory import estimate_tokens
+from modules.prompt_builder import build_file_summary_prompt
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class FileSummaryStore:
+    """Fájl összefoglalók, amelyek a fájl tartalom hash-éhez kötődnek
+    
+    Forrásai: a /api/explain magyarázatok (az első mondatok) és egy alacsony prioritású háttér
+    feladat, amely üresjáratban a még össze nem foglalt fájlokat az LLM-mel összefoglalja
+    (a fontosabb fájlokkal kezdve). Ha a fájl hash-e megváltozik, az összefoglaló érvénytelen.
+    """
+    
+    def __init__(self, file_index: FileIndex, llm_service=None, storage_file: Optional[str] = None,
+                 model: Optional[str] = None, max_input_tokens: int = 1500, max_summary_chars: int = 400,
+                 max_file_size: int = 256 * 1024, is_idle: Optional[Callable[[], bool]] = None,
+                 ranker: Optional[Callable[[], Dict[str, float]]] = None):
+        """
+        Args:
+            file_index: Projekt fájl index
+            llm_service: LLM szolgáltatás a háttér összefoglaláshoz (None = csak explain eredmények)
+            storage_file: Perzisztens tároló (alapértelmezés: <index könyvtár>/summaries.json)
+            model: Összefoglaló modell (None = alapértelmezett)
+            max_input_tokens: A fájlból (tömörítve) ennyi token kerül a promptba
+            max_summary_chars: Az összefoglaló maximális hossza
+            max_file_size: Ennél nagyobb fájlokat nem foglalunk össze
+            is_idle: Üresjárat ellenőrző függvény (None = mindig dolgozhat)
+            ranker: Fájl fontosság {útvonal: pontszám} (a háttér feladat sorrendjéhez)
+        """
+        self.file_index = file_index
+        self.llm = llm_service
+        self.storage_file = Path(storage_file) if storage_file else file_index.index_dir / "summaries.json"
+        self.model = model
+        self.max_input_tokens = max_input_tokens
+        self.max_summary_chars = max_summary_chars
+        self.max_file_size = max_file_size
+        self.is_idle = is_idle or (lambda: True)
+        self.ranker = ranker
+        
+        # útvonal -> {"hash", "summary", "source", "updated"}
+        self._summaries: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.generated_total = 0
+        self.last_run: Optional[str] = None
+        
+        self._load()
+        file_index.subscribe(self._on_changes)
+    
+    def _load(self):
+        if not self.storage_file.exists():
+            return
+        try:
+            with open(self.storage_file, 'r', encoding='utf-8') as f:
+                self._summaries = json.load(f)
+        except Exception as e:
+            logger.warning(f"File summary store load error: {e}")
+            self._summaries = {}
+    
+    def _save(self):
+        with self._lock:
+            temp_file = self.storage_file.with_suffix(".json.tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._summaries, f, ensure_ascii=False, separators=(",", ":"))
+            temp_file.replace(self.storage_file)
+    
+    def _on_changes(self, changes: Changes):
+        """A törölt és a megváltozott (más hash-ű) fájlok összefoglalója elavult"""
+        stale = list(changes.get("removed", []))
+        for path in changes.get("modified", []):
+            entry = self.file_index.get(path)
+            with self._lock:
+                record = self._summaries.get(path)
+            if record and (entry is None or entry.hash != record["hash"]):
+                stale.append(path)
+        if not stale:
+            return
+        with self._lock:
+            removed = [path for path in stale if self._summaries.pop(path, None) is not None]
+        if removed:
+            try:
+                self._save()
+            except Exception as e:
+                logger.warning(f"File summary store save error: {e}")
+    
+    def get(self, path: str) -> Optional[str]:
+        """A fájl összefoglalója, ha az a jelenlegi tartalomhoz készült"""
+        path = self.file_index.relative_path(path) or path
+        entry = self.file_index.get(path)
+        with self._lock:
+            record = self._summaries.get(path)
+        if record and entry is not None and entry.hash and record["hash"] == entry.hash:
+            return record["summary"]
+        return None
+    
+    def content_hash(self, path: str) -> Optional[str]:
+        """A fájl jelenlegi tartalom hash-e az indexben (a tartalom beolvasása előtt kérendő le)"""
+        entry = self.file_index.get(path)
+        return entry.hash if entry is not None else None
+    
+    def put(self, path: str, summary: str, source: str = "llm", content_hash: Optional[str] = None) -> bool:
+        """Összefoglaló mentése a fájl jelenlegi hash-éhez
+        
+        Args:
+            content_hash: Az összefoglalt tartalom hash-e (content_hash() az olvasás előtt); ha a
+                fájl azóta megváltozott, az összefoglaló elavult és nem mentjük
+        """
+        path = self.file_index.relative_path(path) or path
+        entry = self.file_index.get(path)
+        summary = " ".join(summary.split())
+        if entry is None or not entry.hash or not summary:
+            return False
+        if content_hash is not None and entry.hash != content_hash:
+            return False
+        with self._lock:
+            self._summaries[path] = {
+                "hash": entry.hash,
+                "summary": summary[:self.max_summary_chars],
+                "source": source,
+                "updated": datetime.now().isoformat()
+            }
+        try:
+            self._save()
+        except Exception as e:
+            logger.warning(f"File summary store save error: {e}")
+        return True
+    
+    def record_explanation(self, path: str, explanation: str, content_hash: Optional[str]) -> bool:
+        """Explain eredmény felhasználása: az első mondatok (a max hosszig) lesznek az összefoglaló
+        
+        Érvényes (a jelenlegi tartalomhoz készült) összefoglalót nem ír felül.
+        
+        Args:
+            content_hash: A megmagyarázott tartalom hash-e (content_hash() a fájl olvasása előtt)
+        """
+        if not explanation or not content_hash or self.get(path) is not None:
+            return False
+        text = " ".join(explanation.replace("#", " ").replace("*", " ").split())
+        summary = ""
+        for sentence in SENTENCE_END.split(text):
+            if summary and len(summary) + len(sentence) + 1 > self.max_summary_chars:
+                break
+            summary = f"{summary} {sentence}".strip()
+        return self.put(path, summary, source="explain", content_hash=content_hash)
+    
+    def summarize(self, path: str) -> bool:
+        """Egy fájl összefoglalása az LLM-mel"""
+        if self.llm is None:
+            return False
+        # A hash az olvasás előtt: ha a fájl az LLM hívás alatt változik, az eredmény nem kerül
+        # az új tartalom hash-e alá
+        content_hash = self.content_hash(path)
+        if not content_hash:
+            return False
+        content = self.file_index.read_text(path)
+        if not content or not content.strip():
+            return False
+        text = minify(content, path).text
+        limit = self.max_input_tokens * 4
+        if len(text) > limit:
+            text = text[:limit] + "\n..."
+        prompt = build_file_summary_prompt(path, text, detect_language(path) or "")
+        summary = self.llm.generate(prompt, model=self.model, temperature=0.2,
+                                    max_tokens=estimate_tokens("x" * self.max_summary_chars) + 20)
+        if not summary or not summary.strip():
+            return False
+        return self.put(path, summary, source="llm", content_hash=content_hash)
+    
+    def pending(self, limit: int = 20) -> List[str]:
+        """Összefoglaló nélküli (vagy elavult) szöveges fájlok, fontosság szerint"""
+        ranks = {}
+        if self.ranker:
+            try:
+                ranks = self.ranker()
+            except Exception as e:
+                logger.warning(f"File summary ranking error: {e}")
+        paths = []
+        for path in self.file_index.files(text_only=True):
+            entry = self.file_index.get(path)
+            if entry is None or not entry.hash or entry.size > self.max_file_size or entry.size == 0:
+                continue
+            with self._lock:
+                record = self._summaries.get(path)
+            if record is None or record["hash"] != entry.hash:
+                paths.append(path)
+        paths.sort(key=lambda p: (-ranks.get(p, 0.0), p))
+        return paths[:limit]
+    
+    def run_once(self, max_files: int = 5, force: bool = False) -> int:
+        """Egy háttér kör: legfeljebb max_files fájl összefoglalása (amíg üresjárat van)
+        
+        Returns:
+            Elkészült összefoglalók száma
+        """
+        done = 0
+        for path in self.pending(limit=max_files):
+            if self._stop.is_set() or not (force or self.is_idle()):
+                break
+            try:
+                if self.summarize(path):
+                    done += 1
+            except Exception as e:
+                logger.warning(f"File summary error ({path}): {e}")
+                break
+        self.generated_total += done
+        self.last_run = datetime.now().isoformat()
+        if done:
+            logger.info(f"File summaries: {done} files summarized")
+        return done
+    
+    def start(self, interval: int = 120):
+        """Háttér összefoglalás indítása (üresjáratban fut)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        
+        def loop():
+            while not self._stop.wait(interval):
+                if self.is_idle():
+                    self.run_once()
+        
+        self._thread = threading.Thread(target=loop, name="file-summaries", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Háttér összefoglalás leállítása"""
+        self._stop.set()
+    
+    def get_stats(self) -> Dict:
+        """Összefoglaló tároló statisztika"""
+        with self._lock:
+            sources: Dict[str, int] = {}
+            for record in self._summaries.values():
+                sources[record["source"]] = sources.get(record["source"], 0) + 1
+            return {
+                "summaries": len(self._summaries),
+                "sources": sources,
+                "generated_total": self.generated_total,
+                "last_run": self.last_run,
+                "background": bool(self._thread and self._thread.is_alive())
+            }
@@ -0,0 +1,485 @@
+"""
+Git Status - Git index és working tree állapot olvasása közvetlenül (git parancs futtatása nélkül)
+"""
+import zlib
+import time
+import bisect
+import difflib
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.file_index import FileIndex, Changes
+
+logger = logging.getLogger(__name__)
+
+OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OFS_DELTA, REF_DELTA = 6, 7
+# Állapotonkénti alap súly a rangsoroláshoz
+STATE_WEIGHTS = {"conflict": 1.0, "modified": 1.0, "staged": 0.8, "untracked": 0.5}
+
+
+@dataclass
+class IndexEntry:
+    """Egy git index bejegyzés (a rangsoroláshoz szükséges mezők)"""
+    path: str
+    sha: str
+    size: int
+    mtime: Tuple[int, int]
+    stage: int = 0
+
+
+@dataclass
+class FileStatus:
+    """Egy változott fájl állapota"""
+    path: str
+    state: str
+    mtime_ns: int = 0
+
+
+def find_git_dir(path: Path) -> Optional[Path]:
+    """A path-et tartalmazó repository .git könyvtára (worktree esetén a gitdir)"""
+    for candidate in [path, *path.parents]:
+        git = candidate / ".git"
+        if git.is_dir():
+            return git
+        if git.is_file():
+            content = git.read_text(encoding="utf-8", errors="ignore").strip()
+            if content.startswith("gitdir:"):
+                target = Path(content[7:].strip())
+                return target if target.is_absolute() else (candidate / target).resolve()
+    return None
+
+
+def read_index(data: bytes) -> Dict[str, IndexEntry]:
+    """A .git/index (v2-v4) bejegyzései"""
+    if data[:4] != b"DIRC":
+        raise ValueError("Invalid git index")
+    version = int.from_bytes(data[4:8], "big")
+    count = int.from_bytes(data[8:12], "big")
+    if version not in (2, 3, 4):
+        raise ValueError(f"Unsupported git index version: {version}")
+    
+    entries = {}
+    pos = 12
+    previous = b""
+    for _ in range(count):
+        start = pos
+        mtime = (int.from_bytes(data[pos + 8:pos + 12], "big"), int.from_bytes(data[pos + 12:pos + 16], "big"))
+        size = int.from_bytes(data[pos + 36:pos + 40], "big")
+        sha = data[pos + 40:pos + 60].hex()
+        flags = int.from_bytes(data[pos + 60:pos + 62], "big")
+        pos += 62
+        if version >= 3 and flags & 0x4000:
+            pos += 2
+        if version == 4:
+            # Előtag tömörítés: az előző névből N bájtot elhagyunk, utána jön a NUL végű maradék
+            strip, pos = _offset_varint(data, pos)
+            end = data.index(b"\0", pos)
+            name = previous[:len(previous) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.index(b"\0", pos)
+            name = data[pos:end]
+            pos = start + ((end - start) // 8 + 1) * 8
+        previous = name
+        path = name.decode("utf-8", errors="replace")
+        stage = (flags >> 12) & 3
+        if path in entries and stage == 0:
+            continue
+        entries[path] = IndexEntry(path, sha, size, mtime, stage)
+    return entries
+
+
+def _offset_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Git "offset" varint (index v4 és OFS_DELTA)"""
+    byte = data[pos]
+    value = byte & 0x7F
+    pos += 1
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def _size_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Git delta alkalmazása (copy / insert utasítások)"""
+    _, pos = _size_varint(delta, 0)
+    _, pos = _size_varint(delta, pos)
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("Invalid delta opcode")
+    return bytes(out)
+
+
+def blob_sha(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class _Pack:
+    """Egy packfile és az idx (v2) fájlja"""
+    
+    def __init__(self, idx_path: Path):
+        data = idx_path.read_bytes()
+        if data[:4] != b"\xfftOc" or int.from_bytes(data[4:8], "big") != 2:
+            raise ValueError(f"Unsupported pack index: {idx_path}")
+        self.fanout = [int.from_bytes(data[8 + 4 * i:12 + 4 * i], "big") for i in range(256)]
+        count = self.fanout[-1]
+        base = 8 + 1024
+        self.shas = [data[base + 20 * i:base + 20 * i + 20] for i in range(count)]
+        offsets = base + 24 * count
+        self.offsets = [int.from_bytes(data[offsets + 4 * i:offsets + 4 * i + 4], "big") for i in range(count)]
+        large = offsets + 4 * count
+        self.large = data[large:len(data) - 40]
+        self.pack_path = idx_path.with_suffix(".pack")
+    
+    def offset(self, sha: bytes) -> Optional[int]:
+        low = self.fanout[sha[0] - 1] if sha[0] else 0
+        i = bisect.bisect_left(self.shas, sha, low, self.fanout[sha[0]])
+        if i >= len(self.shas) or self.shas[i] != sha:
+            return None
+        offset = self.offsets[i]
+        if offset & 0x80000000:
+            index = offset & 0x7FFFFFFF
+            offset = int.from_bytes(self.large[8 * index:8 * index + 8], "big")
+        return offset
+
+
+class GitRepository:
+    """Git objektumok és referenciák olvasása (loose objektumok és packfile-ok, delta feloldással)"""
+    
+    def __init__(self, git_dir: Path):
+        self.git_dir = git_dir
+        common = git_dir / "commondir"
+        self.common_dir = (git_dir / common.read_text().strip()).resolve() if common.exists() else git_dir
+        self.objects_dir = self.common_dir / "objects"
+        self._packs: Optional[List[_Pack]] = None
+        self._pack_mtime = None
+    
+    @property
+    def index_path(self) -> Path:
+        return self.git_dir / "index"
+    
+    def _load_packs(self) -> List[_Pack]:
+        pack_dir = self.objects_dir / "pack"
+        mtime = pack_dir.stat().st_mtime_ns if pack_dir.exists() else None
+        if self._packs is None or mtime != self._pack_mtime:
+            packs = []
+            for idx in sorted(pack_dir.glob("*.idx")) if mtime else []:
+                try:
+                    packs.append(_Pack(idx))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Git pack index read error ({idx.name}): {e}")
+            self._packs, self._pack_mtime = packs, mtime
+        return self._packs
+    
+    def read_object(self, sha: str) -> Tuple[str, bytes]:
+        """Objektum (típus, tartalom)"""
+        loose = self.objects_dir / sha[:2] / sha[2:]
+        if loose.exists():
+            raw = zlib.decompress(loose.read_bytes())
+            header, _, body = raw.partition(b"\0")
+            return header.split(b" ")[0].decode(), body
+        binary = bytes.fromhex(sha)
+        for pack in self._load_packs():
+            offset = pack.offset(binary)
+            if offset is not None:
+                with open(pack.pack_path, "rb") as f:
+                    return self._read_packed(f, offset)
+        raise KeyError(sha)
+    
+    def _read_packed(self, f, offset: int) -> Tuple[str, bytes]:
+        f.seek(offset)
+        header = f.read(32)
+        byte = header[0]
+        kind = (byte >> 4) & 7
+        pos = 1
+        while byte & 0x80:
+            byte = header[pos]
+            pos += 1
+        base_ref = None
+        if kind == OFS_DELTA:
+            distance, pos = _offset_varint(header, pos)
+            base_ref = offset - distance
+        elif kind == REF_DELTA:
+            base_ref = header[pos:pos + 20].hex()
+            pos += 20
+        f.seek(offset + pos)
+        decompressor = zlib.decompressobj()
+        data = b""
+        while not decompressor.eof:
+            chunk = f.read(16384)
+            if not chunk:
+                break
+            data += decompressor.decompress(chunk)
+        if kind in OBJECT_TYPES:
+            return OBJECT_TYPES[kind], data
+        base_kind, base = self._read_packed(f, base_ref) if kind == OFS_DELTA else self.read_object(base_ref)
+        return base_kind, apply_delta(base, data)
+    
+    def resolve_ref(self, ref: str) -> Optional[str]:
+        for root in (self.git_dir, self.common_dir):
+            path = root / ref
+            if path.is_file():
+                return path.read_text().strip()
+        packed = self.common_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text().splitlines():
+                if line.endswith(" " + ref):
+                    return line.split(" ", 1)[0]
+        return None
+    
+    def head_commit(self) -> Optional[str]:
+        head = (self.git_dir / "HEAD").read_text().strip()
+        return self.resolve_ref(head[5:].strip()) if head.startswith("ref:") else head
+    
+    def ref_files(self) -> List[Path]:
+        """Fájlok, amelyek változása a HEAD változását jelzi"""
+        files = [self.git_dir / "HEAD", self.common_dir / "packed-refs"]
+        head = (self.git_dir / "HEAD").read_text().strip()
+        if head.startswith("ref:"):
+            files.append(self.common_dir / head[5:].strip())
+        return files
+    
+    def tree_files(self, commit_sha: str) -> Dict[str, str]:
+        """Egy commit fájljai {útvonal: blob sha}"""
+        kind, body = self.read_object(commit_sha)
+        if kind != "commit":
+            return {}
+        tree_sha = body.split(b"\n", 1)[0].split(b" ")[1].decode()
+        files = {}
+        stack = [(tree_sha, "")]
+        while stack:
+            sha, prefix = stack.pop()
+            _, data = self.read_object(sha)
+            pos = 0
+            while pos < len(data):
+                space = data.index(b" ", pos)
+                nul = data.index(b"\0", space)
+                mode = data[pos:space]
+                name = data[space + 1:nul].decode("utf-8", errors="replace")
+                entry_sha = data[nul + 1:nul + 21].hex()
+                pos = nul + 21
+                if mode == b"40000":
+                    stack.append((entry_sha, f"{prefix}{name}/"))
+                elif mode != b"160000":
+                    files[prefix + name] = entry_sha
+        return files
+
+
+class GitStatus:
+    """Working tree állapot (módosított, stage-elt, új fájlok és változott sortartományok)
+    
+    A git index közvetlenül olvasódik; a módosítás a FileIndex méret / mtime adataiból derül ki
+    (eltérésnél blob hash ellenőrzéssel), a stage-elt fájlok a HEAD fájához képest. Az eredmény
+    gyorsítótárazott: az index és a HEAD referencia fájlok mtime-ja, illetve a FileIndex
+    változás értesítése érvényteleníti.
+    """
+    
+    def __init__(self, file_index: FileIndex, recency_half_life: float = 3600.0):
+        """
+        Args:
+            file_index: Projekt fájl index (a working tree állapota)
+            recency_half_life: A frissességi súly felezési ideje másodpercben
+        """
+        self.file_index = file_index
+        self.recency_half_life = recency_half_life
+        git_dir = find_git_dir(file_index.base_path)
+        self.repo = GitRepository(git_dir) if git_dir else None
+        # A projekt gyökér útvonala a repository gyökeréhez képest
+        self._prefix = ""
+        if git_dir:
+            worktree = git_dir.parent if git_dir.name == ".git" else file_index.base_path
+            relative = file_index.base_path.relative_to(worktree) if file_index.base_path.is_relative_to(worktree) else Path()
+            self._prefix = "" if str(relative) == "." else relative.as_posix() + "/"
+        
+        self._lock = threading.RLock()
+        self._key = None
+        self._dirty = True
+        self._status: Dict[str, FileStatus] = {}
+        self._head_sha: Optional[str] = None
+        self._head_files: Dict[str, str] = {}
+        self._index: Dict[str, IndexEntry] = {}
+        # (útvonal, tartalom hash) -> blob sha, hogy ugyanazt a fájlt ne hash-eljük újra
+        self._blob_shas: Dict[Tuple[str, Optional[str]], str] = {}
+        self._hunks: Dict[Tuple[str, Optional[str], Optional[str]], List[Tuple[int, int]]] = {}
+        
+        self.refreshes = 0
+        self.cache_hits = 0
+        file_index.subscribe(self._on_changes)
+    
+    def _on_changes(self, changes: Changes):
+        with self._lock:
+            self._dirty = True
+    
+    def _stat_key(self) -> Tuple:
+        key = []
+        for path in [self.repo.index_path, *self.repo.ref_files()]:
+            try:
+                stat = path.stat()
+                key.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                key.append(None)
+        return tuple(key)
+    
+    def status(self) -> Dict[str, FileStatus]:
+        """Változott fájlok {projekt relatív útvonal: FileStatus}"""
+        if self.repo is None:
+            return {}
+        with self._lock:
+            try:
+                key = self._stat_key()
+                if key == self._key and not self._dirty:
+                    self.cache_hits += 1
+                    return self._status
+                self._status = self._compute(key)
+                self._key, self._dirty = key, False
+                self.refreshes += 1
+            except Exception as e:
+                logger.warning(f"Git status error: {e}")
+                self._status = {}
+            return self._status
+    
+    def _compute(self, key: Tuple) -> Dict[str, FileStatus]:
+        if key[0] != (self._key[0] if self._key else None):
+            self._index = read_index(self.repo.index_path.read_bytes()) if self.repo.index_path.exists() else {}
+        head = self.repo.head_commit()
+        if head != self._head_sha:
+            self._head_files = self.repo.tree_files(head) if head else {}
+            self._head_sha = head
+        
+        status = {}
+        for path in self.file_index.files():
+            entry = self.file_index.get(path)
+            if entry is None:
+                continue
+            repo_path = self._prefix + path
+            index_entry = self._index.get(repo_path)
+            if index_entry is None:
+                status[path] = FileStatus(path, "untracked", entry.mtime_ns)
+                continue
+            if index_entry.stage:
+                status[path] = FileStatus(path, "conflict", entry.mtime_ns)
+                continue
+            stat_mtime = (entry.mtime_ns // 1_000_000_000, entry.mtime_ns % 1_000_000_000)
+            if (entry.size != index_entry.size or stat_mtime != index_entry.mtime) and \
+                    self._working_sha(path, entry) != index_entry.sha:
+                status[path] = FileStatus(path, "modified", entry.mtime_ns)
+            elif self._head_files.get(repo_path) != index_entry.sha:
+                status[path] = FileStatus(path, "staged", entry.mtime_ns)
+        return status
+    
+    def _working_sha(self, path: str, entry) -> Optional[str]:
+        cache_key = (path, entry.hash)
+        if entry.hash and cache_key in self._blob_shas:
+            return self._blob_shas[cache_key]
+        try:
+            sha = blob_sha((self.file_index.base_path / path).read_bytes())
+        except OSError:
+            return None
+        if entry.hash:
+            self._blob_shas[cache_key] = sha
+        return sha
+    
+    def hunks(self, path: str) -> List[Tuple[int, int]]:
+        """A HEAD (vagy index) állapothoz képest változott sortartományok a jelenlegi fájlban"""
+        file_status = self.status().get(path)
+        if file_status is None:
+            return []
+        entry = self.file_index.get(path)
+        content = self.file_index.read_text(path) or ""
+        lines = content.splitlines()
+        repo_path = self._prefix + path
+        with self._lock:
+            base_sha = self._head_files.get(repo_path) or (self._index.get(repo_path).sha if repo_path in self._index else None)
+            cache_key = (path, entry.hash if entry else None, base_sha)
+            if cache_key in self._hunks:
+                return self._hunks[cache_key]
+        if base_sha is None:
+            ranges = [(1, max(len(lines), 1))]
+        else:
+            try:
+                _, base = self.repo.read_object(base_sha)
+            except (KeyError, OSError, ValueError, zlib.error) as e:
+                logger.warning(f"Git object read error ({path}): {e}")
+                return []
+            matcher = difflib.SequenceMatcher(None, base.decode("utf-8", errors="ignore").splitlines(), lines,
+                                              autojunk=False)
+            ranges = []
+            for tag, _, _, j1, j2 in matcher.get_opcodes():
+                if tag == "equal":
+                    continue
+                # Törlésnél a törlés helyét jelöljük
+                ranges.append((j1 + 1, max(j2, j1 + 1)))
+        with self._lock:
+            self._hunks[cache_key] = ranges
+        return ranges
+    
+    def boost(self, path: str) -> float:
+        """Rangsorolási súly 0..1 (állapot és frissesség alapján; nem változott fájlra 0)"""
+        file_status = self.status().get(path)
+        if file_status is None:
+            return 0.0
+        age = max(time.time() - file_status.mtime_ns / 1e9, 0.0)
+        recency = 0.5 ** (age / self.recency_half_life)
+        if file_status.state == "untracked":
+            # Az új fájlok közül csak a frissen létrehozottak érdekesek (build kimenet, stb. nem)
+            return STATE_WEIGHTS["untracked"] * recency
+        return STATE_WEIGHTS[file_status.state] * (0.5 + 0.5 * recency)
+    
+    def changed_files(self, limit: int = 20) -> List[Dict]:
+        """Változott fájlok súly szerint csökkenő sorrendben"""
+        ranked = []
+        for path, file_status in self.status().items():
+            weight = self.boost(path)
+            if weight > 0.01:
+                ranked.append({"path": path, "state": file_status.state, "boost": round(weight, 4)})
+        ranked.sort(key=lambda item: (-item["boost"], item["path"]))
+        return ranked[:limit]
+    
+    def get_stats(self) -> Dict:
+        """Git állapot statisztika"""
+        status = self.status()
+        states: Dict[str, int] = {}
+        for file_status in status.values():
+            states[file_status.state] = states.get(file_status.state, 0) + 1
+        return {
+            "enabled": self.repo is not None,
+            "head": self._head_sha,
+            "index_entries": len(self._index),
+            "states": states,
+            "refreshes": self.refreshes,
+            "cache_hits": self.cache_hits
+        }
@@ -0,0 +1,366 @@
+"""
+Import Graph - Projekt fájlok függőségi gráfja (Python és JS/TS importok)
+"""
+import os
+import re
+import ast
+import json
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.file_index import FileIndex, Changes
+
+logger = logging.getLogger(__name__)
+
+PYTHON_EXTENSIONS = {'.py'}
+JS_EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.vue', '.svelte'}
+
+# Feloldási sorrend kiterjesztés nélküli JS/TS importokhoz
+JS_RESOLVE_SUFFIXES = [
+    '', '.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs',
+    '/index.ts', '/index.tsx', '/index.js', '/index.jsx'
+]
+
+# import x from 'y' / import 'y' / export ... from 'y' / require('y') / import('y')
+JS_IMPORT_PATTERN = re.compile(
+    r"""(?:\bimport\s+(?:[\w*{}\s,$]+?\s+from\s+)?|\bexport\s+[\w*{}\s,$]+?\s+from\s+|\brequire\s*\(\s*|\bimport\s*\(\s*)"""
+    r"""['"]([^'"\n]+)['"]"""
+)
+
+# Import leírás: ("py", modul, szint, importált nevek) vagy ("js", specifikátor)
+ImportSpec = Tuple
+
+
+def parse_python_imports(source: str) -> List[ImportSpec]:
+    """Python importok az ast-ből"""
+    specs = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                specs.append(("py", alias.name, 0, []))
+        elif isinstance(node, ast.ImportFrom):
+            specs.append(("py", node.module or "", node.level, [alias.name for alias in node.names]))
+    return specs
+
+
+def parse_js_imports(source: str) -> List[ImportSpec]:
+    """JS/TS import, export ... from és require hivatkozások"""
+    return [("js", match.group(1)) for match in JS_IMPORT_PATTERN.finditer(source)]
+
+
+class ImportGraph:
+    """Fájlok közötti import élek gyorsítótárazott gráfja
+    
+    Fájlonként eltároljuk a nyers importokat (a tartalom hash-ével együtt perzisztálva, így
+    induláskor csak a változott fájlokat kell újra elemezni), és ezekből az indexben létező
+    fájlokra feloldott élek két irányú szomszédsági listáját. A FileIndex értesítései alapján
+    fájlonként frissül; új fájlnál a rá illeszkedő feloldatlan, törölt fájlnál a rá mutató
+    importokat oldjuk fel újra.
+    """
+    
+    def __init__(self, file_index: FileIndex, cache_file: Optional[str] = None,
+                 max_file_size: int = 1024 * 1024):
+        """
+        Args:
+            file_index: Projekt fájl index
+            cache_file: Elemzett importok cache fájlja (None = <index_dir>/imports.json)
+            max_file_size: Ennél nagyobb fájlokat nem elemzünk
+        """
+        self.file_index = file_index
+        self.cache_file = Path(cache_file) if cache_file else file_index.index_dir / "imports.json"
+        self.max_file_size = max_file_size
+        
+        # fájl -> (tartalom hash, importok)
+        self._specs: Dict[str, Tuple[Optional[str], List[ImportSpec]]] = {}
+        self._imports: Dict[str, Set[str]] = {}
+        self._importers: Dict[str, Set[str]] = {}
+        # feloldatlan import neve (utolsó tag / fájlnév) -> az importáló fájlok
+        self._waiting: Dict[str, Set[str]] = {}
+        self._waiting_keys: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        file_index.subscribe(self._on_changes)
+    
+    @staticmethod
+    def is_source(path: str) -> bool:
+        suffix = os.path.splitext(path)[1].lower()
+        return suffix in PYTHON_EXTENSIONS or suffix in JS_EXTENSIONS
+    
+    def _load_cache(self) -> Dict[str, Tuple[Optional[str], List[ImportSpec]]]:
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {path: (digest, [tuple(spec) for spec in specs]) for path, (digest, specs) in data.items()}
+        except Exception as e:
+            logger.warning(f"Import graph cache load error: {e}")
+            return {}
+    
+    def _save_cache(self):
+        with self._lock:
+            data = {path: [digest, specs] for path, (digest, specs) in self._specs.items()}
+        temp_file = self.cache_file.with_suffix(".json.tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        temp_file.replace(self.cache_file)
+    
+    def _parse(self, path: str) -> Optional[Tuple[Optional[str], List[ImportSpec]]]:
+        """Fájl importjainak elemzése (None, ha nem forrásfájl vagy nem olvasható)"""
+        entry = self.file_index.get(path)
+        if entry is None or not self.is_source(path) or entry.size > self.max_file_size:
+            return None
+        content = self.file_index.read_text(path)
+        if content is None:
+            return None
+        if path.endswith(".py"):
+            try:
+                specs = parse_python_imports(content)
+            except (SyntaxError, ValueError):
+                specs = []
+        else:
+            specs = parse_js_imports(content)
+        return entry.hash, specs
+    
+    def _exists(self, path: str) -> bool:
+        return path in self.file_index.entries
+    
+    def _resolve_python(self, path: str, module: str, level: int, names: List[str]) -> Set[str]:
+        """Python modul feloldása projekt fájlra"""
+        parts = path.split("/")[:-1]
+        if level:
+            # Relatív import: a fájl csomagjától felfelé
+            if level - 1 > len(parts):
+                return set()
+            bases = ["/".join(parts[:len(parts) - (level - 1)])]
+        else:
+            # Abszolút import: a gyökérből, vagy a fájl könyvtárától felfelé (szkriptek, src/ elrendezés)
+            bases = [""] + ["/".join(parts[:i]) for i in range(len(parts), 0, -1)]
+        
+        module_path = module.replace(".", "/")
+        for base in bases:
+            prefix = "/".join(p for p in (base, module_path) if p)
+            found = set()
+            # from pkg import submodule
+            for name in names:
+                if name != "*":
+                    found |= self._module_file("/".join(p for p in (prefix, name) if p))
+            found = found or self._module_file(prefix)
+            if found:
+                return found
+        return set()
+    
+    def _module_file(self, module_path: str) -> Set[str]:
+        if not module_path:
+            return set()
+        for candidate in (f"{module_path}.py", f"{module_path}/__init__.py"):
+            if self._exists(candidate):
+                return {candidate}
+        return set()
+    
+    def _resolve_js(self, path: str, specifier: str) -> Set[str]:
+        """Relatív JS/TS import feloldása (a csomag importok külső függőségek)"""
+        if not specifier.startswith("."):
+            return set()
+        base = os.path.normpath(os.path.join(os.path.dirname(path), specifier)).replace(os.sep, "/")
+        if base.startswith(".."):
+            return set()
+        for suffix in JS_RESOLVE_SUFFIXES:
+            if self._exists(base + suffix):
+                return {base + suffix}
+        return set()
+    
+    def _link(self, path: str):
+        """A fájl importjainak feloldása és az élek frissítése"""
+        resolved = set()
+        waiting = set()
+        for spec in self._specs.get(path, (None, []))[1]:
+            if spec[0] == "py":
+                targets = self._resolve_python(path, spec[1], spec[2], spec[3])
+            else:
+                targets = self._resolve_js(path, spec[1])
+            if not targets:
+                waiting |= self._spec_keys(spec)
+            resolved |= targets
+        resolved.discard(path)
+        
+        for target in self._imports.get(path, set()) - resolved:
+            self._importers.get(target, set()).discard(path)
+        for target in resolved:
+            self._importers.setdefault(target, set()).add(path)
+        self._imports[path] = resolved
+        self._set_waiting(path, waiting)
+    
+    def _set_waiting(self, path: str, keys: Set[str]):
+        for key in self._waiting_keys.pop(path, set()) - keys:
+            self._waiting.get(key, set()).discard(path)
+        for key in keys:
+            self._waiting.setdefault(key, set()).add(path)
+        if keys:
+            self._waiting_keys[path] = keys
+    
+    @staticmethod
+    def _spec_keys(spec: ImportSpec) -> Set[str]:
+        """Feloldatlan import kulcsai: azok a fájlnevek, amelyek megjelenése feloldhatja"""
+        if spec[0] == "py":
+            keys = set(spec[3]) - {"*"}
+            if spec[1]:
+                keys.add(spec[1].rsplit(".", 1)[-1])
+            return keys
+        if not spec[1].startswith("."):
+            return set()
+        return {os.path.splitext(os.path.basename(spec[1].rstrip("/")))[0]}
+    
+    @staticmethod
+    def _path_keys(path: str) -> Set[str]:
+        """Fájl kulcsai: fájlnév kiterjesztés nélkül (csomag / index fájlnál a könyvtár neve is)"""
+        parts = path.split("/")
+        keys = {os.path.splitext(parts[-1])[0]}
+        if keys & {"__init__", "index"} and len(parts) > 1:
+            keys.add(parts[-2])
+        return keys
+    
+    def _unlink(self, path: str):
+        for target in self._imports.pop(path, set()):
+            self._importers.get(target, set()).discard(path)
+        self._specs.pop(path, None)
+        self._set_waiting(path, set())
+    
+    def _on_changes(self, changes: Changes):
+        """FileIndex értesítés: a változott fájlok újraelemzése"""
+        removed = changes.get("removed", [])
+        added = changes.get("added", [])
+        parsed = {path: self._parse(path) for path in added + changes.get("modified", [])}
+        with self._lock:
+            relink = set()
+            for path in removed:
+                relink |= self._importers.pop(path, set())
+                self._unlink(path)
+            for path, result in parsed.items():
+                if result is None:
+                    self._unlink(path)
+                else:
+                    self._specs[path] = result
+                    relink.add(path)
+            for path in added:
+                # Új fájl feloldhatja más fájlok eddig feloldatlan importjait
+                for key in self._path_keys(path):
+                    relink |= self._waiting.get(key, set())
+            for path in relink:
+                if path in self._specs:
+                    self._link(path)
+        
+        try:
+            self._save_cache()
+        except Exception as e:
+            logger.warning(f"Import graph cache save error: {e}")
+    
+    def build(self):
+        """Teljes gráf építése (a cache-ben lévő, nem változott fájlok újraelemzése nélkül)"""
+        cached = self._load_cache()
+        specs = {}
+        for path in self.file_index.files(text_only=True):
+            if not self.is_source(path):
+                continue
+            entry = self.file_index.get(path)
+            previous = cached.get(path)
+            if previous is not None and entry is not None and entry.hash and previous[0] == entry.hash:
+                specs[path] = previous
+                continue
+            result = self._parse(path)
+            if result is not None:
+                specs[path] = result
+        
+        with self._lock:
+            # Az építés közben érkezett értesítések frissebbek, azokat nem írjuk felül
+            for path, result in specs.items():
+                self._specs.setdefault(path, result)
+            for path in list(self._specs):
+                self._link(path)
+        self._ready.set()
+        logger.info(f"Import graph built: {len(specs)} files, "
+                    f"{sum(len(t) for t in self._imports.values())} edges")
+        try:
+            self._save_cache()
+        except Exception as e:
+            logger.warning(f"Import graph cache save error: {e}")
+    
+    def start(self):
+        """Gráf építése háttér szálon"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.build, name="import-graph", daemon=True)
+        self._thread.start()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Megvárja az első építést (ha nem fut, szinkron épít)"""
+        if not self._ready.is_set() and (self._thread is None or not self._thread.is_alive()):
+            self.build()
+        return self._ready.wait(timeout)
+    
+    def imports(self, path: str) -> List[str]:
+        """A fájl által importált projekt fájlok"""
+        self.wait_ready()
+        with self._lock:
+            return sorted(self._imports.get(path, set()))
+    
+    def importers(self, path: str) -> List[str]:
+        """A fájlt importáló projekt fájlok"""
+        self.wait_ready()
+        with self._lock:
+            return sorted(self._importers.get(path, set()))
+    
+    def related(self, path: str, limit: int = 10, max_distance: int = 3) -> List[Dict]:
+        """Kapcsolódó fájlok gráf távolság szerint (BFS mindkét irányban)
+        
+        Returns:
+            [{"path", "distance", "relation"}], ahol relation: "imports", "imported_by" vagy "indirect"
+        """
+        self.wait_ready()
+        with self._lock:
+            if path not in self._specs and path not in self._importers:
+                return []
+            seen = {path}
+            related = []
+            queue = deque([(path, 0)])
+            while queue and len(related) < limit:
+                current, distance = queue.popleft()
+                if distance >= max_distance:
+                    continue
+                # Az importált fájlok előbb, a saját szinten belül útvonal szerint
+                neighbours = [(t, "imports") for t in sorted(self._imports.get(current, ()))]
+                neighbours += [(t, "imported_by") for t in sorted(self._importers.get(current, ()))]
+                for target, relation in neighbours:
+                    if target in seen:
+                        continue
+                    seen.add(target)
+                    related.append({
+                        "path": target,
+                        "distance": distance + 1,
+                        "relation": relation if distance == 0 else "indirect"
+                    })
+                    queue.append((target, distance + 1))
+                    if len(related) >= limit:
+                        break
+            return related
+    
+    def edges(self) -> Dict[str, List[str]]:
+        """Az összes feloldott import él (fájl -> importált fájlok)"""
+        self.wait_ready()
+        with self._lock:
+            return {path: sorted(targets) for path, targets in self._imports.items() if targets}
+    
+    def get_stats(self) -> Dict:
+        """Gráf statisztika"""
+        with self._lock:
+            return {
+                "ready": self._ready.is_set(),
+                "files": len(self._specs),
+                "edges": sum(len(targets) for targets in self._imports.values()),
+                "files_with_unresolved": len(self._waiting_keys)
+            }
@@ -8,11 +8,38 @@ import multiprocessing
 import logging
 from typing import List, Dict, Optional, AsyncGenerator
 import asyncio
+import time
+import inspect
+import functools
+import threading
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
 
+def _tracked(method):
+    """Folyamatban lévő LLM kérések számlálása (stream esetén a stream végéig)"""
+    if inspect.isasyncgenfunction(method):
+        @functools.wraps(method)
+        async def stream_wrapper(self, *args, **kwargs):
+            self._begin_request()
+            try:
+                async for chunk in method(self, *args, **kwargs):
+                    yield chunk
+            finally:
+                self._end_request()
+        return stream_wrapper
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._begin_request()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._end_request()
+    return wrapper
+
+
 class ModelType(str, Enum):
     """Támogatott modellek"""
     CODELLAMA = "codellama"
@@ -51,6 +78,35 @@ class LLMService:
                 logger.info(f"CPU optimalizált mód: {self.num_threads} CPU thread használata (70% of {cpu_count} cores)")
         else:
             self.num_threads = num_threads
+        
+        # Modell digest cache (/api/tags), hogy ne kérdezzük le minden kérésnél
+        self.digest_ttl = 60
+        self._digests: Dict[str, str] = {}
+        self._digests_fetched = 0.0
+        # Egyszerre egy frissítés fut; közben (és ha az Ollama nem elérhető) az utolsó ismert érték szolgál
+        self._digests_lock = threading.Lock()
+        
+        # Közös előtag újrahasznosítás: amíg a modell betöltve marad, az Ollama runner a
+        # KV cache-ből folytatja az azonos előtagú promptot, ezért ilyenkor bent tartjuk
+        self.prefix_keep_alive = os.getenv("OLLAMA_PREFIX_KEEP_ALIVE", "30m")
+        self.prefix_stats = {"requests": 0, "prefixed_requests": 0, "reused_messages": 0}
+        
+        # Folyamatban lévő generálások (az üresjárati háttér feladatok ehhez igazodnak)
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+    
+    def _begin_request(self):
+        with self._in_flight_lock:
+            self._in_flight += 1
+    
+    def _end_request(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+    
+    @property
+    def in_flight(self) -> int:
+        """Folyamatban lévő generálások száma (stream-ek a végükig)"""
+        return self._in_flight
     
     def check_connection(self) -> bool:
         """Ellenőrzi az Ollama kapcsolatot"""
@@ -71,6 +127,48 @@ class LLMService:
         except Exception:
             return []
     
+    def get_model_digest(self, model: Optional[str] = None) -> Optional[str]:
+        """Modell digest lekérése (változik, ha az 'ollama pull' lecseréli a modellt)"""
+        model = model or self.default_model
+        if ":" not in model:
+            model = f"{model}:latest"
+        
+        if not self._digests_fetched:
+            # Első lekérés: megvárjuk (egyetlen kérés, a többi hívó a zárnál vár rá)
+            with self._digests_lock:
+                if not self._digests_fetched:
+                    self._fetch_digests()
+        elif time.monotonic() - self._digests_fetched > self.digest_ttl and self._digests_lock.acquire(blocking=False):
+            # Lejárt: háttérben frissül, addig a cache útvonal nem vár a hálózatra
+            def refresh():
+                try:
+                    self._fetch_digests()
+                finally:
+                    self._digests_lock.release()
+            
+            try:
+                threading.Thread(target=refresh, name="model-digests", daemon=True).start()
+            except Exception:
+                self._digests_lock.release()
+                raise
+        
+        return self._digests.get(model) or None
+    
+    def _fetch_digests(self):
+        """Digestek frissítése az /api/tags-ből (hiba esetén a korábbiak maradnak)"""
+        try:
+            response = requests.get(f"{self.api_url}/tags", timeout=5)
+            if response.status_code == 200:
+                data = response.json()
+                self._digests = {
+                    m["name"]: m.get("digest", "")
+                    for m in data.get("models", [])
+                }
+        except Exception:
+            pass
+        self._digests_fetched = time.monotonic()
+    
+    @_tracked
     def generate(self, prompt: str, model: Optional[str] = None, 
                  context: Optional[str] = None, temperature: float = 0.5,
                  max_tokens: int = 1500) -> str:
@@ -123,6 +221,34 @@ class LLMService:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Ollama connection error: {str(e)}")
     
+    def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Szöveg embeddingek (egy kérésben az összes szöveg, /api/embed)"""
+        payload = {
+            "model": model,
+            "input": texts,
+            "options": {"num_thread": self.num_threads}
+        }
+        
+        try:
+            response = requests.post(
+                f"{self.api_url}/embed",
+                json=payload,
+                timeout=300
+            )
+            
+            if response.status_code == 200:
+                embeddings = response.json().get("embeddings", [])
+                if len(embeddings) != len(texts):
+                    raise Exception("Ollama embed error: embedding count mismatch")
+                return embeddings
+            else:
+                error_text = response.text[:500] if response.text else "No error message"
+                raise Exception(f"Ollama API error: {response.status_code} - {error_text}")
+        
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Ollama connection error: {str(e)}")
+    
+    @_tracked
     async def generate_stream(self, prompt: str, model: Optional[str] = None,
                              context: Optional[str] = None, 
                              temperature: float = 0.7) -> AsyncGenerator[str, None]:
@@ -180,9 +306,26 @@ class LLMService:
         except Exception as e:
             raise Exception(f"Stream error: {str(e)}")
     
+    def _apply_prefix(self, payload: Dict, prefix_id: Optional[str], prefix_length: int):
+        """Előtag azonosító alkalmazása a kérésre (keep_alive + statisztika)"""
+        self.prefix_stats["requests"] += 1
+        if not prefix_id:
+            return
+        payload["keep_alive"] = self.prefix_keep_alive
+        self.prefix_stats["prefixed_requests"] += 1
+        self.prefix_stats["reused_messages"] += prefix_length
+        logger.debug(f"Prompt prefix {prefix_id[:12]} reused ({prefix_length} messages)")
+    
+    @_tracked
     def chat(self, messages: List[Dict[str, str]], model: Optional[str] = None,
-             temperature: float = 0.5) -> str:
-        """Chat API használata (több üzenet kontextussal)"""
+             temperature: float = 0.5, prefix_id: Optional[str] = None,
+             prefix_length: int = 0) -> str:
+        """Chat API használata (több üzenet kontextussal)
+        
+        Args:
+            prefix_id: A korábban már kiértékelt közös előtag azonosítója (beszélgetés fa csomópont)
+            prefix_length: A közös előtag üzeneteinek száma
+        """
         model = model or self.default_model
         
         # CPU optimalizált options - minden CPU magot használunk
@@ -212,6 +355,7 @@ class LLMService:
             "stream": False,
             "options": options
         }
+        self._apply_prefix(payload, prefix_id, prefix_length)
         
         try:
             response = requests.post(
@@ -243,9 +387,12 @@ class LLMService:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Ollama connection error: {str(e)}")
     
+    @_tracked
     async def chat_stream(self, messages: List[Dict[str, str]], 
                          model: Optional[str] = None,
-                         temperature: float = 0.7) -> AsyncGenerator[str, None]:
+                         temperature: float = 0.7,
+                         prefix_id: Optional[str] = None,
+                         prefix_length: int = 0) -> AsyncGenerator[str, None]:
         """Stream chat (valós idejű)"""
         model = model or self.default_model
         
@@ -276,6 +423,7 @@ class LLMService:
             "stream": True,
             "options": options
         }
+        self._apply_prefix(payload, prefix_id, prefix_length)
         
         try:
             response = requests.post(
@@ -0,0 +1,188 @@
+"""
+Memory Index - Invertált index BM25 kereséssel a beszélgetési memóriához
+"""
+import os
+import re
+import json
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Szöveg tokenizálása (kisbetűs szavak, 1 karakteres tokenek nélkül)"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1]
+
+
+class MemoryIndex:
+    """Inkrementálisan karbantartott invertált index BM25 pontozással és frissességi súlyozással
+    
+    Az index egy append-only JSON Lines fájlban (a memória napló mellett) tárolódik,
+    dokumentumonként a kifejezés gyakoriságokkal, így induláskor nem kell újratokenizálni.
+    """
+    
+    def __init__(self, index_file: Path, k1: float = 1.2, b: float = 0.75,
+                 half_life_days: float = 7.0, recency_weight: float = 0.5):
+        """
+        Args:
+            index_file: Index napló fájl
+            k1, b: BM25 paraméterek
+            half_life_days: Frissességi felezési idő napokban
+            recency_weight: A pontszám ekkora része függ a frissességtől (0-1)
+        """
+        self.index_file = Path(index_file)
+        self.k1 = k1
+        self.b = b
+        self.half_life = half_life_days * 86400
+        self.recency_weight = recency_weight
+        
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.doc_times: Dict[int, float] = {}
+        self.total_length = 0
+        self.posting_count = 0
+        self._pending: List[bytes] = []
+        self._lock = threading.RLock()
+    
+    @property
+    def doc_count(self) -> int:
+        return len(self.doc_lengths)
+    
+    def approx_bytes(self) -> int:
+        """Becsült memória használat (posting bejegyzések és dokumentum metaadatok)"""
+        return self.posting_count * 80 + len(self.postings) * 120 + len(self.doc_lengths) * 160
+    
+    def load(self):
+        """Index betöltése a fájlból (csonka utolsó sor eldobásával)"""
+        with self._lock:
+            self.postings = {}
+            self.doc_lengths = {}
+            self.doc_times = {}
+            self.total_length = 0
+            self.posting_count = 0
+            if not self.index_file.exists():
+                return
+            
+            valid_size = 0
+            try:
+                with open(self.index_file, 'rb') as f:
+                    for raw in f:
+                        if not raw.endswith(b"\n"):
+                            break
+                        try:
+                            record = json.loads(raw)
+                        except json.JSONDecodeError:
+                            break
+                        valid_size += len(raw)
+                        self._insert(record["id"], record["tf"], record["len"], record["ts"])
+                
+                if valid_size < self.index_file.stat().st_size:
+                    with open(self.index_file, 'r+b') as f:
+                        f.truncate(valid_size)
+            except Exception as e:
+                logger.error(f"Memory index read error: {e}")
+    
+    def _insert(self, doc_id: int, tf: Dict[str, int], length: int, ts: float):
+        for term, count in tf.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        self.doc_lengths[doc_id] = length
+        self.doc_times[doc_id] = ts
+        self.total_length += length
+        self.posting_count += len(tf)
+    
+    def add(self, doc_id: int, text: str, timestamp: Optional[str] = None):
+        """Dokumentum (üzenet) hozzáadása az indexhez"""
+        tokens = tokenize(text)
+        tf = dict(Counter(tokens))
+        try:
+            ts = datetime.fromisoformat(timestamp).timestamp() if timestamp else datetime.now().timestamp()
+        except ValueError:
+            ts = datetime.now().timestamp()
+        
+        record = {"id": doc_id, "len": len(tokens), "ts": ts, "tf": tf}
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                return
+            self._insert(doc_id, tf, len(tokens), ts)
+            self._pending.append(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+    
+    def flush(self, fsync: bool = False):
+        """Függő index rekordok kiírása"""
+        with self._lock:
+            if not self._pending:
+                return
+            lines, self._pending = self._pending, []
+            with open(self.index_file, 'ab') as f:
+                f.write(b"".join(lines))
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+    
+    def clear(self):
+        """Index törlése"""
+        with self._lock:
+            self.postings = {}
+            self.doc_lengths = {}
+            self.doc_times = {}
+            self.total_length = 0
+            self.posting_count = 0
+            self._pending = []
+            if self.index_file.exists():
+                self.index_file.unlink()
+    
+    def search(self, query: str, limit: int = 5, now: Optional[float] = None) -> List[Tuple[int, float]]:
+        """BM25 keresés frissességi súlyozással
+        
+        Returns:
+            [(doc_id, pontszám), ...] csökkenő pontszám szerint
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if not terms or not n_docs:
+                return []
+            avg_len = self.total_length / n_docs or 1.0
+            
+            term_postings = [(t, self.postings[t]) for t in terms if t in self.postings]
+            # Nagyon gyakori kifejezések (n_docs felében szereplő) kihagyása, ha van ritkább
+            rare = [(t, p) for t, p in term_postings if len(p) <= n_docs / 2]
+            if rare:
+                term_postings = rare
+            
+            scores: Dict[int, float] = {}
+            k1, b = self.k1, self.b
+            lengths = self.doc_lengths
+            for _, postings in term_postings:
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                norm = k1 * (1 - b)
+                scale = k1 * b / avg_len
+                for doc_id, tf in postings.items():
+                    score = idf * tf * (k1 + 1) / (tf + norm + scale * lengths[doc_id])
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+            
+            if not scores:
+                return []
+            
+            # Előszűrés: csak a legjobb jelöltekre számolunk frissességet
+            candidates = heapq.nlargest(limit * 4, scores.items(), key=lambda item: item[1])
+            
+            now = now or datetime.now().timestamp()
+            weight = self.recency_weight
+            ranked = []
+            for doc_id, score in candidates:
+                age = max(0.0, now - self.doc_times.get(doc_id, now))
+                decay = 0.5 ** (age / self.half_life) if self.half_life > 0 else 1.0
+                ranked.append((doc_id, score * ((1 - weight) + weight * decay)))
+        
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
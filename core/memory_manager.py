@@ -0,0 +1,270 @@
+"""
+Memory Manager - Felhasználónkénti, projektenkénti és munkamenetenkénti memóriák LRU pool-ja
+"""
+import re
+import uuid
+import hashlib
+import logging
+import weakref
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from core.conversation_memory import ConversationMemory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROJECT = "global"
+DEFAULT_SESSION = "default"
+
+MemoryKey = Tuple[str, str, str]
+
+
+def _safe_name(name: str) -> str:
+    """Fájlnévként biztonságos azonosító"""
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)[:64].strip(".")
+    return safe or "_"
+
+
+class MemoryManager:
+    """(felhasználó, projekt, munkamenet) memóriák lusta betöltése LRU gyorsítótárral
+    
+    A memóriák a <storage_dir>/<felhasználó>/<projekt>/<munkamenet>.jsonl naplókba kerülnek.
+    A RAM-ban tartott memóriák becsült mérete `max_bytes` alatt marad: a legrégebben használt
+    memóriát kivesszük a pool-ból, és a puffere egy háttér szálon íródik ki.
+    
+    Egy naplónak mindig egy író példánya van: a kivett memória gyenge referenciával megmarad,
+    és amíg egy kérés (vagy a kiírás) még használja, a get() ugyanezt a példányt adja vissza
+    újra betöltés helyett.
+    """
+    
+    def __init__(self, storage_dir: str = "./data/memory", max_bytes: int = 64 * 1024 * 1024,
+                 max_entries: int = 256, summarizer=None, **memory_options):
+        """
+        Args:
+            storage_dir: Memória gyökér könyvtár
+            max_bytes: A betöltött memóriák becsült összmérete (byte)
+            max_entries: Legfeljebb ennyi memória lehet betöltve
+            summarizer: MemorySummarizer, ami a betöltött memóriákat összefoglalja
+            memory_options: ConversationMemory paraméterek (pl. hot_window, fsync_policy)
+        """
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entries = max(max_entries, 1)
+        self.summarizer = summarizer
+        self.memory_options = memory_options
+        
+        self._memories: "OrderedDict[MemoryKey, ConversationMemory]" = OrderedDict()
+        self._closing: Dict[MemoryKey, Future] = {}
+        # A pool-ból kivett, de még élő (használatban lévő) példányok
+        self._detached: "weakref.WeakValueDictionary[MemoryKey, ConversationMemory]" = weakref.WeakValueDictionary()
+        self._loading: Dict[MemoryKey, Future] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-evict")
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._adopt_legacy()
+    
+    @staticmethod
+    def user_id(api_key: Optional[str]) -> str:
+        """Felhasználó azonosító az API kulcsból (a kulcs csak hash-elve kerül az útvonalba)"""
+        return hashlib.sha256(api_key.encode()).hexdigest()[:12] if api_key else "anon"
+    
+    def make_key(self, user: str, project: Optional[str] = None, session: Optional[str] = None) -> MemoryKey:
+        return (_safe_name(user), _safe_name(project or DEFAULT_PROJECT), _safe_name(session or DEFAULT_SESSION))
+    
+    def _memory_dir(self, key: MemoryKey) -> Path:
+        return self.storage_dir / key[0] / key[1]
+    
+    def _adopt_legacy(self):
+        """A régi globális memória (<storage_dir>/global.*) átköltöztetése az anonim alapértelmezett munkamenetbe"""
+        legacy = [self.storage_dir / f"{DEFAULT_PROJECT}{suffix}" for suffix in (".jsonl", ".index.jsonl", ".json")]
+        if not any(path.exists() for path in legacy):
+            return
+        target_dir = self._memory_dir(self.make_key("anon"))
+        if (target_dir / f"{DEFAULT_SESSION}.jsonl").exists():
+            return
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for path in legacy:
+            if path.exists():
+                path.replace(target_dir / path.name.replace(DEFAULT_PROJECT, DEFAULT_SESSION, 1))
+        logger.info(f"Global memory moved to {target_dir}")
+    
+    def get(self, user: str, project: Optional[str] = None, session: Optional[str] = None) -> ConversationMemory:
+        """Memória lekérése (szükség esetén betöltése)"""
+        key = self.make_key(user, project, session)
+        with self._lock:
+            memory = self._memories.get(key)
+            if memory is not None:
+                self._memories.move_to_end(key)
+                self.hits += 1
+                return memory
+            
+            memory = self._detached.pop(key, None)
+            if memory is not None:
+                # Kivett, de még élő példány: ugyanaz kerül vissza, nem nyílik második író
+                self._memories[key] = memory
+                self.hits += 1
+                if self.summarizer is not None:
+                    self.summarizer.register(memory)
+                self._evict(keep=key)
+                return memory
+            
+            loading = self._loading.get(key)
+            if loading is None:
+                self.misses += 1
+                loading = self._loading[key] = Future()
+                owner = True
+            else:
+                owner = False
+            closing = self._closing.get(key)
+        
+        if not owner:
+            # Egy másik kérés épp betölti ugyanezt a memóriát
+            return loading.result()
+        
+        # A betöltés a pool zárolása nélkül fut, hogy a többi felhasználót ne blokkolja
+        try:
+            # Ha épp kiírjuk (kilakoltatás), meg kell várni, különben a napló vége hiányozna
+            if closing is not None:
+                closing.result()
+            memory = ConversationMemory(project_name=key[2], storage_dir=str(self._memory_dir(key)),
+                                        **self.memory_options)
+        except Exception as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+        
+        with self._lock:
+            self._memories[key] = memory
+            del self._loading[key]
+            if self.summarizer is not None:
+                self.summarizer.register(memory)
+            self._evict(keep=key)
+        loading.set_result(memory)
+        return memory
+    
+    def _evict(self, keep: Optional[MemoryKey] = None):
+        """LRU kilakoltatás a byte és darabszám korlátig"""
+        with self._lock:
+            total = sum(memory.approx_bytes() for memory in self._memories.values())
+            for key in list(self._memories):
+                if total <= self.max_bytes and len(self._memories) <= self.max_entries:
+                    break
+                if key == keep:
+                    continue
+                memory = self._memories.pop(key)
+                total -= memory.approx_bytes()
+                self.evictions += 1
+                self._detached[key] = memory
+                self._close_async(key, memory)
+    
+    def _close_async(self, key: MemoryKey, memory: ConversationMemory):
+        future = self._executor.submit(memory.close)
+        self._closing[key] = future
+        
+        def done(_):
+            with self._lock:
+                if self._closing.get(key) is future:
+                    del self._closing[key]
+        
+        future.add_done_callback(done)
+    
+    def create_session(self, user: str, project: Optional[str] = None) -> str:
+        """Új (üres) munkamenet létrehozása
+        
+        Returns:
+            A munkamenet azonosítója
+        """
+        session = uuid.uuid4().hex
+        key = self.make_key(user, project, session)
+        memory_dir = self._memory_dir(key)
+        memory_dir.mkdir(parents=True, exist_ok=True)
+        (memory_dir / f"{key[2]}.jsonl").touch()
+        return session
+    
+    def session_project(self, user: str, session: str, preferred: Optional[str] = None) -> Optional[str]:
+        """A projekt, amelyikben a munkamenet létrejött (None, ha nincs ilyen munkamenet)
+        
+        A munkamenet a létrehozáskori projekthez tartozik, a később kiválasztott projekttől
+        függetlenül. Ha több projektben is van ilyen nevű (pl. "default"), a preferred nyer.
+        """
+        if preferred is not None and self.exists(user, preferred, session):
+            return self.make_key(user, preferred, session)[1]
+        user_key, _, session_key = self.make_key(user, None, session)
+        with self._lock:
+            for key in list(self._memories) + list(self._loading):
+                if key[0] == user_key and key[2] == session_key:
+                    return key[1]
+        matches = sorted((self.storage_dir / user_key).glob(f"*/{session_key}.jsonl"))
+        return matches[0].parent.name if matches else None
+    
+    def exists(self, user: str, project: Optional[str] = None, session: Optional[str] = None) -> bool:
+        """Létezik-e a munkamenet (betöltve vagy a lemezen)"""
+        key = self.make_key(user, project, session)
+        with self._lock:
+            if key in self._memories or key in self._loading:
+                return True
+        return (self._memory_dir(key) / f"{key[2]}.jsonl").exists()
+    
+    def delete(self, user: str, project: Optional[str] = None, session: Optional[str] = None):
+        """Munkamenet törlése (memória és index fájlok)"""
+        memory = self.get(user, project, session)
+        memory.clear()
+        key = self.make_key(user, project, session)
+        with self._lock:
+            if self._memories.pop(key, None) is not None:
+                self._detached[key] = memory
+    
+    def enforce_limits(self):
+        """Korlátok érvényesítése (pl. sok új üzenet után)"""
+        self._evict()
+    
+    def drop(self, user: str, project: Optional[str] = None, session: Optional[str] = None):
+        """Memória kivétele a pool-ból (kiírás után)"""
+        key = self.make_key(user, project, session)
+        with self._lock:
+            memory = self._memories.pop(key, None)
+            if memory is not None:
+                self._detached[key] = memory
+        if memory is not None:
+            memory.close()
+    
+    def flush_all(self):
+        """Az összes betöltött memória kiírása"""
+        with self._lock:
+            memories = list(self._memories.values())
+        for memory in memories:
+            memory.close()
+    
+    def get_stats(self) -> Dict:
+        """Pool statisztika"""
+        with self._lock:
+            loaded = [
+                {
+                    "user": key[0],
+                    "project": key[1],
+                    "session": key[2],
+                    "messages": memory.message_count,
+                    "approx_bytes": memory.approx_bytes()
+                }
+                for key, memory in self._memories.items()
+            ]
+            return {
+                "loaded": len(loaded),
+                "approx_bytes": sum(entry["approx_bytes"] for entry in loaded),
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "closing": len(self._closing),
+                "memories": loaded
+            }
@@ -0,0 +1,133 @@
+"""
+Memory Summarizer - Régi beszélgetés szakaszok gördülő összefoglalása üresjáratban
+"""
+import logging
+import threading
+import weakref
+from typing import Callable, Optional
+from datetime import datetime
+
+from core.conversation_memory import ConversationMemory, estimate_tokens
+from modules.prompt_builder import build_summary_prompt
+
+logger = logging.getLogger(__name__)
+
+
+class MemorySummarizer:
+    """A forró ablakon kívül eső üzeneteket LLM összefoglalóvá sűríti
+    
+    Minden kör az eddigi összefoglalót és a következő összefoglalatlan szakaszt adja a
+    modellnek, az eredmény a memória új gördülő összefoglalója lesz.
+    """
+    
+    def __init__(self, llm_service, model: Optional[str] = None,
+                 keep_recent: int = 20, min_span: int = 20,
+                 input_tokens: int = 600, max_summary_tokens: int = 300,
+                 max_message_chars: int = 800,
+                 is_idle: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            llm_service: LLM szolgáltatás
+            model: Összefoglaló modell (None = alapértelmezett)
+            keep_recent: Ennyi legutóbbi üzenet szó szerint marad
+            min_span: Legalább ennyi összefoglalatlan üzenet esetén dolgozik
+            input_tokens: Egy körben ennyi token üzenetet ad a modellnek
+            max_summary_tokens: Az összefoglaló maximális hossza tokenben
+            max_message_chars: Az egyes üzenetek vágási hossza a promptban
+            is_idle: Üresjárat ellenőrző függvény (None = mindig dolgozhat)
+        """
+        self.llm = llm_service
+        self.model = model
+        self.keep_recent = keep_recent
+        self.min_span = min_span
+        self.input_tokens = input_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.max_message_chars = max_message_chars
+        self.is_idle = is_idle or (lambda: True)
+        
+        self.summarized_total = 0
+        self.last_run: Optional[str] = None
+        self._memories = weakref.WeakSet()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def register(self, memory: ConversationMemory):
+        """Memória felvétele az összefoglalandók közé"""
+        self._memories.add(memory)
+    
+    def summarize_once(self, memory: ConversationMemory) -> bool:
+        """Egy szakasz összefoglalása
+        
+        Returns:
+            True, ha új összefoglaló készült
+        """
+        span = memory.pending_summary_span(self.keep_recent, self.min_span)
+        if not span:
+            return False
+        start, end, epoch = span
+        
+        # A szakaszt a token budget-ig vesszük (legalább egy üzenetet)
+        messages = []
+        budget = self.input_tokens
+        for message in memory.read_messages(start, end):
+            content = message.get("content", "")
+            if len(content) > self.max_message_chars:
+                content = content[:self.max_message_chars] + "..."
+            cost = estimate_tokens(content)
+            if messages and cost > budget:
+                break
+            budget -= cost
+            messages.append({"role": message.get("role", "user"), "content": content})
+        
+        previous = memory.summary["text"] if memory.summary else None
+        prompt = build_summary_prompt(messages, previous)
+        text = self.llm.generate(prompt, model=self.model, temperature=0.2,
+                                 max_tokens=self.max_summary_tokens)
+        if not text or not text.strip():
+            return False
+        
+        return memory.add_summary(start + len(messages), text, epoch)
+    
+    def run_once(self, force: bool = False) -> int:
+        """Egy összefoglalási kör az összes regisztrált memórián
+        
+        Args:
+            force: Üresjárat ellenőrzés nélkül
+        
+        Returns:
+            Elkészült összefoglalók száma
+        """
+        done = 0
+        for memory in list(self._memories):
+            while not self._stop.is_set() and (force or self.is_idle()):
+                try:
+                    if not self.summarize_once(memory):
+                        break
+                except Exception as e:
+                    logger.warning(f"Memory summarization error ({memory.project_name}): {e}")
+                    break
+                done += 1
+        
+        self.summarized_total += done
+        self.last_run = datetime.now().isoformat()
+        if done:
+            logger.info(f"Memory summarization: {done} spans summarized")
+        return done
+    
+    def start(self, interval: int = 60):
+        """Háttér összefoglalás indítása (üresjáratban fut)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        
+        def loop():
+            while not self._stop.wait(interval):
+                if self.is_idle():
+                    self.run_once()
+        
+        self._thread = threading.Thread(target=loop, name="memory-summarizer", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Háttér összefoglalás leállítása"""
+        self._stop.set()
@@ -0,0 +1,82 @@
+"""
+Range Reader - Byte tartomány és sor ablak olvasás mmap-pel (nagy fájlokhoz)
+"""
+import mmap
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Ennyi byte-onként jegyezzük fel, hány sortörés van előtte
+CHECKPOINT_BYTES = 64 * 1024
+
+
+@dataclass
+class LineIndex:
+    """Ritka sor index: CHECKPOINT_BYTES-onként az addigi sortörések száma
+    
+    Egy sor kezdete a legközelebbi ellenőrzőponttól legfeljebb egy blokknyi kereséssel
+    megvan, az index mérete pedig a fájl méretének töredéke (GB-onként ~256 KB).
+    """
+    size: int
+    newlines: array
+    total_lines: int
+    
+    @classmethod
+    def build(cls, data, size: int) -> "LineIndex":
+        newlines = array('Q')
+        count = 0
+        for start in range(0, size, CHECKPOINT_BYTES):
+            newlines.append(count)
+            count += data[start:start + CHECKPOINT_BYTES].count(b"\n")
+        ends_with_newline = size and data[size - 1:size] == b"\n"
+        return cls(size, newlines, count + (0 if not size or ends_with_newline else 1))
+    
+    def line_offset(self, data, line: int) -> int:
+        """Az 1-től számozott sor kezdő byte pozíciója (a fájl mérete, ha a sor nem létezik)"""
+        if line <= 1:
+            return 0
+        if line > self.total_lines:
+            return self.size
+        wanted = line - 1
+        block = bisect_left(self.newlines, wanted) - 1
+        position = block * CHECKPOINT_BYTES - 1
+        for _ in range(wanted - self.newlines[block]):
+            position = data.find(b"\n", position + 1)
+        return position + 1
+
+
+def open_map(file) -> Optional[mmap.mmap]:
+    """Csak olvasható mmap (None üres fájlra, ami nem mappelhető)"""
+    if not file.seek(0, 2):
+        return None
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_bytes(data, size: int, offset: int, length: int) -> Dict:
+    """Byte tartomány (negatív offset = a fájl végétől)"""
+    start = max(size + offset, 0) if offset < 0 else min(offset, size)
+    end = min(start + max(length, 0), size)
+    return {"content": data[start:end].decode("utf-8", errors="ignore"),
+            "offset": start, "end_offset": end, "truncated": False}
+
+
+def read_lines(data, index: LineIndex, start_line: int, end_line: Optional[int], max_bytes: int) -> Dict:
+    """Sor ablak (1-től számozott, zárt; negatív start_line = az utolsó N sor)
+    
+    Ha az ablak nagyobb max_bytes-nál, az utolsó belefért sortörésnél vágódik.
+    """
+    if start_line < 0:
+        start_line = max(index.total_lines + start_line + 1, 1)
+    start_line = max(start_line, 1)
+    end_line = min(end_line if end_line is not None else index.total_lines, index.total_lines)
+    start = index.line_offset(data, start_line)
+    end = index.line_offset(data, end_line + 1) if end_line >= start_line else start
+    truncated = end - start > max_bytes
+    if truncated:
+        cut = data.rfind(b"\n", start, start + max_bytes)
+        end = cut + 1 if cut >= start else start + max_bytes
+        end_line = start_line + data[start:end].count(b"\n") - (0 if data[end - 1:end] != b"\n" else 1)
+    return {"content": data[start:end].decode("utf-8", errors="ignore"), "offset": start, "end_offset": end,
+            "start_line": start_line, "end_line": max(end_line, start_line - 1),
+            "total_lines": index.total_lines, "truncated": truncated}
@@ -0,0 +1,203 @@
+"""
+Read Cache - Fájl tartalom cache stat aláírás szerint (byte korlátos LRU)
+"""
+import os
+import time
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from core.range_reader import LineIndex
+
+# (mtime_ns, méret, inode): ha bármelyik változik, a bejegyzés elavult
+Signature = Tuple[int, int, int]
+
+# Az ennél frissebb mtime-ú fájlokat nem cache-eljük: ugyanabban az mtime tick-ben történő
+# újabb, azonos méretű írás különben észrevétlen maradna (mint a git "racy clean" esete)
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+def signature(stat: os.stat_result) -> Signature:
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def file_etag(stat: os.stat_result) -> str:
+    """HTTP ETag a stat aláírásból (a tartalom beolvasása nélkül)"""
+    return '"{:x}-{:x}-{:x}"'.format(*signature(stat))
+
+
+@dataclass
+class CachedFile:
+    """Egy fájl cache-elt olvasása (bináris fájlnál csak a döntés)"""
+    signature: Signature
+    is_text: bool
+    content: Optional[str] = None
+    line_count: int = 0
+    _line_offsets: Optional[array] = field(default=None, repr=False)
+    
+    @property
+    def cost(self) -> int:
+        """Becsült memória igény byte-ban (a sor pozíciókkal együtt, akkor is, ha még nem számolódtak)"""
+        return len(self.content or "") + 8 * self.line_count + 64
+    
+    @property
+    def line_offsets(self) -> array:
+        """A sorok kezdő (karakter) pozíciói a tartalomban (első használatkor számolódik)"""
+        if self._line_offsets is None:
+            offsets = array('L', [0]) if self.line_count else array('L')
+            content = self.content or ""
+            position = content.find("\n")
+            while position >= 0 and position + 1 < len(content):
+                offsets.append(position + 1)
+                position = content.find("\n", position + 1)
+            self._line_offsets = offsets
+        return self._line_offsets
+    
+    def lines(self, start: int, end: Optional[int] = None) -> str:
+        """A start..end (1-től számozott, zárt) sorok szövege"""
+        offsets = self.line_offsets
+        content = self.content or ""
+        if start > len(offsets):
+            return ""
+        begin = offsets[max(start, 1) - 1]
+        finish = offsets[end] if end is not None and end < len(offsets) else len(content)
+        return content[begin:finish]
+
+
+def count_lines(content: str) -> int:
+    """Sorok száma (a záró sortörés nem kezd új sort)"""
+    if not content:
+        return 0
+    return content.count("\n") + (0 if content.endswith("\n") else 1)
+
+
+class ReadCache:
+    """Fájl olvasások cache-e
+    
+    A kulcs az abszolút útvonal, a bejegyzés a stat aláíráshoz (mtime, méret, inode) kötött,
+    így változatlan fájl ismételt olvasása memóriából jön, módosított fájlé újra a lemezről.
+    A dekódolt szöveg mellett a szöveg/bináris döntés és a sor pozíciók is cache-eltek. A
+    teljes méret byte korlátos, a legrégebben használt bejegyzések esnek ki.
+    """
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_file_size: int = 4 * 1024 * 1024,
+                 max_line_indexes: int = 32):
+        """
+        Args:
+            max_bytes: A cache-elt tartalmak összmérete
+            max_file_size: Ennél nagyobb fájlokat nem cache-elünk
+            max_line_indexes: Ennyi nagy fájl (mmap) sor indexét tartjuk meg
+        """
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.max_line_indexes = max_line_indexes
+        self._entries: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._line_indexes: "OrderedDict[str, Tuple[Signature, LineIndex]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.cost
+            self.evictions += 1
+    
+    def read(self, path: str, is_text: Callable[[str], bool],
+             stat: Optional[os.stat_result] = None) -> CachedFile:
+        """Fájl olvasása cache-en keresztül
+        
+        Args:
+            path: Abszolút útvonal
+            is_text: Szöveg/bináris döntés (csak cache miss esetén hívódik)
+            stat: A fájl stat adatai, ha a hívónál már megvannak
+        
+        Raises:
+            OSError: Ha a fájl nem olvasható
+        """
+        stat = stat or os.stat(path)
+        key = signature(stat)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        
+        if is_text(path):
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            entry = CachedFile(key, True, content, count_lines(content))
+        else:
+            entry = CachedFile(key, False)
+        
+        if stat.st_size <= self.max_file_size and time.time_ns() - stat.st_mtime_ns > RACY_WINDOW_NS:
+            with self._lock:
+                old = self._entries.pop(path, None)
+                if old is not None:
+                    self._bytes -= old.cost
+                self._entries[path] = entry
+                self._bytes += entry.cost
+                self._evict()
+        return entry
+    
+    def line_index(self, path: str, stat: os.stat_result, data) -> LineIndex:
+        """A fájl byte alapú sor indexe (sor ablak olvasáshoz), stat aláírás szerint cache-elve
+        
+        Args:
+            path: Abszolút útvonal
+            stat: A megnyitott fájl stat adatai
+            data: A fájl tartalma (mmap), ha az indexet fel kell építeni
+        """
+        key = signature(stat)
+        with self._lock:
+            cached = self._line_indexes.get(path)
+            if cached is not None and cached[0] == key:
+                self._line_indexes.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        
+        index = LineIndex.build(data, stat.st_size)
+        if time.time_ns() - stat.st_mtime_ns > RACY_WINDOW_NS:
+            with self._lock:
+                self._line_indexes[path] = (key, index)
+                self._line_indexes.move_to_end(path)
+                while len(self._line_indexes) > self.max_line_indexes:
+                    self._line_indexes.popitem(last=False)
+        return index
+    
+    def invalidate(self, path: str):
+        """Bejegyzés eldobása (írás, törlés után)"""
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry.cost
+            self._line_indexes.pop(path, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._line_indexes.clear()
+            self._bytes = 0
+    
+    def get_stats(self) -> Dict:
+        """Cache statisztika"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "line_indexes": len(self._line_indexes),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
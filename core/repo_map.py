@@ -0,0 +1,273 @@
+"""
+Repo Map - Rangsorolt repository térkép (PageRank az import és szimbólum gráfon)
+"""
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.file_index import FileIndex, Changes
+from core.import_graph import ImportGraph
+from core.symbol_index import SymbolIndex, Symbol
+from core.conversation_memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_]\w{2,}")
+# Csupa kisbetűs, egy szavas nevek (get, load, clear): gyakran a standard könyvtár azonos nevű metódusai
+GENERIC_NAME = re.compile(r"[a-z]+\Z")
+
+
+class RepoMap:
+    """Tömör, token budget-be illesztett kódbázis áttekintés
+    
+    A fájlok gráfjában él megy az importált fájlhoz és ahhoz a fájlhoz, amelyik egy
+    hivatkozott nevet definiál. A PageRank pontszám a hivatkozásokon keresztül a definíciókra
+    is szétoszlik, és a legfontosabb definíciók szignatúráiból készül a térkép (a többi
+    elhagyva). Az eredmény workspace revíziónként gyorsítótárazott; változáskor a fájlonkénti
+    hivatkozások csak a változott fájlokra számolódnak újra, a PageRank pedig az előző
+    pontszámokból indul.
+    """
+    
+    def __init__(self, file_index: FileIndex, import_graph: ImportGraph, symbol_index: SymbolIndex,
+                 max_definers: int = 10, damping: float = 0.85, cache_size: int = 32):
+        """
+        Args:
+            file_index: Projekt fájl index
+            import_graph: Import gráf
+            symbol_index: Szimbólum tábla
+            max_definers: Az ennél több fájlban definiált neveket (pl. get, __init__) kihagyjuk
+            damping: PageRank csillapítás
+            cache_size: Ennyi elkészült térképet tartunk meg
+        """
+        self.file_index = file_index
+        self.import_graph = import_graph
+        self.symbol_index = symbol_index
+        self.max_definers = max_definers
+        self.damping = damping
+        self.cache_size = cache_size
+        
+        self.revision = 0
+        # fájl -> (tartalom hash, hivatkozott azonosítók)
+        self._references: Dict[str, Tuple[Optional[str], Set[str]]] = {}
+        self._ranks: Dict[str, float] = {}
+        self._ranked: Dict[Tuple, Tuple[int, Dict[str, float], List[Tuple[float, Symbol]]]] = {}
+        self._maps: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.RLock()
+        
+        self.computations = 0
+        self.cache_hits = 0
+        
+        # Az indexek után iratkozunk fel, így a revízió csak a frissítésük után lép
+        file_index.subscribe(self._on_changes)
+    
+    def _on_changes(self, changes: Changes):
+        with self._lock:
+            for path in changes.get("removed", []):
+                self._references.pop(path, None)
+            self.revision += 1
+            self._maps.clear()
+            self._ranked.clear()
+    
+    def _file_references(self, path: str) -> Set[str]:
+        """A fájlban előforduló azonosítók (tartalom hash szerint gyorsítótárazva)"""
+        entry = self.file_index.get(path)
+        digest = entry.hash if entry else None
+        cached = self._references.get(path)
+        if cached is not None and cached[0] == digest and digest:
+            return cached[1]
+        content = self.file_index.read_text(path) or ""
+        identifiers = set(IDENTIFIER_PATTERN.findall(content))
+        self._references[path] = (digest, identifiers)
+        return identifiers
+    
+    def _graph(self, symbols: Dict[str, List[Symbol]]):
+        """Súlyozott élek (forrás -> {cél: súly}) és a nevek szerinti hivatkozások"""
+        definers: Dict[str, Set[str]] = {}
+        for path, file_symbols in symbols.items():
+            for symbol in file_symbols:
+                definers.setdefault(symbol.name, set()).add(path)
+        definers = {name: paths for name, paths in definers.items() if len(paths) <= self.max_definers}
+        
+        edges: Dict[str, Dict[str, float]] = {}
+        # (hivatkozó, definiáló, név, súly)
+        references: List[Tuple[str, str, str, float]] = []
+        for path in symbols:
+            targets = edges.setdefault(path, {})
+            for name in self._file_references(path) & definers.keys():
+                paths = definers[name]
+                # Privát és általános nevek gyengébb jelzést adnak, a többször definiált nevek súlya megoszlik
+                weight = (0.1 if name.startswith("_") or GENERIC_NAME.match(name) else 1.0) / len(paths)
+                for target in paths:
+                    if target != path:
+                        targets[target] = targets.get(target, 0.0) + weight
+                        references.append((path, target, name, weight))
+        for path, imported in self.import_graph.edges().items():
+            targets = edges.setdefault(path, {})
+            for target in imported:
+                targets[target] = targets.get(target, 0.0) + 1.0
+        return edges, references
+    
+    def _pagerank(self, nodes: List[str], edges: Dict[str, Dict[str, float]],
+                  personalization: Optional[Dict[str, float]] = None,
+                  max_iterations: int = 50, tolerance: float = 1e-6) -> Dict[str, float]:
+        """Súlyozott PageRank hatványiterációval (az előző pontszámokból indul)"""
+        count = len(nodes)
+        if not count:
+            return {}
+        if personalization:
+            total = sum(personalization.values())
+            teleport = {node: personalization.get(node, 0.0) / total for node in nodes}
+        else:
+            teleport = {node: 1.0 / count for node in nodes}
+        
+        previous_total = sum(self._ranks.get(node, 0.0) for node in nodes)
+        if previous_total > 0 and not personalization:
+            rank = {node: self._ranks.get(node, 0.0) / previous_total for node in nodes}
+        else:
+            rank = dict(teleport)
+        out_weight = {node: sum(edges.get(node, {}).values()) for node in nodes}
+        
+        for _ in range(max_iterations):
+            dangling = sum(rank[node] for node in nodes if not out_weight[node])
+            new_rank = {node: (1 - self.damping + self.damping * dangling) * teleport[node] for node in nodes}
+            for node in nodes:
+                weight = out_weight[node]
+                if not weight:
+                    continue
+                share = self.damping * rank[node] / weight
+                for target, edge_weight in edges[node].items():
+                    if target in new_rank:
+                        new_rank[target] += share * edge_weight
+            delta = sum(abs(new_rank[node] - rank[node]) for node in nodes)
+            rank = new_rank
+            if delta < tolerance:
+                break
+        return rank
+    
+    def rank(self, focus: Iterable[str] = ()) -> Tuple[Dict[str, float], List[Tuple[float, Symbol]]]:
+        """Fájl pontszámok és pontszám szerint rendezett definíciók
+        
+        Args:
+            focus: Kiemelt fájlok (pl. a szerkesztett fájl); a PageRank ezekről indul újra
+        """
+        focus_key = tuple(sorted(set(focus)))
+        with self._lock:
+            cached = self._ranked.get(focus_key)
+            if cached is not None and cached[0] == self.revision:
+                return cached[1], cached[2]
+            revision = self.revision
+            
+            symbols = self.symbol_index.all_symbols()
+            edges, references = self._graph(symbols)
+            nodes = sorted(set(symbols) | set(edges) | {t for targets in edges.values() for t in targets})
+            personalization = {path: 1.0 for path in focus_key if path in nodes} or None
+            file_ranks = self._pagerank(nodes, edges, personalization)
+            if personalization is None:
+                self._ranks = file_ranks
+            
+            # A fájl pontszáma a kimenő élek arányában a hivatkozott definíciókra jut
+            out_weight = {node: sum(edges.get(node, {}).values()) for node in nodes}
+            by_name: Dict[Tuple[str, str], float] = {}
+            for source, target, name, weight in references:
+                by_name[(target, name)] = by_name.get((target, name), 0.0) + \
+                    file_ranks.get(source, 0.0) * weight / out_weight[source]
+            
+            definitions = []
+            for path, file_symbols in symbols.items():
+                base = file_ranks.get(path, 0.0)
+                for symbol in file_symbols:
+                    # Hivatkozás nélkül is kap egy kis részt a fájl pontszámából (osztályok előnyben)
+                    score = by_name.get((path, symbol.name), 0.0) + base * (0.02 if symbol.kind == "class" else 0.01)
+                    if path in focus_key:
+                        score *= 2
+                    definitions.append((score, symbol))
+            definitions.sort(key=lambda item: (-item[0], item[1].path, item[1].start_line))
+            
+            self._ranked[focus_key] = (revision, file_ranks, definitions)
+            self.computations += 1
+            return file_ranks, definitions
+    
+    def _signature(self, symbol: Symbol, lines: List[str]) -> str:
+        """A definíció első (a nevet tartalmazó) sora"""
+        for number in range(symbol.start_line, min(symbol.start_line + 4, symbol.end_line + 1)):
+            if number - 1 < len(lines) and symbol.name in lines[number - 1]:
+                return lines[number - 1].rstrip()[:160]
+        return lines[symbol.start_line - 1].rstrip()[:160] if symbol.start_line - 1 < len(lines) else symbol.qualname
+    
+    def _render(self, selected: List[Symbol], file_ranks: Dict[str, float],
+                contents: Dict[str, List[str]]) -> str:
+        by_file: Dict[str, List[Symbol]] = {}
+        for symbol in selected:
+            by_file.setdefault(symbol.path, []).append(symbol)
+        parts = []
+        for path in sorted(by_file, key=lambda p: (-file_ranks.get(p, 0.0), p)):
+            if path not in contents:
+                contents[path] = (self.file_index.read_text(path) or "").splitlines()
+            lines = contents[path]
+            parts.append(f"{path}:")
+            previous_end = 0
+            for symbol in sorted(by_file[path], key=lambda s: s.start_line):
+                if symbol.start_line > previous_end + 1:
+                    parts.append("⋮")
+                parts.append(self._signature(symbol, lines))
+                previous_end = max(previous_end, symbol.start_line)
+            if previous_end < len(lines):
+                parts.append("⋮")
+        return "\n".join(parts)
+    
+    def get_map(self, max_tokens: int = 1024, focus: Iterable[str] = ()) -> Dict:
+        """Repository térkép a token budget-en belül
+        
+        Returns:
+            {"map": szöveg, "tokens", "files", "symbols", "revision"}
+        """
+        focus = tuple(sorted(set(focus)))
+        key = (max_tokens, focus)
+        with self._lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached["revision"] == self.revision:
+                self._maps.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+            revision = self.revision
+        
+        file_ranks, definitions = self.rank(focus)
+        ordered = [symbol for _, symbol in definitions]
+        contents: Dict[str, List[str]] = {}
+        
+        # A legtöbb definíció, ami még belefér (bináris keresés a darabszámra)
+        low, high = 0, len(ordered)
+        best, count = "", 0
+        while low <= high:
+            middle = (low + high) // 2
+            text = self._render(ordered[:middle], file_ranks, contents)
+            if estimate_tokens(text) <= max_tokens:
+                best, count, low = text, middle, middle + 1
+            else:
+                high = middle - 1
+        
+        result = {
+            "map": best,
+            "tokens": estimate_tokens(best) if best else 0,
+            "files": len({symbol.path for symbol in ordered[:count]}),
+            "symbols": count,
+            "revision": revision
+        }
+        with self._lock:
+            self._maps[key] = result
+            while len(self._maps) > self.cache_size:
+                self._maps.popitem(last=False)
+        return result
+    
+    def get_stats(self) -> Dict:
+        """Térkép statisztika"""
+        with self._lock:
+            return {
+                "revision": self.revision,
+                "ranked_files": len(self._ranks),
+                "cached_maps": len(self._maps),
+                "computations": self.computations,
+                "cache_hits": self.cache_hits
+            }
@@ -4,113 +4,602 @@ Response Cache - Válasz cache kezelés
 import json
 import hashlib
 import os
+import re
+import shutil
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncGenerator, Callable, Tuple
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_NAMESPACE = "global"
+
+
+@dataclass
+class CacheNamespace:
+    """Cache partíció (projekt + API kulcs) saját kvótával és statisztikával"""
+    name: str
+    dir_name: str
+    generation: int = 0
+    memory_quota: int = 8 * 1024 * 1024  # byte
+    disk_quota: int = 64 * 1024 * 1024  # byte
+    memory: "OrderedDict[str, Dict[str, Any]]" = field(default_factory=OrderedDict)
+    memory_bytes: int = 0
+    # Lemezen lévő bejegyzések (fájlnév -> méret), LRU sorrendben; lustán töltődik be
+    disk: Optional["OrderedDict[str, int]"] = None
+    disk_bytes: int = 0
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Partíció statisztika"""
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.name,
+            "generation": self.generation,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "memory_quota": self.memory_quota,
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+            "disk_bytes": self.disk_bytes if self.disk is not None else None,
+            "disk_quota": self.disk_quota,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
 
 class ResponseCache:
-    """Válasz cache kezelője"""
+    """Válasz cache kezelője (névterek, stale-while-revalidate, modell digest alapú érvénytelenítés)"""
     
-    def __init__(self, cache_dir: str = "./data/cache", ttl: int = 1800):
+    def __init__(self, cache_dir: str = "./data/cache", ttl: int = 1800,
+                 stale_ttl: int = 86400,
+                 digest_provider: Optional[Callable[[Optional[str]], Optional[str]]] = None,
+                 revalidate_workers: int = 1,
+                 namespace_memory_quota: int = 8 * 1024 * 1024,
+                 namespace_disk_quota: int = 64 * 1024 * 1024,
+                 max_namespace_memory_quota: int = 64 * 1024 * 1024,
+                 max_namespace_disk_quota: int = 512 * 1024 * 1024):
         """
         Args:
             cache_dir: Cache könyvtár
-            ttl: Time to live másodpercekben (alapértelmezett 30 perc)
+            ttl: Time to live másodpercekben (alapértelmezett 30 perc), eddig friss a bejegyzés
+            stale_ttl: Ennyi ideig szolgálható ki lejárt (stale) bejegyzés a ttl után,
+                miközben a háttérben újragenerálódik
+            digest_provider: Modell név -> Ollama digest (a bejegyzések ehhez kötődnek)
+            revalidate_workers: Egyidejű háttér újragenerálások maximális száma (CPU-s
+                inferenciánál egy is a teljes gépet terheli)
+            namespace_memory_quota: Alapértelmezett memória kvóta névterenként (byte)
+            namespace_disk_quota: Alapértelmezett lemez kvóta névterenként (byte)
+            max_namespace_memory_quota: A set_quota()-val beállítható memória kvóta felső korlátja
+            max_namespace_disk_quota: A set_quota()-val beállítható lemez kvóta felső korlátja
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.ttl = ttl
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
+        self.stale_ttl = stale_ttl
+        self.digest_provider = digest_provider
+        self.namespace_memory_quota = namespace_memory_quota
+        self.namespace_disk_quota = namespace_disk_quota
+        self.max_namespace_memory_quota = max_namespace_memory_quota
+        self.max_namespace_disk_quota = max_namespace_disk_quota
         
-        # Memory cache limit (100 item)
-        self.memory_cache_limit = 100
+        # Névterek (projekt:kulcs -> partíció), generáció számmal az O(1) érvénytelenítéshez
+        self._namespaces_file = self.cache_dir / "namespaces.meta"
+        self.namespaces: Dict[str, CacheNamespace] = {}
+        self._load_namespaces()
+        
+        # Ismert modell digestek (modell -> digest), változáskor tömeges érvénytelenítés
+        self._digests_file = self.cache_dir / "model_digests.meta"
+        self._model_digests: Dict[str, str] = self._load_digests()
+        
+        # Háttér újragenerálás (concurrency budget)
+        self.revalidate_workers = revalidate_workers
+        self._revalidate_executor = ThreadPoolExecutor(
+            max_workers=max(1, revalidate_workers),
+            thread_name_prefix="cache-revalidate"
+        )
+        self._revalidating: set = set()
+        self._lock = threading.RLock()
+        
+        self._purge_legacy_files()
+    
+    @staticmethod
+    def messages_to_prompt(messages: List[Dict[str, str]]) -> str:
+        """Teljes chat előzmény cache prompttá alakítása (stream endpointhoz)"""
+        return json.dumps(
+            [{"role": m.get("role", ""), "content": m.get("content", "")} for m in messages],
+            ensure_ascii=False
+        )
+    
+    @staticmethod
+    def make_namespace(project: Optional[str] = None, api_key: Optional[str] = None) -> str:
+        """Névtér azonosító projektből és API kulcsból (a kulcs csak hash-elve kerül bele)"""
+        key_part = hashlib.sha256(api_key.encode()).hexdigest()[:12] if api_key else "anon"
+        return f"{project or DEFAULT_NAMESPACE}:{key_part}"
     
-    def _generate_key(self, prompt: str, model: Optional[str], temperature: float) -> str:
+    def _generate_key(self, prompt: str, model: Optional[str], temperature: float,
+                      digest: Optional[str] = None) -> str:
         """Cache kulcs generálása"""
-        key_string = f"{prompt}:{model}:{temperature}"
+        key_string = f"{prompt}:{model}:{temperature}:{digest or ''}"
         return hashlib.md5(key_string.encode()).hexdigest()
     
-    def get(self, prompt: str, model: Optional[str] = None, temperature: float = 0.5) -> Optional[str]:
-        """Cache-ből kiolvasás"""
-        cache_key = self._generate_key(prompt, model, temperature)
+    @staticmethod
+    def _digest_tag(digest: Optional[str]) -> str:
+        """Fájlnév prefix a digesthez (tömeges törléshez)"""
+        if not digest:
+            return "nodigest"
+        return digest.split(":")[-1][:12]
+    
+    def _purge_legacy_files(self):
+        """A korábbi, névtér nélküli formátum (<cache_dir>/[<digest>_]<kulcs>.json) fájljainak törlése
+        
+        Ezek kulcsa névtér nélküli, így a mostani kulcsokkal nem érhetők el; a törlés a
+        háttérben fut, hogy az indulást ne lassítsa.
+        """
+        legacy = [path for path in self.cache_dir.glob("*.json") if path.is_file()]
+        if not legacy:
+            return
+        
+        def purge():
+            removed = 0
+            for path in legacy:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+            logger.info(f"Cache: {removed} legacy cache files removed")
+        
+        threading.Thread(target=purge, name="cache-legacy-purge", daemon=True).start()
+    
+    # --- Névterek ---
+    
+    def _load_namespaces(self):
+        """Névtér metaadatok (generáció, kvóták) betöltése"""
+        if not self._namespaces_file.exists():
+            return
+        try:
+            with open(self._namespaces_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for name, info in data.items():
+                self.namespaces[name] = CacheNamespace(
+                    name=name,
+                    dir_name=info["dir_name"],
+                    generation=info.get("generation", 0),
+                    memory_quota=info.get("memory_quota", self.namespace_memory_quota),
+                    disk_quota=info.get("disk_quota", self.namespace_disk_quota)
+                )
+        except Exception as e:
+            logger.warning(f"Cache namespace file read error: {e}")
+    
+    def _save_namespaces(self):
+        """Névtér metaadatok mentése"""
+        data = {
+            ns.name: {
+                "dir_name": ns.dir_name,
+                "generation": ns.generation,
+                "memory_quota": ns.memory_quota,
+                "disk_quota": ns.disk_quota
+            }
+            for ns in self.namespaces.values()
+        }
+        try:
+            with open(self._namespaces_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"Cache namespace file write error: {e}")
+    
+    def _namespace(self, name: Optional[str]) -> CacheNamespace:
+        """Névtér lekérése vagy létrehozása"""
+        name = name or DEFAULT_NAMESPACE
+        ns = self.namespaces.get(name)
+        if ns is None:
+            with self._lock:
+                ns = self.namespaces.get(name)
+                if ns is None:
+                    ns = CacheNamespace(
+                        name=name,
+                        dir_name=hashlib.md5(name.encode()).hexdigest()[:16],
+                        memory_quota=self.namespace_memory_quota,
+                        disk_quota=self.namespace_disk_quota
+                    )
+                    self.namespaces[name] = ns
+                    self._save_namespaces()
+        return ns
+    
+    def _generation_dir(self, ns: CacheNamespace) -> Path:
+        """A névtér aktuális generációjának könyvtára"""
+        return self.cache_dir / ns.dir_name / f"g{ns.generation}"
+    
+    def _load_disk_index(self, ns: CacheNamespace):
+        """A névtér lemezen lévő bejegyzéseinek felmérése (első használatkor)"""
+        if ns.disk is not None:
+            return
+        entries = []
+        gen_dir = self._generation_dir(ns)
+        if gen_dir.exists():
+            with os.scandir(gen_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, entry.name, st.st_size))
+        entries.sort()
+        ns.disk = OrderedDict((name, size) for _, name, size in entries)
+        ns.disk_bytes = sum(size for _, _, size in entries)
+    
+    def set_quota(self, namespace: str, memory_quota: Optional[int] = None,
+                  disk_quota: Optional[int] = None) -> Dict[str, Any]:
+        """Névtér kvóták beállítása (byte, a szerver oldali felső korlátokra vágva)"""
+        ns = self._namespace(namespace)
+        with self._lock:
+            if memory_quota is not None:
+                ns.memory_quota = min(memory_quota, self.max_namespace_memory_quota)
+            if disk_quota is not None:
+                ns.disk_quota = min(disk_quota, self.max_namespace_disk_quota)
+                self._load_disk_index(ns)
+            self._enforce_memory_quota(ns)
+            self._enforce_disk_quota(ns)
+            self._save_namespaces()
+        return ns.stats()
+    
+    def invalidate_namespace(self, namespace: str) -> Dict[str, Any]:
+        """Névtér érvénytelenítése O(1) időben
+        
+        A generáció szám növelésével a régi bejegyzések elérhetetlenné válnak,
+        a régi fájlok törlése a háttérben történik.
+        """
+        ns = self._namespace(namespace)
+        with self._lock:
+            old_dir = self._generation_dir(ns)
+            ns.generation += 1
+            ns.memory = OrderedDict()
+            ns.memory_bytes = 0
+            ns.disk = OrderedDict()
+            ns.disk_bytes = 0
+            self._save_namespaces()
+        if old_dir.exists():
+            threading.Thread(target=shutil.rmtree, args=(old_dir,),
+                             kwargs={"ignore_errors": True}, daemon=True).start()
+        return ns.stats()
+    
+    def get_stats(self, namespace: Optional[str] = None) -> Any:
+        """Névterenkénti statisztika (vagy egy névtéré)"""
+        if namespace is not None:
+            ns = self._namespace(namespace)
+            with self._lock:
+                return ns.stats()
+        with self._lock:
+            return [ns.stats() for ns in self.namespaces.values()]
+    
+    # --- Modell digestek ---
+    
+    def _load_digests(self) -> Dict[str, str]:
+        """Ismert modell digestek betöltése"""
+        if self._digests_file.exists():
+            try:
+                with open(self._digests_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"Cache digest file read error: {e}")
+        return {}
+    
+    def _save_digests(self):
+        """Ismert modell digestek mentése (pillanatkép a zár alatt, atomikus cserével)"""
+        try:
+            with self._lock:
+                snapshot = dict(self._model_digests)
+                temp_file = self._digests_file.with_suffix(".meta.tmp")
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f)
+                temp_file.replace(self._digests_file)
+        except Exception as e:
+            logger.warning(f"Cache digest file write error: {e}")
+    
+    def _current_digest(self, model: Optional[str]) -> Optional[str]:
+        """Modell aktuális digestje; ha megváltozott (pl. ollama pull), a régi bejegyzések törlése"""
+        if not self.digest_provider:
+            return None
+        try:
+            digest = self.digest_provider(model)
+        except Exception as e:
+            logger.warning(f"Cache digest lookup error: {e}")
+            return None
+        if not digest:
+            return None
+        
+        model_name = model or ""
+        with self._lock:
+            previous = self._model_digests.get(model_name)
+            if previous == digest:
+                return digest
+            self._model_digests[model_name] = digest
+            self._save_digests()
+            stale = bool(previous) and previous not in self._model_digests.values()
+        if stale:
+            removed = self.invalidate_digest(previous)
+            logger.info(f"Model digest changed for '{model_name}', {removed} cache entries invalidated")
+        return digest
+    
+    def refresh_digests(self) -> int:
+        """Összes ismert modell digestjének újraellenőrzése (elavult bejegyzések tömeges törlése)
+        
+        Returns:
+            Ellenőrzött modellek száma
+        """
+        with self._lock:
+            models = list(self._model_digests.keys())
+        for model_name in models:
+            self._current_digest(model_name or None)
+        return len(models)
+    
+    def invalidate_digest(self, digest: str) -> int:
+        """Egy modell digesthez tartozó összes bejegyzés törlése (minden névtérben)
+        
+        Returns:
+            Törölt fájl bejegyzések száma
+        """
+        tag = self._digest_tag(digest)
+        removed = 0
+        with self._lock:
+            for ns in self.namespaces.values():
+                for key in [k for k, item in ns.memory.items() if item.get("digest") == digest]:
+                    self._drop_memory(ns, key)
+                gen_dir = self._generation_dir(ns)
+                if not gen_dir.exists():
+                    continue
+                try:
+                    for cache_file in gen_dir.glob(f"{tag}_*.json"):
+                        cache_file.unlink()
+                        removed += 1
+                        if ns.disk is not None and cache_file.name in ns.disk:
+                            ns.disk_bytes -= ns.disk.pop(cache_file.name)
+                except Exception as e:
+                    logger.warning(f"Cache invalidate error: {e}")
+        return removed
+    
+    # --- Olvasás / írás ---
+    
+    def lookup(self, prompt: str, model: Optional[str] = None,
+               temperature: float = 0.5,
+               namespace: Optional[str] = None,
+               count: bool = True) -> Tuple[Optional[str], bool]:
+        """Cache-ből kiolvasás állapottal
+        
+        Args:
+            count: Számít-e a találati statisztikába (a belső ellenőrzések, pl. a cache
+                melegítés próbái nem)
+        
+        Returns:
+            (érték, stale) - stale=True esetén a bejegyzés lejárt, de még kiszolgálható;
+            a hívónak érdemes revalidate()-et hívnia
+        """
+        ns = self._namespace(namespace)
+        digest = self._current_digest(model)
+        cache_key = self._generate_key(prompt, model, temperature, digest)
+        now = datetime.now()
         
         # Memory cache ellenőrzés
-        if cache_key in self.memory_cache:
-            item = self.memory_cache[cache_key]
-            if datetime.now() < item["expires"]:
-                return item["value"]
-            else:
-                del self.memory_cache[cache_key]
+        with self._lock:
+            item = ns.memory.get(cache_key)
+            if item is not None:
+                if now < item["stale_expires"]:
+                    ns.memory.move_to_end(cache_key)
+                    return self._hit(ns, item["value"], now >= item["expires"], count)
+                self._drop_memory(ns, cache_key)
         
         # File cache ellenőrzés
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        file_name = f"{self._digest_tag(digest)}_{cache_key}.json"
+        cache_file = self._generation_dir(ns) / file_name
         if cache_file.exists():
             try:
                 with open(cache_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                 
                 expires = datetime.fromisoformat(data["expires"])
-                if datetime.now() < expires:
+                stale_expires = datetime.fromisoformat(data.get("stale_expires", data["expires"]))
+                if now < stale_expires:
                     # Betöltés memory cache-be
-                    self._add_to_memory_cache(cache_key, data["value"], expires)
-                    return data["value"]
+                    with self._lock:
+                        self._add_to_memory_cache(ns, cache_key, data["value"], expires, stale_expires, digest)
+                        if ns.disk is not None and file_name in ns.disk:
+                            ns.disk.move_to_end(file_name)
+                        return self._hit(ns, data["value"], now >= expires, count)
                 else:
                     # Lejárt, töröljük
                     cache_file.unlink()
+                    with self._lock:
+                        if ns.disk is not None and file_name in ns.disk:
+                            ns.disk_bytes -= ns.disk.pop(file_name)
             except Exception as e:
                 logger.warning(f"Cache file read error: {e}")
         
-        return None
+        if count:
+            with self._lock:
+                ns.misses += 1
+        return None, False
+    
+    @staticmethod
+    def _hit(ns: CacheNamespace, value: str, stale: bool, count: bool = True) -> Tuple[str, bool]:
+        """Találat (a hívó tartja a zárat)"""
+        if count:
+            ns.hits += 1
+            if stale:
+                ns.stale_hits += 1
+        return value, stale
+    
+    def get(self, prompt: str, model: Optional[str] = None, temperature: float = 0.5,
+            namespace: Optional[str] = None) -> Optional[str]:
+        """Cache-ből kiolvasás (friss vagy stale érték)"""
+        value, _ = self.lookup(prompt, model, temperature, namespace)
+        return value
+    
+    def contains(self, prompt: str, model: Optional[str] = None, temperature: float = 0.5,
+                 namespace: Optional[str] = None) -> bool:
+        """Van-e (friss vagy stale) bejegyzés; a statisztikába nem számít"""
+        value, _ = self.lookup(prompt, model, temperature, namespace, count=False)
+        return value is not None
     
-    def set(self, prompt: str, value: str, model: Optional[str] = None, temperature: float = 0.5):
+    def set(self, prompt: str, value: str, model: Optional[str] = None, temperature: float = 0.5,
+            namespace: Optional[str] = None):
         """Cache-be mentés"""
-        cache_key = self._generate_key(prompt, model, temperature)
-        expires = datetime.now() + timedelta(seconds=self.ttl)
+        ns = self._namespace(namespace)
+        digest = self._current_digest(model)
+        cache_key = self._generate_key(prompt, model, temperature, digest)
+        now = datetime.now()
+        expires = now + timedelta(seconds=self.ttl)
+        stale_expires = expires + timedelta(seconds=self.stale_ttl)
         
         # Memory cache-be mentés
-        self._add_to_memory_cache(cache_key, value, expires)
+        with self._lock:
+            self._add_to_memory_cache(ns, cache_key, value, expires, stale_expires, digest)
         
         # File cache-be mentés
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        file_name = f"{self._digest_tag(digest)}_{cache_key}.json"
+        gen_dir = self._generation_dir(ns)
         try:
             data = {
                 "value": value,
                 "expires": expires.isoformat(),
-                "created": datetime.now().isoformat(),
+                "stale_expires": stale_expires.isoformat(),
+                "created": now.isoformat(),
+                "model": model,
+                "digest": digest,
+                "namespace": ns.name,
                 "prompt_hash": cache_key
             }
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+            gen_dir.mkdir(parents=True, exist_ok=True)
+            with open(gen_dir / file_name, 'wb') as f:
+                f.write(payload)
+            
+            with self._lock:
+                self._load_disk_index(ns)
+                if file_name in ns.disk:
+                    ns.disk_bytes -= ns.disk.pop(file_name)
+                ns.disk[file_name] = len(payload)
+                ns.disk_bytes += len(payload)
+                self._enforce_disk_quota(ns)
         except Exception as e:
             logger.warning(f"Cache file write error: {e}")
     
-    def _add_to_memory_cache(self, key: str, value: str, expires: datetime):
-        """Memory cache-be hozzáadás (LRU szabályokkal)"""
-        # Ha megtelt, legrégebbi törlése
-        if len(self.memory_cache) >= self.memory_cache_limit:
-            oldest_key = min(
-                self.memory_cache.keys(),
-                key=lambda k: self.memory_cache[k]["expires"]
-            )
-            del self.memory_cache[oldest_key]
-        
-        self.memory_cache[key] = {
+    def revalidate(self, prompt: str, model: Optional[str], temperature: float,
+                   regenerate: Callable[[], Optional[str]],
+                   namespace: Optional[str] = None) -> bool:
+        """Stale bejegyzés háttérben történő újragenerálása
+        
+        A concurrency budget (revalidate_workers) felett, illetve ha ugyanaz a kulcs már
+        frissül, nem indít új feladatot.
+        
+        Returns:
+            True, ha a frissítés elindult
+        """
+        job_key = (namespace or DEFAULT_NAMESPACE, self._generate_key(prompt, model, temperature))
+        with self._lock:
+            if job_key in self._revalidating or len(self._revalidating) >= self.revalidate_workers:
+                return False
+            self._revalidating.add(job_key)
+        
+        def run():
+            try:
+                value = regenerate()
+                if value:
+                    self.set(prompt, value, model, temperature, namespace)
+            except Exception as e:
+                logger.warning(f"Cache revalidation error: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(job_key)
+        
+        self._revalidate_executor.submit(run)
+        return True
+    
+    async def replay_stream(self, value: str, words_per_chunk: int = 4,
+                            delay: float = 0.0) -> AsyncGenerator[str, None]:
+        """Cache-elt válasz visszajátszása stream chunk-okként
+        
+        Args:
+            value: Cache-elt teljes válasz
+            words_per_chunk: Ennyi szó kerül egy chunk-ba
+            delay: Opcionális késleltetés chunk-onként (szimulált tempó), másodperc
+        """
+        pieces = re.findall(r"\s*\S+\s*|\s+", value)
+        for i in range(0, len(pieces), words_per_chunk):
+            yield "".join(pieces[i:i + words_per_chunk])
+            if delay > 0:
+                await asyncio.sleep(delay)
+    
+    # --- Kvóták (a hívó tartja a lockot) ---
+    
+    def _add_to_memory_cache(self, ns: CacheNamespace, key: str, value: str, expires: datetime,
+                             stale_expires: Optional[datetime] = None,
+                             digest: Optional[str] = None):
+        """Memory cache-be hozzáadás (LRU, byte kvótával)"""
+        if key in ns.memory:
+            self._drop_memory(ns, key)
+        
+        size = len(value.encode('utf-8'))
+        ns.memory[key] = {
             "value": value,
-            "expires": expires
+            "expires": expires,
+            "stale_expires": stale_expires or expires,
+            "digest": digest,
+            "size": size
         }
+        ns.memory_bytes += size
+        self._enforce_memory_quota(ns)
+    
+    def _drop_memory(self, ns: CacheNamespace, key: str):
+        item = ns.memory.pop(key, None)
+        if item is not None:
+            ns.memory_bytes -= item["size"]
+    
+    def _enforce_memory_quota(self, ns: CacheNamespace):
+        """Legrégebben használt bejegyzések kiürítése a memória kvóta felett"""
+        while ns.memory_bytes > ns.memory_quota and ns.memory:
+            key, item = ns.memory.popitem(last=False)
+            ns.memory_bytes -= item["size"]
+            ns.evictions += 1
+    
+    def _enforce_disk_quota(self, ns: CacheNamespace):
+        """Legrégebben használt fájlok törlése a lemez kvóta felett"""
+        if ns.disk is None:
+            return
+        gen_dir = self._generation_dir(ns)
+        while ns.disk_bytes > ns.disk_quota and ns.disk:
+            file_name, size = ns.disk.popitem(last=False)
+            ns.disk_bytes -= size
+            ns.evictions += 1
+            try:
+                (gen_dir / file_name).unlink()
+            except FileNotFoundError:
+                pass
     
     def clear(self):
-        """Cache törlése"""
-        self.memory_cache.clear()
+        """Cache törlése (összes névtér)"""
+        with self._lock:
+            for ns in self.namespaces.values():
+                ns.memory = OrderedDict()
+                ns.memory_bytes = 0
+                ns.disk = OrderedDict()
+                ns.disk_bytes = 0
         
         # File cache törlése
         try:
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
+            for item in self.cache_dir.iterdir():
+                if item.is_dir():
+                    shutil.rmtree(item, ignore_errors=True)
+                elif item.suffix == ".json":
+                    item.unlink()
         except Exception as e:
             logger.warning(f"Cache clear error: {e}")
-
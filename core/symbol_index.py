@@ -0,0 +1,452 @@
+"""
+Symbol Index - Függvények, osztályok és metódusok definíciós helyei ("go to definition")
+"""
+import os
+import re
+import ast
+import json
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.file_index import FileIndex, Changes, EXTENSION_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# Kulcsszó -> szimbólum fajta (kapcsos zárójeles nyelvek, Ruby, Kotlin, Swift)
+DEFINITION_KEYWORDS = {
+    'class': 'class', 'interface': 'interface', 'struct': 'struct', 'enum': 'enum',
+    'trait': 'trait', 'impl': 'impl', 'protocol': 'protocol', 'extension': 'class',
+    'object': 'class', 'module': 'module', 'namespace': 'module',
+    'function': 'function', 'def': 'function', 'fn': 'function', 'func': 'function', 'fun': 'function'
+}
+CONTAINER_KINDS = {'class', 'interface', 'struct', 'enum', 'trait', 'impl', 'protocol', 'module'}
+# Zárójel előtti azonosítók, amelyek nem függvény definíciók
+CONTROL_WORDS = {
+    'if', 'for', 'while', 'switch', 'catch', 'return', 'synchronized', 'foreach', 'elseif',
+    'using', 'lock', 'match', 'when', 'with', 'sizeof', 'typeof', 'new', 'await', 'super', 'this'
+}
+
+TOKEN_PATTERN = re.compile(
+    r"""(?P<comment>//[^\n]*|/\*.*?\*/|\#[^\n]*)"""
+    r"""|(?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)"""
+    r"""|(?P<ident>[A-Za-z_$][\w$]*)"""
+    r"""|(?P<newline>\n)"""
+    r"""|(?P<punct>=>|->|::|[{}()\[\];=<>:,.*&])""",
+    re.DOTALL
+)
+SQL_DEFINITION = re.compile(
+    r"^\s*create\s+(?:or\s+replace\s+)?(function|procedure|table|view|trigger|index)\s+(?:if\s+not\s+exists\s+)?([\w.\"]+)",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class Symbol:
+    """Egy definíció (1-től számozott, zárt sortartomány)"""
+    name: str
+    qualname: str
+    kind: str
+    path: str
+    start_line: int
+    end_line: int
+    language: str
+
+
+def python_symbols(path: str, source: str) -> List[Symbol]:
+    """Python definíciók az ast-ből (beágyazott osztályok / függvények minősített névvel)"""
+    symbols = []
+    
+    def visit(nodes, prefix: str, in_class: bool):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                is_class = isinstance(node, ast.ClassDef)
+                kind = "class" if is_class else ("method" if in_class else "function")
+                qualname = f"{prefix}.{node.name}" if prefix else node.name
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                symbols.append(Symbol(node.name, qualname, kind, path, start,
+                                      node.end_lineno or node.lineno, "python"))
+                visit(node.body, qualname, is_class)
+            elif hasattr(node, "body") and isinstance(node.body, list):
+                # if / try / with blokkokban lévő definíciók
+                visit(node.body, prefix, in_class)
+                visit(getattr(node, "orelse", []), prefix, in_class)
+                for handler in getattr(node, "handlers", []):
+                    visit(handler.body, prefix, in_class)
+                visit(getattr(node, "finalbody", []), prefix, in_class)
+    
+    visit(ast.parse(source).body, "", False)
+    return symbols
+
+
+def _tokens(source: str):
+    """(fajta, érték, sor) tokenek; a megjegyzések és sztringek kimaradnak"""
+    line = 1
+    for match in TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "newline":
+            line += 1
+            continue
+        if kind in ("comment", "string"):
+            line += value.count("\n")
+            continue
+        yield kind, value, line
+
+
+def token_symbols(path: str, source: str, language: str) -> List[Symbol]:
+    """Definíciók egy egyszerű tokenizálóval (kapcsos zárójeles és hasonló nyelvek)
+    
+    Kulcsszavas definíciók (class, function, fn, func, def, ...) bárhol, illetve
+    "név(...) {" alakú metódusok / függvények a legfelső szinten és osztály törzsben.
+    A definíció vége a törzsét nyitó kapcsos zárójel párja (törzs nélkül a kezdő sor).
+    """
+    if language == "sql":
+        symbols = []
+        for number, text in enumerate(source.splitlines(), 1):
+            match = SQL_DEFINITION.match(text)
+            if match:
+                name = match.group(2).strip('"')
+                symbols.append(Symbol(name.rsplit(".", 1)[-1], name, match.group(1).lower(),
+                                      path, number, number, language))
+        return symbols
+    
+    tokens = list(_tokens(source))
+    symbols: List[Symbol] = []
+    # scope: (szimbólum vagy None, fajta) minden nyitott kapcsos zárójelre
+    scopes: List[Tuple[Optional[Symbol], str]] = []
+    pending: Optional[Symbol] = None
+    
+    def container() -> Tuple[str, bool]:
+        """(minősítő előtag, osztály jellegű törzsben vagyunk-e)"""
+        names = [s.qualname for s, _ in scopes if s is not None]
+        kind = scopes[-1][1] if scopes else "top"
+        return (names[-1] if names else ""), kind in CONTAINER_KINDS or kind == "top"
+    
+    def make(name: str, kind: str, line: int) -> Symbol:
+        prefix, _ = container()
+        qualname = f"{prefix}.{name}" if prefix else name
+        symbol = Symbol(name, qualname, kind, path, line, line, language)
+        symbols.append(symbol)
+        return symbol
+    
+    i = 0
+    count = len(tokens)
+    while i < count:
+        kind, value, line = tokens[i]
+        if kind == "ident" and value in DEFINITION_KEYWORDS and i + 1 < count:
+            def_kind = DEFINITION_KEYWORDS[value]
+            j = i + 1
+            receiver = None
+            if value == "func" and tokens[j][1] == "(":
+                # Go metódus: func (r *Type) Name(...)
+                depth, k = 0, j
+                while k < count:
+                    if tokens[k][1] == "(":
+                        depth += 1
+                    elif tokens[k][1] == ")":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    elif tokens[k][0] == "ident":
+                        receiver = tokens[k][1]
+                    k += 1
+                j = k + 1
+            if def_kind == "impl":
+                # impl Trait for Type { ... } -> Type
+                k = j
+                name = None
+                while k < count and tokens[k][1] not in ("{", ";"):
+                    if tokens[k][0] == "ident" and tokens[k][1] not in ("for", "where"):
+                        name = tokens[k][1]
+                    k += 1
+                if name:
+                    pending = make(name, "impl", line)
+                i = k
+                continue
+            if j < count and tokens[j][0] == "ident":
+                name = tokens[j][1]
+                _, in_container = container()
+                if def_kind == "function" and (receiver or (scopes and in_container)):
+                    def_kind = "method"
+                symbol = make(name, def_kind, line)
+                if receiver:
+                    symbol.qualname = f"{receiver}.{name}"
+                pending = symbol
+                i = j + 1
+                continue
+        elif (kind == "ident" and value in ("const", "let", "var") and i + 3 < count
+              and tokens[i + 1][0] == "ident" and tokens[i + 2][1] == "="):
+            # const name = (...) => { ... } / const name = function (...) { ... }
+            k = i + 3
+            if tokens[k][1] == "async" and k + 1 < count:
+                k += 1
+            is_function = tokens[k][1] == "function"
+            if tokens[k][1] == "(":
+                depth = 0
+                while k < count:
+                    if tokens[k][1] == "(":
+                        depth += 1
+                    elif tokens[k][1] == ")":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    k += 1
+                k += 1
+                # opcionális visszatérési típus (TypeScript)
+                limit = k + 10
+                while k < min(count, limit) and tokens[k][1] not in ("=>", "{", ";", "="):
+                    k += 1
+                is_function = k < count and tokens[k][1] == "=>"
+            elif tokens[k][0] == "ident" and k + 1 < count and tokens[k + 1][1] == "=>":
+                is_function = True
+            if is_function:
+                _, in_container = container()
+                if in_container:
+                    symbol = make(tokens[i + 1][1], "function", line)
+                    pending = symbol
+                i += 3
+                continue
+        elif kind == "ident" and value not in CONTROL_WORDS and i + 1 < count and tokens[i + 1][1] == "(":
+            prefix, in_container = container()
+            if in_container and (i == 0 or tokens[i - 1][1] not in (".", "=", "new")):
+                # név(...) [: típus | throws ...] { -> függvény / metódus definíció
+                depth, k = 0, i + 1
+                while k < count:
+                    if tokens[k][1] == "(":
+                        depth += 1
+                    elif tokens[k][1] == ")":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    k += 1
+                k += 1
+                while k < count and tokens[k][1] not in ("{", ";", "}", "=", "=>") and k - i < 40:
+                    if tokens[k][1] == "(":
+                        break
+                    k += 1
+                if k < count and tokens[k][1] == "{":
+                    pending = make(value, "method" if scopes else "function", line)
+                    i = k
+                    continue
+        elif value == "{":
+            scopes.append((pending, pending.kind if pending else "block"))
+            pending = None
+        elif value == "}":
+            if scopes:
+                symbol, _ = scopes.pop()
+                if symbol is not None:
+                    symbol.end_line = line
+        elif value == ";" and pending is not None:
+            pending = None
+        i += 1
+    return symbols
+
+
+def extract_symbols(path: str, source: str) -> List[Symbol]:
+    """Fájl definíciói a kiterjesztés szerinti nyelven"""
+    language = EXTENSION_LANGUAGES.get(os.path.splitext(path)[1].lower())
+    if language is None or language in ("html", "css"):
+        return []
+    if language == "python":
+        return python_symbols(path, source)
+    return token_symbols(path, source, language)
+
+
+class SymbolIndex:
+    """Szimbólum tábla a projekt forrásfájljaiból
+    
+    Fájlonként a definíciók listája (a tartalom hash-ével perzisztálva, így induláskor csak
+    a változott fájlokat kell újra elemezni), plusz név szerinti index a gyors kereséshez.
+    A FileIndex értesítései alapján fájlonként frissül.
+    """
+    
+    def __init__(self, file_index: FileIndex, cache_file: Optional[str] = None,
+                 max_file_size: int = 1024 * 1024):
+        """
+        Args:
+            file_index: Projekt fájl index
+            cache_file: Szimbólum cache fájl (None = <index_dir>/symbols.json)
+            max_file_size: Ennél nagyobb fájlokat nem elemzünk
+        """
+        self.file_index = file_index
+        self.cache_file = Path(cache_file) if cache_file else file_index.index_dir / "symbols.json"
+        self.max_file_size = max_file_size
+        
+        # fájl -> (tartalom hash, szimbólumok)
+        self._files: Dict[str, Tuple[Optional[str], List[Symbol]]] = {}
+        self._by_name: Dict[str, List[Symbol]] = {}
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        file_index.subscribe(self._on_changes)
+    
+    def _load_cache(self) -> Dict[str, Tuple[Optional[str], List[Symbol]]]:
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {
+                path: (digest, [Symbol(*values[:2], values[2], path, *values[3:]) for values in symbols])
+                for path, (digest, symbols) in data.items()
+            }
+        except Exception as e:
+            logger.warning(f"Symbol index cache load error: {e}")
+            return {}
+    
+    def _save_cache(self):
+        with self._lock:
+            data = {
+                path: [digest, [[s.name, s.qualname, s.kind, s.start_line, s.end_line, s.language] for s in symbols]]
+                for path, (digest, symbols) in self._files.items()
+            }
+        temp_file = self.cache_file.with_suffix(".json.tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        temp_file.replace(self.cache_file)
+    
+    def _parse(self, path: str) -> Optional[Tuple[Optional[str], List[Symbol]]]:
+        entry = self.file_index.get(path)
+        if entry is None or entry.language is None or entry.size > self.max_file_size:
+            return None
+        content = self.file_index.read_text(path)
+        if content is None:
+            return None
+        try:
+            return entry.hash, extract_symbols(path, content)
+        except (SyntaxError, ValueError, RecursionError):
+            return entry.hash, []
+    
+    def _set_file(self, path: str, result: Optional[Tuple[Optional[str], List[Symbol]]]):
+        """Fájl szimbólumainak cseréje a név indexben is"""
+        old = self._files.pop(path, None)
+        if old is not None:
+            for symbol in old[1]:
+                entries = self._by_name.get(symbol.name)
+                if entries is not None:
+                    entries[:] = [s for s in entries if s.path != path]
+                    if not entries:
+                        del self._by_name[symbol.name]
+        if result is None:
+            return
+        self._files[path] = result
+        for symbol in result[1]:
+            self._by_name.setdefault(symbol.name, []).append(symbol)
+    
+    def _on_changes(self, changes: Changes):
+        """FileIndex értesítés: a változott fájlok újraelemzése"""
+        parsed = {path: self._parse(path) for path in changes.get("added", []) + changes.get("modified", [])}
+        with self._lock:
+            for path in changes.get("removed", []):
+                self._set_file(path, None)
+            for path, result in parsed.items():
+                self._set_file(path, result)
+        try:
+            self._save_cache()
+        except Exception as e:
+            logger.warning(f"Symbol index cache save error: {e}")
+    
+    def build(self):
+        """Teljes szimbólum tábla (a cache-ben lévő, nem változott fájlok újraelemzése nélkül)"""
+        cached = self._load_cache()
+        for path in self.file_index.files():
+            entry = self.file_index.get(path)
+            if entry is None or entry.language is None:
+                continue
+            previous = cached.get(path)
+            if previous is not None and entry.hash and previous[0] == entry.hash:
+                result = previous
+            else:
+                result = self._parse(path)
+            with self._lock:
+                # Az építés közben érkezett értesítés frissebb
+                if path not in self._files:
+                    self._set_file(path, result)
+        self._ready.set()
+        logger.info(f"Symbol index built: {sum(len(s) for _, s in self._files.values())} symbols")
+        try:
+            self._save_cache()
+        except Exception as e:
+            logger.warning(f"Symbol index cache save error: {e}")
+    
+    def start(self):
+        """Építés háttér szálon"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.build, name="symbol-index", daemon=True)
+        self._thread.start()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Megvárja az első építést (ha nem fut, szinkron épít)"""
+        if not self._ready.is_set() and (self._thread is None or not self._thread.is_alive()):
+            self.build()
+        return self._ready.wait(timeout)
+    
+    def lookup(self, query: str, kind: Optional[str] = None, path: Optional[str] = None,
+               limit: int = 20, exact: bool = False) -> List[Symbol]:
+        """Szimbólum keresése név vagy minősített név (pl. "ActionExecutor._extract_explicit_actions") szerint
+        
+        Pontos egyezés híján (ha exact=False) kis/nagybetű független, majd előtag egyezést ad vissza.
+        """
+        self.wait_ready()
+        name = query.rsplit(".", 1)[-1]
+        with self._lock:
+            candidates = list(self._by_name.get(name, []))
+            if not candidates and not exact:
+                lowered = name.lower()
+                candidates = [s for key, symbols in self._by_name.items() if key.lower() == lowered for s in symbols]
+                if not candidates and len(name) >= 3:
+                    candidates = [s for key, symbols in self._by_name.items()
+                                  if key.lower().startswith(lowered) for s in symbols]
+        
+        if "." in query:
+            # Minősített név: a qualname végének kell egyeznie (pont határon)
+            qualified = [s for s in candidates if s.qualname == query or s.qualname.endswith("." + query)]
+            candidates = qualified or ([] if exact else
+                                       [s for s in candidates if s.qualname.lower().endswith(query.lower())])
+        if kind:
+            candidates = [s for s in candidates if s.kind == kind]
+        if path:
+            candidates = [s for s in candidates if s.path == path or s.path.startswith(path.rstrip("/") + "/")]
+        # Osztályok és legfelső szintű definíciók előre
+        candidates.sort(key=lambda s: (s.qualname.count("."), s.kind not in CONTAINER_KINDS, s.path, s.start_line))
+        return candidates[:limit]
+    
+    def symbols_in(self, path: str) -> List[Symbol]:
+        """Egy fájl definíciói sorrendben"""
+        self.wait_ready()
+        with self._lock:
+            entry = self._files.get(path)
+            return list(entry[1]) if entry else []
+    
+    def all_symbols(self) -> Dict[str, List[Symbol]]:
+        """Az összes fájl definíciói (fájl -> szimbólumok)"""
+        self.wait_ready()
+        with self._lock:
+            return {path: list(symbols) for path, (_, symbols) in self._files.items()}
+    
+    def definition(self, symbol: Symbol, max_lines: int = 200) -> str:
+        """A definíció forrásszövege (legfeljebb max_lines sor)"""
+        content = self.file_index.read_text(symbol.path) or ""
+        lines = content.splitlines()[symbol.start_line - 1:symbol.end_line]
+        if len(lines) > max_lines:
+            lines = lines[:max_lines] + [f"... ({symbol.end_line - symbol.start_line + 1 - max_lines} további sor)"]
+        return "\n".join(lines)
+    
+    @staticmethod
+    def to_dict(symbol: Symbol) -> Dict:
+        return asdict(symbol)
+    
+    def get_stats(self) -> Dict:
+        """Index statisztika"""
+        with self._lock:
+            return {
+                "ready": self._ready.is_set(),
+                "files": len(self._files),
+                "symbols": sum(len(symbols) for _, symbols in self._files.values()),
+                "names": len(self._by_name)
+            }
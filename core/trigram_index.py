@@ -0,0 +1,291 @@
+"""
+Trigram Index - Teljes szöveges keresés a projekt fájlokban (substring és regex)
+"""
+import re
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.file_index import FileIndex, Changes
+
+try:
+    import re._parser as sre_parse
+    from re._constants import LITERAL, SUBPATTERN, MAX_REPEAT, MIN_REPEAT
+except ImportError:  # Python < 3.11
+    import sre_parse
+    from sre_constants import LITERAL, SUBPATTERN, MAX_REPEAT, MIN_REPEAT
+
+logger = logging.getLogger(__name__)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Kisbetűsített szöveg 3 karakteres részsztringjei"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _contains(posting: array, value: int) -> bool:
+    """Rendezett posting lista tartalmazza-e az értéket"""
+    position = bisect_left(posting, value)
+    return position < len(posting) and posting[position] == value
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Olyan literál szakaszok, amelyeknek minden regex találatban szerepelniük kell
+    
+    Konzervatív: elágazás, karakter osztály, opcionális ismétlés megszakítja a szakaszt, így
+    a visszaadott literálok hiánya biztosan kizárja a találatot.
+    """
+    literals = []
+    
+    def walk(items):
+        run = []
+        for op, arg in items:
+            if op is LITERAL:
+                run.append(chr(arg))
+                continue
+            if run:
+                literals.append("".join(run))
+                run = []
+            if op is SUBPATTERN:
+                walk(arg[-1])
+            elif op in (MAX_REPEAT, MIN_REPEAT) and arg[0] >= 1:
+                walk(arg[2])
+        if run:
+            literals.append("".join(run))
+    
+    walk(sre_parse.parse(pattern))
+    return literals
+
+
+class TrigramIndex:
+    """Fordított trigram index a FileIndex szöveges fájljain
+    
+    Minden trigramhoz a tartalmazó fájlok (tartalom vagy útvonal) azonosítói tartoznak. Lekérdezéskor a keresett
+    sztring (vagy a regex kötelező literáljai) trigramjainak metszete adja a jelölt fájlokat,
+    és csak ezeket kell beolvasni a soronkénti ellenőrzéshez. A FileIndex változás
+    értesítései alapján fájlonként frissül; a törölt fájlok azonosítói tombstone-ok, amiket
+    időnként kigyűjtünk a posting listákból.
+    """
+    
+    def __init__(self, file_index: FileIndex, max_file_size: int = 1024 * 1024,
+                 max_hits_per_file: int = 20, max_line_length: int = 300):
+        """
+        Args:
+            file_index: Projekt fájl index (forrás és változás értesítés)
+            max_file_size: Ennél nagyobb fájlokat nem indexelünk (mindig jelöltek)
+            max_hits_per_file: Fájlonként legfeljebb ennyi sor találat
+            max_line_length: A visszaadott sorok vágási hossza
+        """
+        self.file_index = file_index
+        self.max_file_size = max_file_size
+        self.max_hits_per_file = max_hits_per_file
+        self.max_line_length = max_line_length
+        
+        self._postings: Dict[str, array] = {}
+        self._paths: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        # útvonal -> (méret, mtime) az indexelés pillanatában
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+        self._unindexed: Set[str] = set()
+        self._dead = 0
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        self.queries = 0
+        self.candidates_read = 0
+        
+        file_index.subscribe(self._on_changes)
+    
+    def _remove(self, path: str):
+        file_id = self._ids.pop(path, None)
+        if file_id is not None:
+            self._paths[file_id] = None
+            self._dead += 1
+        self._stamps.pop(path, None)
+        self._unindexed.discard(path)
+    
+    def _add(self, path: str):
+        """Fájl (újra)indexelése új azonosítóval"""
+        entry = self.file_index.get(path)
+        if entry is None or not entry.is_text:
+            self._remove(path)
+            return
+        if entry.size > self.max_file_size:
+            self._remove(path)
+            self._unindexed.add(path)
+            return
+        stamp = (entry.size, entry.mtime_ns)
+        if path in self._ids and self._stamps.get(path) == stamp:
+            # Már az aktuális változat van indexelve (pl. építés és első szkennelés átfedése)
+            return
+        
+        content = self.file_index.read_text(path)
+        # Az útvonal trigramjai is bekerülnek, így a fájlnév találatok is jelöltek lesznek
+        grams = trigrams(path.lower())
+        if content:
+            grams |= trigrams(content.lower())
+        with self._lock:
+            self._remove(path)
+            file_id = len(self._paths)
+            self._paths.append(path)
+            self._ids[path] = file_id
+            self._stamps[path] = stamp
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    posting = self._postings[gram] = array('i')
+                posting.append(file_id)
+    
+    def _on_changes(self, changes: Changes):
+        """FileIndex értesítés: a változott fájlok újraindexelése"""
+        for path in changes.get("removed", []):
+            with self._lock:
+                self._remove(path)
+        for path in changes.get("added", []) + changes.get("modified", []):
+            self._add(path)
+        self._maybe_compact()
+    
+    def _maybe_compact(self):
+        """Tombstone-ok kigyűjtése, ha a halott azonosítók túlsúlyba kerültek"""
+        with self._lock:
+            if self._dead < 1000 or self._dead < len(self._ids):
+                return
+            alive = self._paths
+            for gram in list(self._postings):
+                posting = array('i', (i for i in self._postings[gram] if alive[i] is not None))
+                if posting:
+                    self._postings[gram] = posting
+                else:
+                    del self._postings[gram]
+            self._dead = 0
+    
+    def build(self):
+        """Teljes index építése a FileIndex szöveges fájljaiból"""
+        for path in self.file_index.files(text_only=True):
+            try:
+                self._add(path)
+            except Exception as e:
+                logger.warning(f"Trigram index error ({path}): {e}")
+        self._ready.set()
+        logger.info(f"Trigram index built: {len(self._ids)} files, {len(self._postings)} trigrams")
+    
+    def start(self):
+        """Index építése háttér szálon"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.build, name="trigram-index", daemon=True)
+        self._thread.start()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Megvárja az első építést (ha nem fut, szinkron épít)"""
+        if not self._ready.is_set() and (self._thread is None or not self._thread.is_alive()):
+            self.build()
+        return self._ready.wait(timeout)
+    
+    def _candidates(self, literals: List[str]) -> List[str]:
+        """A literálok összes trigramját tartalmazó fájlok (plusz a nem indexelt fájlok)"""
+        grams = set()
+        for literal in literals:
+            grams |= trigrams(literal.lower())
+        
+        with self._lock:
+            if not grams:
+                ids = [i for i, path in enumerate(self._paths) if path is not None]
+            else:
+                postings = []
+                for gram in grams:
+                    posting = self._postings.get(gram)
+                    if posting is None:
+                        postings = []
+                        break
+                    postings.append(posting)
+                if not postings:
+                    ids = []
+                else:
+                    # A legritkább trigramtól szűkítünk; a posting listák rendezettek, így
+                    # kevés jelöltnél bináris kereséssel metszünk a teljes lista bejárása helyett
+                    postings.sort(key=len)
+                    ids = list(postings[0])
+                    for posting in postings[1:]:
+                        if not ids:
+                            break
+                        if len(ids) * 16 < len(posting):
+                            ids = [i for i in ids if _contains(posting, i)]
+                        else:
+                            members = set(posting)
+                            ids = [i for i in ids if i in members]
+            paths = [self._paths[i] for i in ids if self._paths[i] is not None]
+            return paths + sorted(self._unindexed)
+    
+    def search(self, query: str, limit: int = 10, regex: bool = False,
+               case_sensitive: bool = False) -> List[Dict]:
+        """Keresés a fájlok tartalmában és útvonalában
+        
+        Args:
+            query: Keresett sztring vagy regex
+            limit: Legfeljebb ennyi fájl
+            regex: A query reguláris kifejezés
+            case_sensitive: Kis/nagybetű érzékeny keresés
+        
+        Returns:
+            Fájlok pontszám szerint: {"path", "score", "path_match", "hits": [{"line", "column", "text"}]}
+        
+        Raises:
+            re.error: Érvénytelen regex
+        """
+        self.wait_ready()
+        self.queries += 1
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if regex:
+            pattern = re.compile(query, flags)
+            literals = required_literals(query)
+        else:
+            pattern = re.compile(re.escape(query), flags)
+            literals = [query]
+        word = re.compile(r"\b" + re.escape(query) + r"\b", flags) if not regex else None
+        
+        results: Dict[str, Dict] = {}
+        for path in self._candidates(literals):
+            # Útvonal találat is számít (a korábbi keresés fájlnévre is illesztett)
+            path_match = pattern.search(path) is not None
+            content = self.file_index.read_text(path)
+            self.candidates_read += 1
+            if not content or not pattern.search(content):
+                if path_match:
+                    results[path] = {"path": path, "score": 5.0, "path_match": True, "hits": []}
+                continue
+            hits = []
+            score = 5.0 if path_match else 0.0
+            for number, line in enumerate(content.splitlines(), 1):
+                match = pattern.search(line)
+                if not match:
+                    continue
+                # Teljes szavas találat többet ér
+                score += 1.5 if word is not None and word.search(line) else 1.0
+                if len(hits) < self.max_hits_per_file:
+                    hits.append({
+                        "line": number,
+                        "column": match.start() + 1,
+                        "text": line.strip()[:self.max_line_length]
+                    })
+            results[path] = {"path": path, "score": score, "path_match": path_match, "hits": hits}
+        
+        ranked = sorted(results.values(), key=lambda r: (-r["score"], r["path"].count("/"), r["path"]))
+        return ranked[:limit]
+    
+    def get_stats(self) -> Dict:
+        """Index statisztika"""
+        with self._lock:
+            return {
+                "ready": self._ready.is_set(),
+                "files": len(self._ids),
+                "unindexed_files": len(self._unindexed),
+                "trigrams": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values()),
+                "dead_ids": self._dead,
+                "queries": self.queries,
+                "candidates_read": self.candidates_read
+            }
@@ -2,22 +2,37 @@
 AI Coding Assistant - FastAPI Backend
 Helyi LLM modellekkel működő kódolási asszisztens
 """
-from fastapi import FastAPI, HTTPException, Security
+from fastapi import FastAPI, HTTPException, Security, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, Response
+from email.utils import formatdate, parsedate_to_datetime
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 import uvicorn
 import os
+import json
 import logging
 import re
+import threading
 from pathlib import Path
 
 from core.llm_service import LLMService
 from core.file_manager import FileManager
 from core.response_cache import ResponseCache
+from core.cache_warmer import CacheWarmer
+from core.memory_summarizer import MemorySummarizer
 from core.project_manager import ProjectManager
-from core.conversation_memory import ConversationMemory
+from core.memory_manager import MemoryManager
+from core.conversation_tree import ConversationTree
+from core.file_index import FileIndex
+from core.trigram_index import TrigramIndex
+from core.import_graph import ImportGraph
+from core.code_retriever import CodeRetriever, HashingEmbedder, OllamaEmbedder
+from core.symbol_index import SymbolIndex
+from core.repo_map import RepoMap
+from core.git_status import GitStatus
+from core.file_summaries import FileSummaryStore
+from core.read_cache import ReadCache, file_etag
 from core.auth import api_key_manager, verify_api_key
 from core.gpu_manager import gpu_manager
 from core.distributed_computing import distributed_network, ComputeNode, NodeStatus
@@ -64,13 +79,195 @@ llm_service = LLMService(
     num_gpu_layers=NUM_GPU_LAYERS,
     num_threads=NUM_THREADS
 )
-file_manager = FileManager(base_path=BASE_PATH)
+# Fájl olvasási cache (stat aláírás szerint), a FileManager és a FileIndex közösen használja
+read_cache = ReadCache(max_bytes=int(os.getenv("READ_CACHE_MAX_MB", "64")) * 1024 * 1024)
+file_manager = FileManager(base_path=BASE_PATH, read_cache=read_cache)
+# Streamelt feltöltés (PUT /api/files/{path}) mérethatára
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_MB", "512")) * 1024 * 1024
 project_manager = ProjectManager(base_path="projects")
-code_generator = CodeGenerator(llm_service, file_manager, project_manager)
+response_cache = ResponseCache(
+    cache_dir="./data/cache",
+    ttl=int(os.getenv("CACHE_TTL", "1800")),
+    stale_ttl=int(os.getenv("CACHE_STALE_TTL", "86400")),
+    digest_provider=llm_service.get_model_digest,
+    revalidate_workers=int(os.getenv("CACHE_REVALIDATE_WORKERS", "1")),
+    # A névterenkénti kvóta ennél nagyobbra nem állítható (POST /api/cache/quota)
+    max_namespace_memory_quota=int(os.getenv("CACHE_NAMESPACE_MAX_MEMORY_MB", "64")) * 1024 * 1024,
+    max_namespace_disk_quota=int(os.getenv("CACHE_NAMESPACE_MAX_DISK_MB", "512")) * 1024 * 1024
+)
 action_executor = ActionExecutor(file_manager=file_manager, base_path=BASE_PATH)
-project_context = ProjectContext(file_manager, base_path=BASE_PATH)
-conversation_memory = ConversationMemory(project_name="global", storage_dir="./data/memory")
-response_cache = ResponseCache(cache_dir="./data/cache", ttl=1800)
+# Projekt fájl index (watchdog-gal, vagy mtime szkenneléssel, ha az nincs telepítve)
+file_index = FileIndex(
+    base_path=BASE_PATH,
+    index_dir="./data/index",
+    scan_interval=float(os.getenv("FILE_INDEX_SCAN_INTERVAL", "10")),
+    use_gitignore=os.getenv("FILE_INDEX_GITIGNORE", "true").lower() == "true",
+    scan_workers=int(os.getenv("FILE_INDEX_SCAN_WORKERS", "0")),
+    read_cache=read_cache
+)
+file_index.start()
+# Trigram full-text index a projekt kereséshez (a file_index változásaiból frissül)
+search_index = TrigramIndex(
+    file_index,
+    max_file_size=int(os.getenv("SEARCH_INDEX_MAX_FILE_SIZE", str(1024 * 1024)))
+)
+search_index.start()
+# Import gráf a kapcsolódó fájlokhoz (Python ast, JS/TS import/require)
+import_graph = ImportGraph(file_index)
+import_graph.start()
+# Kódrészlet retrieval (CODE_EMBED_MODEL = Ollama embedding modell, üresen modell nélküli hash embedding)
+CODE_EMBED_MODEL = os.getenv("CODE_EMBED_MODEL", "")
+code_retriever = CodeRetriever(
+    file_index,
+    embedder=OllamaEmbedder(llm_service, CODE_EMBED_MODEL) if CODE_EMBED_MODEL else HashingEmbedder()
+)
+code_retriever.start()
+# Szimbólum tábla ("go to definition"); a chat promptba az említett definíciók kerülnek
+symbol_index = SymbolIndex(file_index)
+symbol_index.start()
+# Rangsorolt repository térkép (a nyers fájllista helyett ez kerül a promptba)
+repo_map = RepoMap(file_index, import_graph, symbol_index)
+# Git working tree állapot (a frissen módosított fájlok előrébb kerülnek a kontextusban)
+git_status = GitStatus(file_index)
+# Fájl összefoglalók (explain eredményekből és üresjárati háttér feladatból, tartalom hash szerint)
+file_summaries = FileSummaryStore(
+    file_index,
+    llm_service,
+    is_idle=lambda: cache_warmer.is_idle(),
+    ranker=lambda: repo_map.rank()[0]
+)
+SYMBOL_CONTEXT_ENABLED = os.getenv("SYMBOL_CONTEXT_ENABLED", "true").lower() == "true"
+project_context = ProjectContext(file_manager, base_path=BASE_PATH, file_index=file_index,
+                                 search_index=search_index, import_graph=import_graph,
+                                 retriever=code_retriever, symbol_index=symbol_index,
+                                 repo_map=repo_map, git_status=git_status, summaries=file_summaries)
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+code_generator = CodeGenerator(llm_service, file_manager, project_manager, response_cache,
+                               context_tokens=CONTEXT_MAX_TOKENS,
+                               minify_context=os.getenv("CONTEXT_MINIFY", "true").lower() == "true",
+                               summaries=file_summaries)
+
+# Cache melegítés a kérés naplóból (üresjáratban, CPU budget-tel)
+cache_warmer = CacheWarmer(
+    response_cache,
+    log_file="./logs/requests.jsonl",
+    cpu_budget=float(os.getenv("CACHE_WARMUP_CPU_BUDGET", "0.2")),
+    idle_seconds=int(os.getenv("CACHE_WARMUP_IDLE_SECONDS", "300")),
+    max_log_bytes=int(os.getenv("CACHE_WARMUP_LOG_MB", "8")) * 1024 * 1024,
+    # Folyamatban lévő (pl. hosszan stream-elő) LLM kérés alatt nincs üresjárat
+    busy=lambda: llm_service.in_flight > 0
+)
+
+
+def _warm_chat(entry: Dict) -> bool:
+    """Együzenetes chat válasz újragenerálása a cache-be (ugyanazzal a prompttal, mint a /api/chat)"""
+    response = llm_service.chat(
+        messages=_with_definitions([{"role": "system", "content": CHAT_SYSTEM_PROMPT},
+                                    {"role": "user", "content": entry["prompt"]}]),
+        model=entry.get("model"),
+        temperature=entry.get("temperature", 0.5)
+    )
+    if response:
+        response_cache.set(entry["prompt"], response, entry.get("model"), entry.get("temperature", 0.5),
+                           namespace=entry.get("namespace"))
+    return bool(response)
+
+
+def _warm_chat_stream(entry: Dict) -> bool:
+    """Stream chat válasz újragenerálása a cache-be (a prompt a teljes előzmény)"""
+    response = llm_service.chat(
+        messages=json.loads(entry["prompt"]),
+        model=entry.get("model"),
+        temperature=entry.get("temperature", 0.7)
+    )
+    if response:
+        response_cache.set(entry["prompt"], response, entry.get("model"), entry.get("temperature", 0.7),
+                           namespace=entry.get("namespace"))
+    return bool(response)
+
+
+def _warm_generate(entry: Dict) -> bool:
+    """Kód generálás újrajátszása mentés nélkül"""
+    result = code_generator.generate_code(
+        prompt=entry["prompt"],
+        language=entry.get("language", "python"),
+        model=entry.get("model"),
+        auto_save=False
+    )
+    if result.get("code"):
+        response_cache.set(entry["prompt"], result["code"], entry.get("model"), 0.2,
+                           namespace=entry.get("namespace"))
+    return bool(result.get("code"))
+
+
+cache_warmer.register_handler(
+    "chat", _warm_chat,
+    lambda e: response_cache.contains(e["prompt"], e.get("model"), e.get("temperature", 0.5),
+                                      namespace=e.get("namespace"))
+)
+cache_warmer.register_handler(
+    "chat_stream", _warm_chat_stream,
+    lambda e: response_cache.contains(e["prompt"], e.get("model"), e.get("temperature", 0.7),
+                                      namespace=e.get("namespace"))
+)
+cache_warmer.register_handler(
+    "generate", _warm_generate,
+    lambda e: response_cache.contains(e["prompt"], e.get("model"), 0.2,
+                                      namespace=e.get("namespace"))
+)
+cache_warmer.register_handler(
+    "explain",
+    lambda e: not code_generator.explain_code(
+        e["file_path"], e.get("model"), cache_namespace=e.get("namespace"),
+        start_line=e.get("start_line"), end_line=e.get("end_line")
+    ).get("error"),
+    lambda e: code_generator.is_cached("explain", e["file_path"], e.get("model"),
+                                       cache_namespace=e.get("namespace"),
+                                       start_line=e.get("start_line"), end_line=e.get("end_line"))
+)
+cache_warmer.register_handler(
+    "refactor",
+    lambda e: not code_generator.refactor_code(
+        e["file_path"], e.get("refactor_type", "clean"), e.get("model"),
+        cache_namespace=e.get("namespace")
+    ).get("error"),
+    lambda e: code_generator.is_cached("refactor", e["file_path"], e.get("model"),
+                                       e.get("refactor_type", "clean"),
+                                       cache_namespace=e.get("namespace"))
+)
+
+if os.getenv("CACHE_WARMUP_ENABLED", "false").lower() == "true":
+    cache_warmer.start()
+
+# Régi beszélgetés szakaszok összefoglalása üresjáratban (a cache melegítés üresjárat jelzését használja)
+memory_summarizer = MemorySummarizer(llm_service, is_idle=cache_warmer.is_idle)
+
+# Felhasználónkénti, projektenkénti és munkamenetenkénti memóriák (LRU, byte korláttal)
+memory_manager = MemoryManager(
+    storage_dir="./data/memory",
+    max_bytes=int(os.getenv("MEMORY_POOL_MAX_BYTES", str(64 * 1024 * 1024))),
+    summarizer=memory_summarizer
+)
+
+# Elágazó beszélgetések tartalom-címzett tárolása (a közös előtagok egyszer tárolódnak)
+conversation_tree = ConversationTree(
+    storage_file="./data/memory/conversation_tree.jsonl",
+    max_nodes=int(os.getenv("CONVERSATION_TREE_MAX_NODES", "100000"))
+)
+if os.getenv("MEMORY_SUMMARY_ENABLED", "false").lower() == "true":
+    memory_summarizer.start()
+if os.getenv("FILE_SUMMARY_ENABLED", "false").lower() == "true":
+    file_summaries.start()
+
+
+def _cache_namespace(api_key: Optional[str]) -> str:
+    """Cache névtér az aktuális projektből és a hívó API kulcsából"""
+    return ResponseCache.make_namespace(project_manager.current_project, api_key)
+
+
+def _memory(api_key: Optional[str], session: Optional[str] = None):
+    """A hívó felhasználó memóriája az aktuális projektben"""
+    return memory_manager.get(MemoryManager.user_id(api_key), project_manager.current_project, session)
 
 # Szerver automatikus regisztrálása a distributed hálózatba
 def register_server_as_node():
@@ -196,6 +393,23 @@ class ChatRequest(BaseModel):
     auto_save_code: bool = Field(True, description="Automatikus kód mentés")
     use_cache: bool = Field(True, description="Cache használata")
     workspace_path: Optional[str] = Field(None, description="Workspace útvonal (kliens oldali)")
+    cache_replay_delay: float = Field(0.0, ge=0.0, le=1.0, description="Stream cache találat visszajátszási késleltetése chunk-onként (mp)")
+    parent_id: Optional[str] = Field(None, description="Folytatott beszélgetés fa csomópont (ekkor a messages csak az új üzeneteket tartalmazza)")
+
+
+class SessionCreateRequest(BaseModel):
+    messages: Optional[List[ChatMessage]] = Field(None, description="Kezdeti előzmény (egyszeri átvétel a klienstől)")
+
+
+class SessionMessageRequest(BaseModel):
+    content: str = Field(..., description="Új üzenet tartalma")
+    role: str = Field("user", description="Üzenet szerepe")
+    model: Optional[str] = Field(None, description="LLM modell neve")
+    temperature: float = Field(0.5, ge=0.0, le=2.0, description="Kreativitás")
+    use_cache: bool = Field(True, description="Cache használata")
+    workspace_path: Optional[str] = Field(None, description="Workspace útvonal (kliens oldali)")
+    context_tokens: int = Field(3000, ge=100, le=32000, description="Előzmény token budget a prompthoz")
+    cache_replay_delay: float = Field(0.0, ge=0.0, le=1.0, description="Stream cache találat visszajátszási késleltetése chunk-onként (mp)")
 
 
 class GenerateCodeRequest(BaseModel):
@@ -286,6 +500,10 @@ async def health_check():
         except:
             pass
     
+    # Modell digestek ellenőrzése (ollama pull után a régi cache bejegyzések törlése)
+    if ollama_connected:
+        response_cache.refresh_digests()
+    
     return {
         "status": "healthy" if ollama_connected else "degraded",
         "ollama_connected": ollama_connected,
@@ -317,42 +535,8 @@ async def list_models(api_key: Optional[str] = Security(verify_api_key)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/chat")
-async def chat(request: ChatRequest, api_key: Optional[str] = Security(verify_api_key)):
-    """Chat endpoint"""
-    try:
-        # Workspace útvonal beállítása (ha meg van adva)
-        current_base_path = BASE_PATH
-        if request.workspace_path:
-            # A kliens workspace útvonalát használjuk
-            # Windows path konverzió Linux szerveren (ha szükséges)
-            workspace_path = request.workspace_path
-            # Ha Windows path (pl. E:\path), akkor Linux-on nem működik
-            # De mivel a szerver Linux-on fut, a kliens Windows-on, 
-            # a fájlokat a kliens gépen kell létrehozni, nem a szerveren!
-            # Ezért NFS/SMB mount vagy más megoldás kell, VAGY
-            # a fájlokat a kliens oldalon kell létrehozni az extension-ben
-            
-            # Jelenleg: logoljuk, de ne használjuk, mert a szerver nem fér hozzá a Windows path-hoz
-            logger.warning(f"Workspace útvonal érkezett: {workspace_path} (Windows path, szerver nem fér hozzá)")
-            logger.info(f"Alapértelmezett BASE_PATH használata: {BASE_PATH}")
-            current_base_path = BASE_PATH
-            workspace_file_manager = file_manager
-            workspace_action_executor = action_executor
-        else:
-            # Alapértelmezett file_manager és action_executor
-            workspace_file_manager = file_manager
-            workspace_action_executor = action_executor
-        
-        messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.messages
-        ]
-        
-        has_system = any(msg.get("role") == "system" for msg in messages)
-        if not has_system:
-            # Teljes jogosultságú végrehajtó mód - ne írjon kódot, csak hajtsa végre
-            system_prompt = """Te egy teljes jogosultságú AI asszisztens vagy, aki közvetlenül végrehajtja az utasításokat.
+# Alapértelmezett system prompt (teljes jogosultságú végrehajtó mód)
+CHAT_SYSTEM_PROMPT = """Te egy teljes jogosultságú AI asszisztens vagy, aki közvetlenül végrehajtja az utasításokat.
 
 FONTOS SZABÁLYOK:
 1. SOHA ne írj kódot a válaszodba, csak hajtsd végre az utasításokat!
@@ -394,102 +578,220 @@ Felhasználó: "Futtasd le a test.py fájlt"
 Te: "Futtattam a test.py fájlt. Eredmény: Hello" 
 ÉS MINDIG ÍRD KI:
 RUN_COMMAND: python test.py"""
-            messages.insert(0, {"role": "system", "content": system_prompt})
-        
-        # Distributed computing KIKAPCSOLVA - csak szerver erőforrásokat használjuk
-        # CPU optimalizált mód: közvetlenül a lokális LLM service-t használjuk
-        logger.debug("Using local LLM service (CPU optimized mode, distributed computing disabled)")
+
+
+def _with_definitions(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Az utolsó felhasználói üzenetben említett projekt definíciók beillesztése (system üzenetként elé)"""
+    if not SYMBOL_CONTEXT_ENABLED or not messages or messages[-1].get("role") != "user":
+        return messages
+    try:
+        definitions = project_context.definitions_context(messages[-1].get("content", ""))
+    except Exception as e:
+        logger.warning(f"Symbol context error: {e}")
+        return messages
+    if not definitions:
+        return messages
+    note = {"role": "system", "content": f"A kérdésben említett definíciók a projektből:\n\n{definitions}"}
+    return messages[:-1] + [note, messages[-1]]
+
+
+def _chat_completion(messages: List[Dict[str, str]], model: Optional[str], temperature: float,
+                     use_cache: bool, workspace_path: Optional[str], api_key: Optional[str],
+                     prefix_id: Optional[str] = None, prefix_length: int = 0) -> Dict:
+    """Chat válasz generálása és az akciók végrehajtása (a /api/chat és a munkamenetek közös része)"""
+    # Workspace útvonal beállítása (ha meg van adva)
+    current_base_path = BASE_PATH
+    if workspace_path:
+        # A kliens workspace útvonalát használjuk
+        # Windows path konverzió Linux szerveren (ha szükséges)
+        # Ha Windows path (pl. E:\\path), akkor Linux-on nem működik
+        # De mivel a szerver Linux-on fut, a kliens Windows-on, 
+        # a fájlokat a kliens gépen kell létrehozni, nem a szerveren!
+        # Ezért NFS/SMB mount vagy más megoldás kell, VAGY
+        # a fájlokat a kliens oldalon kell létrehozni az extension-ben
         
-        # Hagyományos lokális feldolgozás
-        cache_key = None
-        if request.use_cache and not has_system and len(messages) == 1:
-            last_msg = messages[-1]["content"] if messages else ""
-            cached_response = response_cache.get(last_msg, request.model, request.temperature)
-            if cached_response:
-                response = cached_response
-            else:
-                response = llm_service.chat(
-                    messages=messages,
-                    model=request.model,
-                    temperature=request.temperature
+        # Jelenleg: logoljuk, de ne használjuk, mert a szerver nem fér hozzá a Windows path-hoz
+        logger.warning(f"Workspace útvonal érkezett: {workspace_path} (Windows path, szerver nem fér hozzá)")
+        logger.info(f"Alapértelmezett BASE_PATH használata: {BASE_PATH}")
+        current_base_path = BASE_PATH
+        workspace_file_manager = file_manager
+        workspace_action_executor = action_executor
+    else:
+        # Alapértelmezett file_manager és action_executor
+        workspace_file_manager = file_manager
+        workspace_action_executor = action_executor
+    
+    messages = list(messages)
+    has_system = any(msg.get("role") == "system" for msg in messages)
+    # Cache-elhető: egyetlen kliens üzenet saját system prompt nélkül (a miénk beszúrása előtt)
+    single = not has_system and len(messages) == 1
+    last_msg = messages[-1]["content"] if single else ""
+    if not has_system:
+        # Teljes jogosultságú végrehajtó mód - ne írjon kódot, csak hajtsa végre
+        messages.insert(0, {"role": "system", "content": CHAT_SYSTEM_PROMPT})
+    messages = _with_definitions(messages)
+    
+    # Distributed computing KIKAPCSOLVA - csak szerver erőforrásokat használjuk
+    # CPU optimalizált mód: közvetlenül a lokális LLM service-t használjuk
+    logger.debug("Using local LLM service (CPU optimized mode, distributed computing disabled)")
+    
+    # Hagyományos lokális feldolgozás
+    cache_key = None
+    if use_cache and single:
+        cache_ns = _cache_namespace(api_key)
+        cache_warmer.record("chat", prompt=last_msg, model=model,
+                            temperature=temperature, namespace=cache_ns)
+        cached_response, stale = response_cache.lookup(last_msg, model, temperature, cache_ns)
+        if cached_response:
+            response = cached_response
+            if stale:
+                # Stale-while-revalidate: azonnal kiszolgáljuk, a háttérben frissítjük
+                response_cache.revalidate(
+                    last_msg, model, temperature,
+                    lambda: llm_service.chat(messages=messages, model=model, temperature=temperature),
+                    namespace=cache_ns
                 )
-                response_cache.set(last_msg, response, request.model, request.temperature)
         else:
             response = llm_service.chat(
                 messages=messages,
-                model=request.model,
-                temperature=request.temperature
+                model=model,
+                temperature=temperature,
+                prefix_id=prefix_id,
+                prefix_length=prefix_length
             )
-        
-        last_user_message = messages[-1]["content"] if messages and messages[-1].get("role") == "user" else ""
-        
-        # Végrehajtás teljes jogosultságokkal - ne írjon kódot, csak hajtsa végre
-        # Workspace útvonallal rendelkező action_executor használata
-        execution_result = workspace_action_executor.execute_actions_from_response(
-            ai_response=response,
-            user_message=last_user_message
+            response_cache.set(last_msg, response, model, temperature, cache_ns)
+    else:
+        response = llm_service.chat(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            prefix_id=prefix_id,
+            prefix_length=prefix_length
         )
+    
+    last_user_message = messages[-1]["content"] if messages and messages[-1].get("role") == "user" else ""
+    
+    # Végrehajtás teljes jogosultságokkal - ne írjon kódot, csak hajtsa végre
+    # Workspace útvonallal rendelkező action_executor használata
+    execution_result = workspace_action_executor.execute_actions_from_response(
+        ai_response=response,
+        user_message=last_user_message
+    )
+    
+    # Válasz szövegének használata (kód blokkok nélkül)
+    clean_response = execution_result.get("response_text", response)
+    
+    # Ha nincs tiszta válasz, de van végrehajtás, összeállítjuk az eredményt
+    if not clean_response.strip() and execution_result.get("actions_executed"):
+        action_summaries = []
+        if execution_result.get("files_created"):
+            action_summaries.append(f"Létrehozott fájlok: {', '.join(execution_result['files_created'])}")
+        if execution_result.get("files_modified"):
+            action_summaries.append(f"Módosított fájlok: {', '.join(execution_result['files_modified'])}")
+        if execution_result.get("files_deleted"):
+            action_summaries.append(f"Törölt fájlok: {', '.join(execution_result['files_deleted'])}")
+        if execution_result.get("commands_run"):
+            for cmd_result in execution_result["commands_run"]:
+                if isinstance(cmd_result, dict) and cmd_result.get("success"):
+                    action_summaries.append(f"Parancs végrehajtva: {cmd_result.get('command', 'N/A')}")
         
-        # Válasz szövegének használata (kód blokkok nélkül)
-        clean_response = execution_result.get("response_text", response)
-        
-        # Ha nincs tiszta válasz, de van végrehajtás, összeállítjuk az eredményt
-        if not clean_response.strip() and execution_result.get("actions_executed"):
-            action_summaries = []
-            if execution_result.get("files_created"):
-                action_summaries.append(f"Létrehozott fájlok: {', '.join(execution_result['files_created'])}")
-            if execution_result.get("files_modified"):
-                action_summaries.append(f"Módosított fájlok: {', '.join(execution_result['files_modified'])}")
-            if execution_result.get("files_deleted"):
-                action_summaries.append(f"Törölt fájlok: {', '.join(execution_result['files_deleted'])}")
-            if execution_result.get("commands_run"):
-                for cmd_result in execution_result["commands_run"]:
-                    if isinstance(cmd_result, dict) and cmd_result.get("success"):
-                        action_summaries.append(f"Parancs végrehajtva: {cmd_result.get('command', 'N/A')}")
-            
-            if action_summaries:
-                clean_response = "\n".join(action_summaries)
-            else:
-                clean_response = "Végrehajtva."
-        
-        result = {
-            "response": clean_response,
-            "model": request.model or DEFAULT_MODEL,
-            "execution_result": {
-                "actions_executed": len(execution_result.get("actions_executed", [])),
-                "files_created": execution_result.get("files_created", []),
-                "files_modified": execution_result.get("files_modified", []),
-                "files_deleted": execution_result.get("files_deleted", []),
-                "commands_run": len(execution_result.get("commands_run", [])),
-                "errors": execution_result.get("errors", []),
-                # Fájl tartalmak a kliens oldali létrehozáshoz
-                "files_to_create": []
-            }
+        if action_summaries:
+            clean_response = "\n".join(action_summaries)
+        else:
+            clean_response = "Végrehajtva."
+    
+    result = {
+        "response": clean_response,
+        "model": model or DEFAULT_MODEL,
+        "execution_result": {
+            "actions_executed": len(execution_result.get("actions_executed", [])),
+            "files_created": execution_result.get("files_created", []),
+            "files_modified": execution_result.get("files_modified", []),
+            "files_deleted": execution_result.get("files_deleted", []),
+            "commands_run": len(execution_result.get("commands_run", [])),
+            "errors": execution_result.get("errors", []),
+            # Fájl tartalmak a kliens oldali létrehozáshoz
+            "files_to_create": []
+        }
+    }
+    
+    # Ha van workspace_path, akkor a fájlokat a kliens oldalon kell létrehozni
+    # Mert a szerver nem fér hozzá a Windows path-hoz
+    if workspace_path and execution_result.get("actions_executed"):
+        logger.info(f"Workspace path megadva, fájlok kliens oldali létrehozása: {len(execution_result.get('actions_executed', []))} akció")
+        for action in execution_result.get("actions_executed", []):
+            action_type = action.get("type")
+            logger.info(f"Akció típus: {action_type}, action: {action}")
+            if action_type in ["CREATE_FILE", "intelligent_file_creation", "file_creation"]:
+                file_name = action.get("file_created") or action.get("file_path")
+                if file_name:
+                    # Keresünk a fájl tartalmát az action-ben vagy az AI válaszban
+                    file_content = action.get("content", "")  # Először az action-ből
+                    if not file_content:
+                        file_content = _extract_file_content_from_response(response, file_name, action)
+                    
+                    logger.info(f"Fájl létrehozás: {file_name}, tartalom hossza: {len(file_content)}")
+                    result["execution_result"]["files_to_create"].append({
+                        "file_path": file_name,
+                        "content": file_content,
+                        "language": action.get("language", "text")
+                    })
+    
+    return result
+
+
+def _conversation_branch(request: ChatRequest, api_key: Optional[str]):
+    """Kérés üzeneteinek felvétele a beszélgetés fába
+    
+    Returns:
+        (teljes előzmény, utolsó üzenet csomópontja, közös előtag csomópont, előtag hossza)
+    """
+    new_messages = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.messages
+    ]
+    if not new_messages:
+        raise HTTPException(status_code=400, detail="Legalább egy üzenet szükséges")
+    # A fa felhasználónként elkülönül: más felhasználó csomópontja nem folytatható
+    user = MemoryManager.user_id(api_key)
+    try:
+        node_ids = conversation_tree.add_path(new_messages, parent_id=request.parent_id, namespace=user)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Beszélgetés csomópont '{request.parent_id}' nem található")
+    history = conversation_tree.get_path(node_ids[-1], namespace=user) if request.parent_id else new_messages
+    
+    # Az utoljára kiértékelt ággal közös előtag (az utolsó üzenet előtti részből)
+    prompt_parent = node_ids[-2] if len(node_ids) > 1 else request.parent_id
+    prefix_id, prefix_length = conversation_tree.shared_prefix(user, prompt_parent)
+    return history, node_ids[-1], prefix_id, prefix_length
+
+
+def _record_reply(api_key: Optional[str], node_id: str, response: str) -> str:
+    """Válasz csomópont felvétele és az ág megjelölése kiértékeltként"""
+    user = MemoryManager.user_id(api_key)
+    reply_id = conversation_tree.add_path([{"role": "assistant", "content": response}], parent_id=node_id,
+                                          namespace=user)[0]
+    conversation_tree.mark_evaluated(user, reply_id)
+    return reply_id
+
+
+@app.post("/api/chat")
+async def chat(request: ChatRequest, api_key: Optional[str] = Security(verify_api_key)):
+    """Chat endpoint"""
+    try:
+        messages, node_id, prefix_id, prefix_length = _conversation_branch(request, api_key)
+        result = _chat_completion(messages, request.model, request.temperature,
+                                  request.use_cache, request.workspace_path, api_key,
+                                  prefix_id=prefix_id, prefix_length=prefix_length)
+        result["conversation"] = {
+            "node_id": _record_reply(api_key, node_id, result["response"]),
+            "parent_id": node_id,
+            "prefix_id": prefix_id,
+            "prefix_length": prefix_length
         }
-        
-        # Ha van workspace_path, akkor a fájlokat a kliens oldalon kell létrehozni
-        # Mert a szerver nem fér hozzá a Windows path-hoz
-        if request.workspace_path and execution_result.get("actions_executed"):
-            logger.info(f"Workspace path megadva, fájlok kliens oldali létrehozása: {len(execution_result.get('actions_executed', []))} akció")
-            for action in execution_result.get("actions_executed", []):
-                action_type = action.get("type")
-                logger.info(f"Akció típus: {action_type}, action: {action}")
-                if action_type in ["CREATE_FILE", "intelligent_file_creation", "file_creation"]:
-                    file_name = action.get("file_created") or action.get("file_path")
-                    if file_name:
-                        # Keresünk a fájl tartalmát az action-ben vagy az AI válaszban
-                        file_content = action.get("content", "")  # Először az action-ből
-                        if not file_content:
-                            file_content = _extract_file_content_from_response(response, file_name, action)
-                        
-                        logger.info(f"Fájl létrehozás: {file_name}, tartalom hossza: {len(file_content)}")
-                        result["execution_result"]["files_to_create"].append({
-                            "file_path": file_name,
-                            "content": file_content,
-                            "language": action.get("language", "text")
-                        })
-        
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -511,29 +813,243 @@ def _extract_file_content_from_response(ai_response: str, file_name: str, action
     return ""
 
 
+def _chat_stream_response(messages: List[Dict[str, str]], model: Optional[str], temperature: float,
+                          use_cache: bool, replay_delay: float, api_key: Optional[str],
+                          on_complete: Optional[Callable[[str], None]] = None,
+                          prefix_id: Optional[str] = None, prefix_length: int = 0,
+                          headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """SSE chat válasz (cache visszajátszással); on_complete a teljes válasszal hívódik normál lezáráskor"""
+    messages = _with_definitions(messages)
+    # Cache kulcs a teljes előzményből (a stream endpoint több üzenetet kap)
+    cache_prompt = ResponseCache.messages_to_prompt(messages) if use_cache else None
+    cache_ns = _cache_namespace(api_key)
+    
+    if cache_prompt is not None:
+        cache_warmer.record("chat_stream", prompt=cache_prompt, model=model,
+                            temperature=temperature, namespace=cache_ns)
+        cached_response, stale = response_cache.lookup(cache_prompt, model, temperature, cache_ns)
+        if cached_response is not None:
+            if stale:
+                response_cache.revalidate(
+                    cache_prompt, model, temperature,
+                    lambda: llm_service.chat(messages=messages, model=model, temperature=temperature),
+                    namespace=cache_ns
+                )
+            
+            async def replay():
+                async for chunk in response_cache.replay_stream(
+                    cached_response,
+                    delay=replay_delay
+                ):
+                    yield f"data: {chunk}\n\n"
+                if on_complete:
+                    on_complete(cached_response)
+            
+            return StreamingResponse(
+                replay(),
+                media_type="text/event-stream",
+                headers={"X-Cache": "HIT", **(headers or {})}
+            )
+    
+    async def generate():
+        chunks = []
+        async for chunk in llm_service.chat_stream(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            prefix_id=prefix_id,
+            prefix_length=prefix_length
+        ):
+            chunks.append(chunk)
+            yield f"data: {chunk}\n\n"
+        
+        # Csak normál lezárás után mentünk (kliens megszakításnál vagy hibánál
+        # a generátor ide nem jut el, így csonka válasz nem kerül a cache-be)
+        if cache_prompt is not None and chunks:
+            response_cache.set(cache_prompt, "".join(chunks), model, temperature, cache_ns)
+        if on_complete and chunks:
+            on_complete("".join(chunks))
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"X-Cache": "MISS" if cache_prompt is not None else "BYPASS", **(headers or {})}
+    )
+
+
 @app.post("/api/chat/stream")
 async def chat_stream(request: ChatRequest, api_key: Optional[str] = Security(verify_api_key)):
     """Stream chat endpoint"""
     try:
-        messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.messages
-        ]
+        messages, node_id, prefix_id, prefix_length = _conversation_branch(request, api_key)
+        return _chat_stream_response(messages, request.model, request.temperature,
+                                     request.use_cache, request.cache_replay_delay, api_key,
+                                     on_complete=lambda response: _record_reply(api_key, node_id, response),
+                                     prefix_id=prefix_id, prefix_length=prefix_length,
+                                     headers={"X-Conversation-Node": node_id})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chat stream error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Szerver oldali chat munkamenetek: a kliens csak az új üzenetet küldi
+def _session_project(api_key: Optional[str], session_id: str) -> Tuple[str, str]:
+    """A munkamenet felhasználója és (a létrehozáskor aktív) projektje (404, ha nem létezik)"""
+    user = MemoryManager.user_id(api_key)
+    project = memory_manager.session_project(user, session_id, preferred=project_manager.current_project)
+    if project is None:
+        raise HTTPException(status_code=404, detail=f"Munkamenet '{session_id}' nem található")
+    return user, project
+
+
+def _session_memory(api_key: Optional[str], session_id: str):
+    """Munkamenet memóriája a saját projektjéből (404, ha nem létezik)"""
+    user, project = _session_project(api_key, session_id)
+    return memory_manager.get(user, project, session_id)
+
+
+def _session_prompt(memory, request: SessionMessageRequest) -> List[Dict[str, str]]:
+    """Prompt üzenetek: system prompt + memória kontextus (összefoglaló és legutóbbi üzenetek) + új üzenet"""
+    messages = [{"role": "system", "content": CHAT_SYSTEM_PROMPT}]
+    messages.extend(memory.get_context_messages(max_tokens=request.context_tokens))
+    messages.append({"role": request.role, "content": request.content})
+    return messages
+
+
+@app.get("/api/conversations/stats")
+async def conversation_tree_stats(api_key: Optional[str] = Security(verify_api_key)):
+    """Beszélgetés fa statisztika (tárolt és újrahasznosított csomópontok, LLM előtag újrahasznosítás)"""
+    try:
+        return {**conversation_tree.get_stats(), "llm_prefix": llm_service.prefix_stats}
+    except Exception as e:
+        logger.error(f"Conversation stats error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/conversations/{node_id}")
+async def get_conversation(node_id: str, api_key: Optional[str] = Security(verify_api_key)):
+    """Beszélgetés ág a gyökértől a csomópontig, és a csomópont elágazásai (csak a saját csomópontokra)"""
+    try:
+        try:
+            messages = conversation_tree.get_path(node_id, namespace=MemoryManager.user_id(api_key))
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Beszélgetés csomópont '{node_id}' nem található")
+        return {
+            "node_id": node_id,
+            "messages": messages,
+            "children": conversation_tree.children(node_id)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get conversation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/sessions")
+async def create_session(request: Optional[SessionCreateRequest] = None,
+                         api_key: Optional[str] = Security(verify_api_key)):
+    """Chat munkamenet létrehozása"""
+    try:
+        user = MemoryManager.user_id(api_key)
+        # A munkamenet ehhez a projekthez kötődik (a memória útvonalában tárolva)
+        project = memory_manager.make_key(user, project_manager.current_project)[1]
+        session_id = memory_manager.create_session(user, project)
+        memory = memory_manager.get(user, project, session_id)
+        if request and request.messages:
+            for msg in request.messages:
+                memory.add_message(msg.role, msg.content)
+        return {
+            "session_id": session_id,
+            "project": project,
+            "message_count": memory.message_count
+        }
+    except Exception as e:
+        logger.error(f"Create session error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/sessions/{session_id}")
+async def get_session(session_id: str, limit: int = 20, api_key: Optional[str] = Security(verify_api_key)):
+    """Munkamenet állapota és legutóbbi üzenetei"""
+    try:
+        user, project = _session_project(api_key, session_id)
+        memory = memory_manager.get(user, project, session_id)
+        return {
+            "session_id": session_id,
+            "project": project,
+            "message_count": memory.message_count,
+            "summarized_until": memory.summarized_until,
+            "messages": memory.get_recent(limit)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get session error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/sessions/{session_id}/messages")
+async def session_chat(session_id: str, request: SessionMessageRequest,
+                       api_key: Optional[str] = Security(verify_api_key)):
+    """Új üzenet egy munkamenetbe (az előzményt a szerver tartja)"""
+    try:
+        memory = _session_memory(api_key, session_id)
+        messages = _session_prompt(memory, request)
+        result = _chat_completion(messages, request.model, request.temperature,
+                                  request.use_cache, request.workspace_path, api_key)
         
-        async def generate():
-            async for chunk in llm_service.chat_stream(
-                messages=messages,
-                model=request.model,
-                temperature=request.temperature
-            ):
-                yield f"data: {chunk}\n\n"
+        # Csak sikeres válasz után kerül a munkamenetbe a kérdés és a válasz
+        memory.add_message(request.role, request.content)
+        memory.add_message("assistant", result["response"])
+        memory_manager.enforce_limits()
         
-        return StreamingResponse(
-            generate(),
-            media_type="text/event-stream"
-        )
+        result["session_id"] = session_id
+        result["message_count"] = memory.message_count
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Chat stream error: {e}")
+        logger.error(f"Session chat error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/sessions/{session_id}/messages/stream")
+async def session_chat_stream(session_id: str, request: SessionMessageRequest,
+                              api_key: Optional[str] = Security(verify_api_key)):
+    """Új üzenet egy munkamenetbe, stream válasszal"""
+    try:
+        memory = _session_memory(api_key, session_id)
+        messages = _session_prompt(memory, request)
+        
+        def on_complete(response: str):
+            memory.add_message(request.role, request.content)
+            memory.add_message("assistant", response)
+            memory_manager.enforce_limits()
+        
+        return _chat_stream_response(messages, request.model, request.temperature,
+                                     request.use_cache, request.cache_replay_delay, api_key,
+                                     on_complete=on_complete)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Session chat stream error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str, api_key: Optional[str] = Security(verify_api_key)):
+    """Munkamenet törlése"""
+    try:
+        user, project = _session_project(api_key, session_id)
+        memory_manager.delete(user, project, session_id)
+        return {"status": "deleted", "session_id": session_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Delete session error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -542,8 +1058,23 @@ async def generate_code(request: GenerateCodeRequest, api_key: Optional[str] = S
     """Kód generálás"""
     try:
         cached_code = None
+        cache_ns = _cache_namespace(api_key)
         if request.use_cache and not request.context_files:
-            cached_code = response_cache.get(request.prompt, request.model, 0.2)
+            cache_warmer.record("generate", prompt=request.prompt, model=request.model,
+                                language=request.language, namespace=cache_ns)
+            cached_code, stale = response_cache.lookup(request.prompt, request.model, 0.2, cache_ns)
+            if cached_code and stale:
+                # Háttér frissítés mentés nélkül (csak a cache-be kerül)
+                response_cache.revalidate(
+                    request.prompt, request.model, 0.2,
+                    lambda: code_generator.generate_code(
+                        prompt=request.prompt,
+                        language=request.language,
+                        model=request.model,
+                        auto_save=False
+                    ).get("code"),
+                    namespace=cache_ns
+                )
         
         if cached_code:
             result = {
@@ -563,7 +1094,7 @@ async def generate_code(request: GenerateCodeRequest, api_key: Optional[str] = S
                 file_path=request.file_path
             )
             if result.get("code") and request.use_cache and not request.context_files:
-                response_cache.set(request.prompt, result["code"], request.model, 0.2)
+                response_cache.set(request.prompt, result["code"], request.model, 0.2, cache_ns)
         
         if result.get("error"):
             raise HTTPException(status_code=400, detail=result["error"])
@@ -573,7 +1104,8 @@ async def generate_code(request: GenerateCodeRequest, api_key: Optional[str] = S
             "explanation": result.get("explanation"),
             "file_path": result.get("file_path"),
             "language": request.language,
-            "saved": result.get("file_path") is not None
+            "saved": result.get("file_path") is not None,
+            "context": result.get("context")
         }
     except HTTPException:
         raise
@@ -597,7 +1129,8 @@ async def edit_code(request: EditCodeRequest, api_key: Optional[str] = Security(
         
         return {
             "code": result["code"],
-            "file_path": request.file_path
+            "file_path": request.file_path,
+            "minified": result.get("minified")
         }
     except HTTPException:
         raise
@@ -607,12 +1140,19 @@ async def edit_code(request: EditCodeRequest, api_key: Optional[str] = Security(
 
 
 @app.get("/api/explain/{file_path:path}")
-async def explain_code(file_path: str, model: Optional[str] = None, api_key: Optional[str] = Security(verify_api_key)):
-    """Kód magyarázata"""
+async def explain_code(file_path: str, model: Optional[str] = None, start_line: Optional[int] = None,
+                       end_line: Optional[int] = None, api_key: Optional[str] = Security(verify_api_key)):
+    """Kód magyarázata (start_line/end_line esetén csak a sor ablaké, nagy fájlokhoz is)"""
     try:
+        cache_ns = _cache_namespace(api_key)
+        cache_warmer.record("explain", file_path=file_path, model=model, namespace=cache_ns,
+                            start_line=start_line, end_line=end_line)
         result = code_generator.explain_code(
             file_path=file_path,
-            model=model
+            model=model,
+            cache_namespace=cache_ns,
+            start_line=start_line,
+            end_line=end_line
         )
         
         if result.get("error"):
@@ -620,7 +1160,8 @@ async def explain_code(file_path: str, model: Optional[str] = None, api_key: Opt
         
         return {
             "explanation": result["explanation"],
-            "file_path": file_path
+            "file_path": file_path,
+            "minified": result.get("minified")
         }
     except HTTPException:
         raise
@@ -720,7 +1261,7 @@ async def analyze_image(request: VisionRequest, api_key: Optional[str] = Securit
                         }
                     else:
                         raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
-                        
+            
             except requests.exceptions.RequestException as ollama_error:
                 logger.error(f"Ollama vision API error: {ollama_error}")
                 # Ha Ollama nem elérhető vagy a modell nincs, alapvető információt adunk vissza
@@ -731,7 +1272,7 @@ async def analyze_image(request: VisionRequest, api_key: Optional[str] = Securit
                     "success": False,
                     "error": str(ollama_error)
                 }
-            
+        
         except Exception as img_error:
             logger.error(f"Image processing error: {img_error}")
             return {
@@ -748,10 +1289,15 @@ async def analyze_image(request: VisionRequest, api_key: Optional[str] = Securit
 async def refactor_code(request: RefactorRequest, api_key: Optional[str] = Security(verify_api_key)):
     """Kód refaktorálás"""
     try:
+        cache_ns = _cache_namespace(api_key)
+        cache_warmer.record("refactor", file_path=request.file_path,
+                            refactor_type=request.refactor_type, model=request.model,
+                            namespace=cache_ns)
         result = code_generator.refactor_code(
             file_path=request.file_path,
             refactor_type=request.refactor_type,
-            model=request.model
+            model=request.model,
+            cache_namespace=cache_ns
         )
         
         if result.get("error"):
@@ -760,7 +1306,8 @@ async def refactor_code(request: RefactorRequest, api_key: Optional[str] = Secur
         return {
             "code": result["code"],
             "changes": result.get("changes"),
-            "refactor_type": request.refactor_type
+            "refactor_type": request.refactor_type,
+            "minified": result.get("minified")
         }
     except HTTPException:
         raise
@@ -770,10 +1317,64 @@ async def refactor_code(request: RefactorRequest, api_key: Optional[str] = Secur
 
 
 # Fájl műveletek
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Feltételes kérés: a kliensnél lévő példány még aktuális-e (If-None-Match, If-Modified-Since)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _raw_file_response(file_path: str, request: Request) -> Response:
+    """Nyers fájl tartalom streamelve (dekódolás és JSON nélkül), ETag / 304 támogatással"""
+    path, stat, error = file_manager.stat_file(file_path)
+    if error:
+        raise HTTPException(status_code=404, detail=error.get("error", "File not found"))
+    
+    etag = file_etag(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": "no-cache"
+    }
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, stat_result=stat, headers=headers)
+
+
 @app.get("/api/files/{file_path:path}")
-async def read_file_endpoint(file_path: str, api_key: Optional[str] = Security(verify_api_key)):
-    """Fájl olvasása"""
+async def read_file_endpoint(file_path: str, request: Request, raw: bool = False,
+                             offset: Optional[int] = None, length: Optional[int] = None,
+                             start_line: Optional[int] = None, end_line: Optional[int] = None,
+                             api_key: Optional[str] = Security(verify_api_key)):
+    """Fájl olvasása
+    
+    raw=true esetén a nyers tartalom streamelve (ETag / Last-Modified, változatlan fájlra 304).
+    offset/length (byte tartomány) vagy start_line/end_line (sor ablak) esetén csak a részlet
+    (mmap-pel, a 10MB-os korlát nélkül); negatív offset / start_line a fájl végétől számít.
+    """
     try:
+        if raw:
+            return _raw_file_response(file_path, request)
+        
+        if offset is not None or length is not None or start_line is not None or end_line is not None:
+            if start_line is None and end_line is not None:
+                start_line = 1
+            result = file_manager.read_range(file_path, offset=offset, length=length,
+                                             start_line=start_line, end_line=end_line)
+            if not result.get("exists"):
+                raise HTTPException(status_code=404, detail=result.get("error", "File not found"))
+            if result.get("error"):
+                raise HTTPException(status_code=400, detail=result["error"])
+            return {"file_path": file_path, **{k: v for k, v in result.items() if k not in ("exists", "error")}}
+        
         result = file_manager.read_file(file_path)
         
         if not result.get("exists"):
@@ -819,6 +1420,34 @@ async def write_file_endpoint(request: WriteFileRequest, api_key: Optional[str]
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.put("/api/files/{file_path:path}")
+async def upload_file_endpoint(file_path: str, request: Request, create_dirs: bool = True,
+                               api_key: Optional[str] = Security(verify_api_key)):
+    """Fájl feltöltése a nyers request body-ból, streamelve (a JSON-os POST /api/files nagy fájlokhoz)"""
+    try:
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"File too large (max {UPLOAD_MAX_BYTES} bytes)")
+        
+        result = await file_manager.write_stream(file_path, request.stream(), create_dirs=create_dirs,
+                                                 max_bytes=UPLOAD_MAX_BYTES)
+        
+        if not result.get("success"):
+            raise HTTPException(status_code=413 if result.get("too_large") else 400,
+                                detail=result.get("error", "Upload failed"))
+        
+        return {
+            "success": True,
+            "file_path": result.get("path", file_path),
+            "size": result["size"]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload file error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.delete("/api/files/{file_path:path}")
 async def delete_file_endpoint(file_path: str, api_key: Optional[str] = Security(verify_api_key)):
     """Fájl törlése"""
@@ -837,10 +1466,11 @@ async def delete_file_endpoint(file_path: str, api_key: Optional[str] = Security
 
 
 @app.get("/api/files")
-async def list_files_endpoint(dir_path: str = ".", recursive: bool = False, api_key: Optional[str] = Security(verify_api_key)):
-    """Könyvtár tartalmának listázása"""
+async def list_files_endpoint(dir_path: str = ".", recursive: bool = False, filtered: bool = False,
+                              api_key: Optional[str] = Security(verify_api_key)):
+    """Könyvtár tartalmának listázása (filtered: kihagyott és .gitignore-olt bejegyzések nélkül)"""
     try:
-        result = file_manager.list_directory(dir_path, recursive=recursive)
+        result = file_manager.list_directory(dir_path, recursive=recursive, filtered=filtered)
         
         if result.get("error"):
             raise HTTPException(status_code=400, detail=result["error"])
@@ -1054,11 +1684,39 @@ async def get_project_structure(max_depth: int = 3, api_key: Optional[str] = Sec
 @app.get("/api/project/context")
 async def get_project_context_endpoint(file_path: Optional[str] = None, 
                               include_related: bool = True,
+                              query: Optional[str] = None,
+                              top_k: int = 8,
+                              max_tokens: int = CONTEXT_MAX_TOKENS,
+                              files: Optional[str] = None,
+                              session: Optional[str] = None,
+                              include_memory: bool = False,
                               api_key: Optional[str] = Security(verify_api_key)):
-    """Projekt kontextus lekérése"""
+    """Projekt kontextus lekérése (query esetén a token budget-be pakolt legrelevánsabb részletek)
+    
+    files: vesszővel elválasztott fájlok, include_memory: a munkamenet memória kontextusa is bekerül
+    """
     try:
         if file_path:
             context = project_context.get_file_context(file_path, include_related)
+        elif query:
+            memory = None
+            if include_memory:
+                memory = _memory(api_key, session).get_memory_context(max_tokens=max_tokens // 3, query=query)
+            packed = project_context.pack_context(
+                query,
+                files=[path.strip() for path in files.split(",") if path.strip()] if files else None,
+                memory=memory,
+                top_k=top_k,
+                max_tokens=max_tokens
+            )
+            context = {
+                "query": query,
+                "codebase": packed["text"],
+                "tokens": packed["tokens"],
+                "max_tokens": packed["max_tokens"],
+                "included": packed["included"],
+                "dropped": packed["dropped"]
+            }
         else:
             context = {
                 "codebase": project_context.build_codebase_context(),
@@ -1070,47 +1728,206 @@ async def get_project_context_endpoint(file_path: Optional[str] = None,
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/project/map")
+async def get_repo_map(max_tokens: int = 1024, focus: Optional[str] = None,
+                       api_key: Optional[str] = Security(verify_api_key)):
+    """Rangsorolt repository térkép (focus: vesszővel elválasztott kiemelt fájlok)"""
+    try:
+        focus_files = [path.strip() for path in focus.split(",") if path.strip()] if focus else []
+        return project_context.get_repo_map(max_tokens=max_tokens, focus=focus_files)
+    except Exception as e:
+        logger.error(f"Get repo map error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/project/changes")
+async def get_project_changes(limit: int = 20, hunks: bool = False,
+                              api_key: Optional[str] = Security(verify_api_key)):
+    """Git szerint változott fájlok (módosított, stage-elt, új) rangsorolási súllyal"""
+    try:
+        changed = git_status.changed_files(limit=limit)
+        if hunks:
+            for item in changed:
+                item["hunks"] = git_status.hunks(item["path"])
+        return {"files": changed, **git_status.get_stats()}
+    except Exception as e:
+        logger.error(f"Get project changes error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/project/search")
-async def search_files(query: str, limit: int = 10, api_key: Optional[str] = Security(verify_api_key)):
-    """Fájlok keresése"""
+async def search_files(query: str, limit: int = 10, regex: bool = False, case_sensitive: bool = False,
+                       api_key: Optional[str] = Security(verify_api_key)):
+    """Fájlok keresése (substring vagy regex, soronkénti találatokkal)"""
     try:
-        files = project_context.get_relevant_files(query, limit=limit)
+        results = project_context.search(query, limit=limit, regex=regex, case_sensitive=case_sensitive)
         return {
             "query": query,
-            "files": files,
-            "count": len(files)
+            "files": [result["path"] for result in results],
+            "results": results,
+            "count": len(results)
         }
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Érvénytelen regex: {e}")
     except Exception as e:
         logger.error(f"Search files error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/project/symbols")
+async def lookup_symbols(name: str, kind: Optional[str] = None, path: Optional[str] = None,
+                         limit: int = 20, include_source: bool = False,
+                         api_key: Optional[str] = Security(verify_api_key)):
+    """Szimbólum keresés név vagy minősített név (pl. Osztaly.metodus) szerint"""
+    try:
+        symbols = symbol_index.lookup(name, kind=kind, path=path, limit=limit)
+        results = []
+        for symbol in symbols:
+            result = SymbolIndex.to_dict(symbol)
+            if include_source:
+                result["source"] = symbol_index.definition(symbol)
+            results.append(result)
+        return {
+            "query": name,
+            "symbols": results,
+            "count": len(results)
+        }
+    except Exception as e:
+        logger.error(f"Symbol lookup error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/project/definition")
+async def get_definition(name: str, api_key: Optional[str] = Security(verify_api_key)):
+    """Go to definition: a legjobb találat helye és forráskódja"""
+    try:
+        symbols = symbol_index.lookup(name, limit=1)
+        if not symbols:
+            raise HTTPException(status_code=404, detail=f"Definíció nem található: {name}")
+        symbol = symbols[0]
+        return {
+            **SymbolIndex.to_dict(symbol),
+            "source": symbol_index.definition(symbol)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get definition error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/project/index")
+async def get_file_index_stats(api_key: Optional[str] = Security(verify_api_key)):
+    """Projekt fájl index statisztika"""
+    try:
+        return {
+            **file_index.get_stats(),
+            "search": search_index.get_stats(),
+            "imports": import_graph.get_stats(),
+            "retrieval": code_retriever.get_stats(),
+            "symbols": symbol_index.get_stats(),
+            "repo_map": repo_map.get_stats(),
+            "git": git_status.get_stats(),
+            "summaries": file_summaries.get_stats(),
+            "read_cache": read_cache.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Get file index error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/project/index/refresh")
+async def refresh_file_index(api_key: Optional[str] = Security(verify_api_key)):
+    """Projekt fájl index azonnali frissítése"""
+    try:
+        changes = file_index.refresh()
+        return {
+            "status": "refreshed",
+            "changes": {key: len(paths) for key, paths in changes.items()},
+            **file_index.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Refresh file index error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Memória és cache endpointok
 @app.get("/api/memory/summary")
-async def get_memory_summary(api_key: Optional[str] = Security(verify_api_key)):
+async def get_memory_summary(session: Optional[str] = None,
+                             api_key: Optional[str] = Security(verify_api_key)):
     """Beszélgetési memória összefoglaló"""
     try:
-        summary = conversation_memory.get_summary()
+        memory = _memory(api_key, session)
+        summary = memory.get_summary()
         return {
             "summary": summary,
-            "message_count": len(conversation_memory.messages)
+            "message_count": memory.message_count,
+            "summarized_until": memory.summarized_until
         }
     except Exception as e:
         logger.error(f"Get memory summary error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/memory/context")
+async def get_memory_context(max_tokens: int = 1500, query: Optional[str] = None,
+                             session: Optional[str] = None,
+                             api_key: Optional[str] = Security(verify_api_key)):
+    """Token budget-hez igazított memória kontextus (összefoglaló + releváns + legutóbbi üzenetek)"""
+    try:
+        memory = _memory(api_key, session)
+        context = memory.get_memory_context(max_tokens=max_tokens, query=query)
+        return {
+            "context": context,
+            "max_tokens": max_tokens,
+            "message_count": memory.message_count,
+            "summarized_until": memory.summarized_until
+        }
+    except Exception as e:
+        logger.error(f"Get memory context error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/memory/summarize")
+async def summarize_memory(force: bool = False, session: Optional[str] = None,
+                           api_key: Optional[str] = Security(verify_api_key)):
+    """Memória összefoglalás indítása a háttérben (alapból csak üresjáratban dolgozik)"""
+    try:
+        memory = _memory(api_key, session)
+        threading.Thread(target=memory_summarizer.run_once, kwargs={"force": force}, daemon=True).start()
+        return {
+            "status": "started",
+            "force": force,
+            "summarized_until": memory.summarized_until,
+            "summarized_total": memory_summarizer.summarized_total,
+            "last_run": memory_summarizer.last_run
+        }
+    except Exception as e:
+        logger.error(f"Memory summarize error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/memory/clear")
-async def clear_memory(api_key: Optional[str] = Security(verify_api_key)):
+async def clear_memory(session: Optional[str] = None, api_key: Optional[str] = Security(verify_api_key)):
     """Beszélgetési memória törlése"""
     try:
-        conversation_memory.clear()
+        _memory(api_key, session).clear()
         return {"status": "cleared"}
     except Exception as e:
         logger.error(f"Clear memory error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/memory/pool")
+async def get_memory_pool(api_key: Optional[str] = Security(verify_api_key)):
+    """Betöltött memóriák (LRU pool) statisztikája"""
+    try:
+        return memory_manager.get_stats()
+    except Exception as e:
+        logger.error(f"Get memory pool error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/cache/clear")
 async def clear_cache(api_key: Optional[str] = Security(verify_api_key)):
     """Response cache törlése"""
@@ -1122,6 +1939,72 @@ async def clear_cache(api_key: Optional[str] = Security(verify_api_key)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class CacheQuotaRequest(BaseModel):
+    memory_quota: Optional[int] = Field(None, ge=0, description="Memória kvóta byte-ban")
+    disk_quota: Optional[int] = Field(None, ge=0, description="Lemez kvóta byte-ban")
+
+
+@app.get("/api/cache/stats")
+async def cache_stats(all_namespaces: bool = False, api_key: Optional[str] = Security(verify_api_key)):
+    """Cache statisztika névterenként (alapból csak a hívó névtere)"""
+    try:
+        namespace = _cache_namespace(api_key)
+        return {
+            "namespace": namespace,
+            "current": response_cache.get_stats(namespace),
+            "namespaces": response_cache.get_stats() if all_namespaces else None
+        }
+    except Exception as e:
+        logger.error(f"Cache stats error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/cache/invalidate")
+async def invalidate_cache_namespace(api_key: Optional[str] = Security(verify_api_key)):
+    """A hívó cache névterének érvénytelenítése (O(1), a többi névtér érintetlen)"""
+    try:
+        namespace = _cache_namespace(api_key)
+        return {"status": "invalidated", **response_cache.invalidate_namespace(namespace)}
+    except Exception as e:
+        logger.error(f"Invalidate cache namespace error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/cache/quota")
+async def set_cache_quota(request: CacheQuotaRequest, api_key: Optional[str] = Security(verify_api_key)):
+    """A hívó cache névterének kvótái (legfeljebb a szerver oldali CACHE_NAMESPACE_MAX_* korlátig)"""
+    try:
+        namespace = _cache_namespace(api_key)
+        return response_cache.set_quota(namespace, request.memory_quota, request.disk_quota)
+    except Exception as e:
+        logger.error(f"Set cache quota error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/cache/warmup")
+async def cache_warmup_report(api_key: Optional[str] = Security(verify_api_key)):
+    """Cache melegítési jelentés (várható találati arány növekedés)"""
+    try:
+        return cache_warmer.report()
+    except Exception as e:
+        logger.error(f"Cache warmup report error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/cache/warmup")
+async def cache_warmup_run(force: bool = False, api_key: Optional[str] = Security(verify_api_key)):
+    """Cache melegítés indítása a háttérben (alapból csak üresjáratban dolgozik)"""
+    try:
+        report = cache_warmer.report()
+        if cache_warmer.running:
+            return {"status": "running", "force": force, **report}
+        threading.Thread(target=cache_warmer.run_once, kwargs={"force": force}, daemon=True).start()
+        return {"status": "started", "force": force, **report}
+    except Exception as e:
+        logger.error(f"Cache warmup error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Autentikációs endpointok
 class GenerateKeyRequest(BaseModel):
     name: str = Field(..., description="Kulcs neve")
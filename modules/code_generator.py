@@ -2,10 +2,16 @@
 Code Generator - Kód generálás és szerkesztés
 """
 import re
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from core.llm_service import LLMService
 from core.file_manager import FileManager
 from core.project_manager import ProjectManager
+from core.response_cache import ResponseCache
+from core.file_index import EXTENSION_LANGUAGES
+from core.conversation_memory import estimate_tokens
+from core.context_packer import ContextPacker, Snippet
+from core.context_minifier import minify, MinifiedText
+from core.file_summaries import FileSummaryStore
 from modules.prompt_builder import (
     build_code_generation_prompt,
     build_edit_prompt,
@@ -13,16 +19,29 @@ from modules.prompt_builder import (
     build_refactor_prompt
 )
 
+# Sor ablakos magyarázatnál legfeljebb ennyi byte kerül a promptba
+WINDOW_MAX_BYTES = 64 * 1024
+
 
 class CodeGenerator:
     """Kód generálás és szerkesztés kezelője"""
     
     def __init__(self, llm_service: LLMService, 
                  file_manager: FileManager,
-                 project_manager: ProjectManager):
+                 project_manager: ProjectManager,
+                 response_cache: Optional[ResponseCache] = None,
+                 context_tokens: int = 1500,
+                 minify_context: bool = True,
+                 summaries: Optional[FileSummaryStore] = None):
         self.llm = llm_service
         self.fm = file_manager
         self.pm = project_manager
+        self.cache = response_cache
+        # A kontextus fájlok token budget-je (a túl nagy fájlok a releváns szakaszaikra szűkülnek)
+        self.packer = ContextPacker(max_tokens=context_tokens)
+        # Kommentek, üres sorok, literál táblák elhagyása a promptba kerülő fájlokból
+        self.minify_context = minify_context
+        self.summaries = summaries
     
     def generate_code(self, prompt: str, language: str = "python", 
                      context_files: Optional[List[str]] = None,
@@ -32,8 +51,10 @@ class CodeGenerator:
         """Kód generálás prompt alapján"""
         try:
             context = None
+            packed = None
             if context_files:
-                context = self._build_context(context_files)
+                packed = self._build_context(context_files, prompt)
+                context = packed["text"] or None
             
             full_prompt = build_code_generation_prompt(prompt, language, context)
             
@@ -64,6 +85,7 @@ class CodeGenerator:
                 "code": code,
                 "explanation": explanation,
                 "file_path": saved_file,
+                "context": {key: value for key, value in packed.items() if key != "text"} if packed else None,
                 "error": None
             }
         
@@ -88,8 +110,9 @@ class CodeGenerator:
             
             code = file_result["content"]
             language = self._detect_language(file_path)
+            minified = self._minify(code, file_path, level="header")
             
-            prompt = build_edit_prompt(code, instruction, language)
+            prompt = build_edit_prompt(minified.text if minified else code, instruction, language)
             
             response = self.llm.generate(
                 prompt=prompt,
@@ -101,8 +124,9 @@ class CodeGenerator:
             edited_code, explanation = self._extract_code(response, language)
             
             return {
-                "code": edited_code if edited_code else code,
+                "code": self._restore_header(edited_code, minified) if edited_code else code,
                 "explanation": explanation,
+                "minified": minified.stats() if minified else None,
                 "error": None
             }
         
@@ -112,30 +136,36 @@ class CodeGenerator:
                 "error": str(e)
             }
     
-    def explain_code(self, file_path: str, model: Optional[str] = None) -> Dict:
-        """Kód magyarázata"""
+    def explain_code(self, file_path: str, model: Optional[str] = None,
+                     cache_namespace: Optional[str] = None,
+                     start_line: Optional[int] = None, end_line: Optional[int] = None) -> Dict:
+        """Kód magyarázata (start_line/end_line esetén csak a sor ablaké)"""
         try:
-            file_result = self.fm.read_file(file_path)
-            if not file_result.get("exists") or file_result.get("error"):
+            whole_file = start_line is None and end_line is None
+            # Az összefoglalóhoz a megmagyarázott tartalom hash-e kell, ezért az olvasás előtt
+            content_hash = self.summaries.content_hash(file_path) if self.summaries and whole_file else None
+            prompt, error, minified = self._file_prompt("explain", file_path,
+                                                        start_line=start_line, end_line=end_line)
+            if error:
                 return {
                     "explanation": None,
-                    "error": f"Cannot read file: {file_result.get('error')}"
+                    "error": error
                 }
             
-            code = file_result["content"]
-            language = self._detect_language(file_path)
-            
-            prompt = build_explain_prompt(code, language)
-            
-            explanation = self.llm.generate(
+            explanation = self._cached_generate(
                 prompt=prompt,
                 model=model,
                 temperature=0.5,
-                max_tokens=1000
+                max_tokens=1000,
+                cache_namespace=cache_namespace
             )
+            if content_hash and explanation:
+                # A magyarázat eleje a fájl összefoglalója lesz (kódbázis kontextushoz)
+                self.summaries.record_explanation(file_path, explanation, content_hash)
             
             return {
                 "explanation": explanation,
+                "minified": minified.stats() if minified else None,
                 "error": None
             }
         
@@ -146,34 +176,33 @@ class CodeGenerator:
             }
     
     def refactor_code(self, file_path: str, refactor_type: str,
-                     model: Optional[str] = None) -> Dict:
+                     model: Optional[str] = None,
+                     cache_namespace: Optional[str] = None) -> Dict:
         """Kód refaktorálás"""
         try:
-            file_result = self.fm.read_file(file_path)
-            if not file_result.get("exists") or file_result.get("error"):
+            prompt, error, minified = self._file_prompt("refactor", file_path, refactor_type)
+            if error:
                 return {
                     "code": None,
                     "changes": None,
-                    "error": f"Cannot read file: {file_result.get('error')}"
+                    "error": error
                 }
             
-            code = file_result["content"]
             language = self._detect_language(file_path)
-            
-            prompt = build_refactor_prompt(code, refactor_type, language)
-            
-            response = self.llm.generate(
+            response = self._cached_generate(
                 prompt=prompt,
                 model=model,
                 temperature=0.3,
-                max_tokens=2000
+                max_tokens=2000,
+                cache_namespace=cache_namespace
             )
             
             refactored_code, changes = self._extract_code(response, language)
             
             return {
-                "code": refactored_code if refactored_code else code,
+                "code": self._restore_header(refactored_code, minified) if refactored_code else self._read(file_path),
                 "changes": changes or f"Refaktorálás: {refactor_type}",
+                "minified": minified.stats() if minified else None,
                 "error": None
             }
         
@@ -184,6 +213,90 @@ class CodeGenerator:
                 "error": str(e)
             }
     
+    def is_cached(self, kind: str, file_path: str, model: Optional[str] = None,
+                  refactor_type: str = "clean", cache_namespace: Optional[str] = None,
+                  start_line: Optional[int] = None, end_line: Optional[int] = None) -> bool:
+        """Ellenőrzi, hogy a fájlra vonatkozó explain/refactor válasz cache-ben van-e"""
+        if not self.cache:
+            return False
+        prompt, error, _ = self._file_prompt(kind, file_path, refactor_type, start_line, end_line)
+        if error:
+            return False
+        temperature = 0.5 if kind == "explain" else 0.3
+        return self.cache.contains(prompt, model, temperature, cache_namespace)
+    
+    def _file_prompt(self, kind: str, file_path: str, refactor_type: str = "clean",
+                     start_line: Optional[int] = None, end_line: Optional[int] = None
+                     ) -> Tuple[Optional[str], Optional[str], Optional[MinifiedText]]:
+        """Fájl alapú prompt építése (explain/refactor)
+        
+        Magyarázatnál a teljes tömörítés, refaktorálásnál (a válasz a teljes fájl) csak a
+        fájl eleji licenc blokk marad el.
+        
+        Returns:
+            (prompt, hiba, tömörítés)
+        """
+        if start_line is not None or end_line is not None:
+            # Sor ablak (mmap-pel, a fájl méretétől függetlenül)
+            file_result = self.fm.read_range(file_path, start_line=start_line or 1, end_line=end_line,
+                                             max_bytes=WINDOW_MAX_BYTES)
+        else:
+            file_result = self.fm.read_file(file_path)
+        if not file_result.get("exists") or file_result.get("error"):
+            return None, f"Cannot read file: {file_result.get('error')}", None
+        
+        code = file_result["content"]
+        language = self._detect_language(file_path)
+        minified = self._minify(code, file_path, level="full" if kind == "explain" else "header")
+        if minified:
+            code = minified.text
+        
+        if kind == "explain":
+            return build_explain_prompt(code, language), None, minified
+        return build_refactor_prompt(code, refactor_type, language), None, minified
+    
+    def _minify(self, code: str, file_path: str, level: str = "full") -> Optional[MinifiedText]:
+        """Tömörítés (ha be van kapcsolva)"""
+        if not self.minify_context:
+            return None
+        return minify(code, file_path, level=level)
+    
+    @staticmethod
+    def _restore_header(code: str, minified: Optional[MinifiedText]) -> str:
+        """A promptból elhagyott licenc blokk visszaillesztése a teljes fájlt tartalmazó válaszba"""
+        if not minified or not minified.header or code.lstrip().startswith(minified.header.strip()):
+            return code
+        return minified.header + code
+    
+    def _read(self, file_path: str) -> Optional[str]:
+        return self.fm.read_file(file_path).get("content")
+    
+    def _cached_generate(self, prompt: str, model: Optional[str],
+                         temperature: float, max_tokens: int,
+                         cache_namespace: Optional[str] = None) -> str:
+        """LLM generálás response cache-sel (a prompt tartalmazza a fájlt, így módosításkor új kulcs)"""
+        if self.cache:
+            cached, stale = self.cache.lookup(prompt, model, temperature, cache_namespace)
+            if cached:
+                if stale:
+                    self.cache.revalidate(
+                        prompt, model, temperature,
+                        lambda: self.llm.generate(prompt=prompt, model=model,
+                                                  temperature=temperature, max_tokens=max_tokens),
+                        namespace=cache_namespace
+                    )
+                return cached
+        
+        response = self.llm.generate(
+            prompt=prompt,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        if self.cache and response:
+            self.cache.set(prompt, response, model, temperature, cache_namespace)
+        return response
+    
     def extract_and_save_code_from_chat(self, chat_response: str, 
                                         auto_save: bool = True,
                                         user_message: str = "") -> Dict:
@@ -246,40 +359,39 @@ class CodeGenerator:
         
         return code_blocks
     
-    def _build_context(self, context_files: List[str]) -> str:
-        """Kontextus építése fájlokból"""
-        context_parts = []
-        for file_path in context_files:
+    def _build_context(self, context_files: List[str], prompt: Optional[str] = None) -> Dict:
+        """Kontextus építése fájlokból a token budget-en belül (a felsorolás sorrendje a prioritás)"""
+        snippets = []
+        original_tokens = tokens = 0
+        for position, file_path in enumerate(context_files):
             result = self.fm.read_file(file_path)
             if result.get("exists") and result.get("content"):
-                context_parts.append(f"--- {file_path} ---\n{result['content']}\n")
-        return "\n".join(context_parts)
+                content, line_map = result["content"], None
+                minified = self._minify(content, file_path)
+                if minified:
+                    content, line_map = minified.text, minified.line_map
+                    original_tokens += minified.original_tokens
+                    tokens += minified.tokens
+                snippets.append(Snippet(content, score=1.0 - position / (len(context_files) + 1),
+                                        path=file_path, line_map=line_map))
+        if self.summaries and sum(estimate_tokens(s.text) for s in snippets) > self.packer.max_tokens:
+            # Ha a fájlok nem férnek be egészben, az összefoglalóik kerülnek előre (a szűkített részletek mellé)
+            for snippet in list(snippets):
+                summary = self.summaries.get(snippet.path)
+                if summary:
+                    snippets.append(Snippet(summary, score=1.0 + snippet.score, source="summary",
+                                            name=f"{snippet.path} összefoglaló"))
+        packed = self.packer.pack(snippets, query=prompt)
+        if self.minify_context:
+            packed["minified"] = {"original_tokens": original_tokens, "tokens": tokens,
+                                  "saved_tokens": max(original_tokens - tokens, 0)}
+        return packed
     
     def _detect_language(self, file_path: str) -> str:
         """Programozási nyelv detektálása fájl kiterjesztésből"""
-        extension_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.jsx': 'javascript',
-            '.tsx': 'typescript',
-            '.html': 'html',
-            '.css': 'css',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.rs': 'rust',
-            '.go': 'go',
-            '.rb': 'ruby',
-            '.php': 'php',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.sql': 'sql'
-        }
-        
         from pathlib import Path
         ext = Path(file_path).suffix.lower()
-        return extension_map.get(ext, 'python')
+        return EXTENSION_LANGUAGES.get(ext, 'python')
     
     def _generate_file_path(self, prompt: str, language: str) -> str:
         """Fájl útvonal generálása prompt alapján"""
@@ -1,15 +1,38 @@
 """
 Project Context - Projekt kontextus kezelés
 """
+import re
 from typing import List, Dict, Set, Optional
 from pathlib import Path
 from core.file_manager import FileManager
+from core.file_index import FileIndex
+from core.trigram_index import TrigramIndex
+from core.import_graph import ImportGraph
+from core.code_retriever import CodeRetriever
+from core.symbol_index import SymbolIndex
+from core.repo_map import RepoMap
+from core.context_packer import ContextPacker, Snippet
+from core.git_status import GitStatus
+from core.file_summaries import FileSummaryStore
+from core.conversation_memory import estimate_tokens
+
+# A git szerint változott fájlok / sortartományok súlya a rangsorolásban
+GIT_FILE_BOOST = 0.3
+GIT_HUNK_BOOST = 0.2
 
 
 class ProjectContext:
-    """Projekt kontextus kezelője"""
+    """Projekt kontextus kezelője (a fájlrendszer helyett a FileIndex-ből dolgozik)"""
     
-    def __init__(self, file_manager: FileManager, base_path: str = "."):
+    def __init__(self, file_manager: FileManager, base_path: str = ".",
+                 file_index: Optional[FileIndex] = None,
+                 search_index: Optional[TrigramIndex] = None,
+                 import_graph: Optional[ImportGraph] = None,
+                 retriever: Optional[CodeRetriever] = None,
+                 symbol_index: Optional[SymbolIndex] = None,
+                 repo_map: Optional[RepoMap] = None,
+                 git_status: Optional[GitStatus] = None,
+                 summaries: Optional[FileSummaryStore] = None):
         self.fm = file_manager
         self.base_path = Path(base_path)
         self.ignored_patterns = {
@@ -18,20 +41,26 @@ class ProjectContext:
             '.idea', '.vscode', '*.pyc', '*.pyo', '*.pyd',
             '.DS_Store', 'Thumbs.db', 'logs', 'data'
         }
+        self.index = file_index or FileIndex(base_path, ignored_patterns=self.ignored_patterns)
+        self.search_index = search_index or TrigramIndex(self.index)
+        self.import_graph = import_graph or ImportGraph(self.index)
+        self.retriever = retriever or CodeRetriever(self.index)
+        self.symbols = symbol_index or SymbolIndex(self.index)
+        self.repo_map = repo_map or RepoMap(self.index, self.import_graph, self.symbols)
+        self.packer = ContextPacker()
+        self.git = git_status or GitStatus(self.index)
+        self.summaries = summaries or FileSummaryStore(self.index)
     
     def get_project_structure(self, max_depth: int = 3) -> Dict:
-        """Projekt struktúra lekérése"""
+        """Projekt struktúra lekérése (az indexből)"""
         try:
-            structure = {
-                "files": [],
-                "directories": [],
-                "total_files": 0,
+            files = self.index.files(max_depth=max_depth)
+            return {
+                "files": files,
+                "directories": self.index.list_directories(max_depth=max_depth),
+                "total_files": len(files),
                 "depth": max_depth
             }
-            
-            self._build_structure(self.base_path, structure, max_depth, 0)
-            
-            return structure
         except Exception as e:
             return {
                 "error": str(e),
@@ -39,28 +68,6 @@ class ProjectContext:
                 "directories": []
             }
     
-    def _build_structure(self, path: Path, structure: Dict, max_depth: int, current_depth: int):
-        """Rekurzív struktúra építés"""
-        if current_depth >= max_depth:
-            return
-        
-        try:
-            for item in path.iterdir():
-                if item.name in self.ignored_patterns or item.name.startswith('.'):
-                    continue
-                
-                rel_path = str(item.relative_to(self.base_path))
-                
-                if item.is_file():
-                    structure["files"].append(rel_path)
-                    structure["total_files"] += 1
-                elif item.is_dir():
-                    structure["directories"].append(rel_path)
-                    if current_depth < max_depth - 1:
-                        self._build_structure(item, structure, max_depth, current_depth + 1)
-        except PermissionError:
-            pass
-    
     def get_file_context(self, file_path: str, include_related: bool = True) -> Dict:
         """Fájl kontextus lekérése"""
         try:
@@ -81,7 +88,10 @@ class ProjectContext:
             }
             
             if include_related:
+                rel_path = self.index.relative_path(file_path) or file_path
                 context["related_files"] = self._find_related_files(file_path)
+                context["imports"] = self.import_graph.imports(rel_path)
+                context["imported_by"] = self.import_graph.importers(rel_path)
             
             return context
         except Exception as e:
@@ -92,16 +102,21 @@ class ProjectContext:
             }
     
     def _find_related_files(self, file_path: str, limit: int = 5) -> List[str]:
-        """Kapcsolódó fájlok keresése"""
-        # Egyszerűsített implementáció
-        # Valós használatban lehetne import analízis, hasonló nevek, stb.
+        """Kapcsolódó fájlok keresése az import gráfból (gráf távolság szerint)
+        
+        Ha a fájlnak nincs import kapcsolata, az azonos könyvtárbeli fájlokat adja vissza.
+        """
         try:
-            file_dir = Path(file_path).parent
-            related = []
+            rel_path = self.index.relative_path(file_path) or file_path
+            related = [item["path"] for item in self.import_graph.related(rel_path, limit=limit)]
+            if related:
+                return related
             
-            for item in file_dir.iterdir():
-                if item.is_file() and item.name != Path(file_path).name:
-                    related.append(str(item.relative_to(self.base_path)))
+            file_dir = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+            for path in self.index.files():
+                parent = path.rsplit("/", 1)[0] if "/" in path else ""
+                if parent == file_dir and path != rel_path:
+                    related.append(path)
                     if len(related) >= limit:
                         break
             
@@ -109,47 +124,167 @@ class ProjectContext:
         except:
             return []
     
-    def build_codebase_context(self, max_files: int = 20) -> str:
-        """Codebase kontextus építése"""
+    def get_repo_map(self, max_tokens: int = 1024, focus: Optional[List[str]] = None) -> Dict:
+        """Rangsorolt repository térkép (a legfontosabb definíciók szignatúrái a token budget-en belül)"""
+        return self.repo_map.get_map(max_tokens=max_tokens, focus=focus or ())
+    
+    def build_codebase_context(self, max_files: int = 20, query: Optional[str] = None,
+                               top_k: int = 8, max_tokens: int = 1024) -> str:
+        """Codebase kontextus építése
+        
+        Query esetén a hozzá leginkább hasonló top_k kódrészlet (függvény, osztály, blokk),
+        különben a legfontosabb fájlok összefoglalói (a budget legfeljebb fele) és a repository
+        térkép a max_tokens budget-en belül.
+        """
         try:
-            structure = self.get_project_structure(max_depth=2)
-            files = structure.get("files", [])[:max_files]
+            if query:
+                return self.pack_context(query, top_k=top_k, max_tokens=max_tokens)["text"]
             
-            context_parts = []
-            for file_path in files:
-                result = self.fm.read_file(file_path)
-                if result.get("exists") and result.get("content"):
-                    content = result["content"][:500]  # Limit content size
-                    context_parts.append(f"--- {file_path} ---\n{content}...\n")
-            
-            return "\n".join(context_parts)
+            file_ranks, _ = self.repo_map.rank()
+            ranked = sorted(file_ranks, key=lambda path: -file_ranks[path])[:max_files]
+            summaries = self.summaries_context(ranked, max_tokens=max_tokens // 2)
+            repo_map = self.get_repo_map(max_tokens=max_tokens - estimate_tokens(summaries))["map"]
+            return "\n\n".join(part for part in (summaries, repo_map) if part)
         except Exception as e:
             return f"Error building context: {str(e)}"
     
+    def summaries_context(self, paths: List[str], max_tokens: int = 512) -> str:
+        """A fájlok tárolt összefoglalói (ami érvényes és belefér a budget-be)"""
+        lines = []
+        budget = max_tokens - estimate_tokens("Fájl összefoglalók:")
+        for path in paths:
+            summary = self.summaries.get(path)
+            if not summary:
+                continue
+            line = f"- {path}: {summary}"
+            cost = estimate_tokens(line)
+            if cost > budget:
+                continue
+            budget -= cost
+            lines.append(line)
+        return "Fájl összefoglalók:\n" + "\n".join(lines) if lines else ""
+    
+    def pack_context(self, query: str, files: Optional[List[str]] = None, memory: Optional[str] = None,
+                     top_k: int = 8, max_tokens: int = 2000) -> Dict:
+        """Kérés kontextusa egy token budget-en belül
+        
+        Jelöltek: a megadott fájlok, a query-ben említett definíciók, a hasonló kódrészletek és a
+        memória kontextus. Az átfedő részletek egyszer kerülnek be, a nagy fájlok a releváns
+        szakaszaikra szűkülnek.
+        
+        Returns:
+            {"text", "tokens", "max_tokens", "included", "dropped"}
+        """
+        snippets = []
+        if memory:
+            snippets.append(Snippet(memory, score=3.0, source="memory", name="memória"))
+        for position, path in enumerate(files or []):
+            content = self.index.read_text(path)
+            if content:
+                snippets.append(Snippet(content, score=2.0 - position / (len(files) + 1), path=path))
+        for symbol in self.mentioned_symbols(query):
+            # A teljes definíció; ha nem fér be, a packer rövidíti
+            source = self.symbols.definition(symbol, max_lines=symbol.end_line - symbol.start_line + 1)
+            snippets.append(Snippet(source, score=1.5, source="definition", path=symbol.path,
+                                    start_line=symbol.start_line, end_line=symbol.end_line, name=symbol.qualname))
+        for chunk in self.retrieve(query, top_k=top_k):
+            snippets.append(Snippet(chunk["text"], score=chunk["score"], source="chunk", path=chunk["path"],
+                                    start_line=chunk["start_line"], end_line=chunk["end_line"],
+                                    name=chunk["name"]))
+        snippets.extend(self.changed_snippets())
+        # Az érintett fájlok összefoglalói (olcsó áttekintés a részletek mellé)
+        best: Dict[str, float] = {}
+        for snippet in snippets:
+            if snippet.path is not None:
+                best[snippet.path] = max(best.get(snippet.path, 0.0), snippet.score)
+        for path, score in best.items():
+            summary = self.summaries.get(path)
+            if summary:
+                snippets.append(Snippet(summary, score=score / 2, source="summary", name=f"{path} összefoglaló"))
+        return self.packer.pack(snippets, query=query, max_tokens=max_tokens)
+    
+    def changed_snippets(self, max_files: int = 3, max_hunks: int = 4, context_lines: int = 3) -> List[Snippet]:
+        """A legutóbb változott fájlok módosított sortartományai (környezettel) kontextus jelöltnek"""
+        snippets = []
+        for changed in self.git.changed_files(limit=max_files):
+            lines = (self.index.read_text(changed["path"]) or "").splitlines()
+            merged: List[List[int]] = []
+            for start, end in self.git.hunks(changed["path"]):
+                start, end = max(start - context_lines, 1), min(end + context_lines, len(lines))
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            for start, end in merged[:max_hunks]:
+                text = "\n".join(lines[start - 1:end])
+                if text.strip():
+                    snippets.append(Snippet(text, score=GIT_FILE_BOOST + GIT_HUNK_BOOST * changed["boost"],
+                                            source="diff", path=changed["path"], start_line=start, end_line=end,
+                                            name=changed["state"]))
+        return snippets
+    
+    def mentioned_symbols(self, text: str, max_symbols: int = 3) -> List:
+        """A szövegben említett (pl. `Osztaly.metodus`, CamelCase, snake_case) projekt definíciók"""
+        candidates = re.findall(r"`([\w.]+)(?:\(\))?`", text)
+        candidates += re.findall(r"\b[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+\b", text)
+        candidates += re.findall(r"\b(?:[A-Z][a-z0-9]+){2,}\b|\b[a-z]\w*_\w+\b", text)
+        
+        found = []
+        seen = set()
+        for name in candidates:
+            # Egy névre túl sok találat nem pontos hivatkozás
+            symbols = self.symbols.lookup(name, limit=3, exact=True)
+            if not symbols or len(symbols) > 2:
+                continue
+            for symbol in symbols:
+                key = (symbol.path, symbol.start_line)
+                if key not in seen:
+                    seen.add(key)
+                    found.append(symbol)
+            if len(found) >= max_symbols:
+                break
+        return found[:max_symbols]
+    
+    def definitions_context(self, text: str, max_symbols: int = 3, max_lines: int = 80) -> str:
+        """A szövegben említett definíciók forráskódja prompt kontextusnak"""
+        parts = []
+        for symbol in self.mentioned_symbols(text, max_symbols):
+            source = self.symbols.definition(symbol, max_lines=max_lines)
+            parts.append(f"--- {symbol.path}:{symbol.start_line}-{symbol.end_line} ({symbol.qualname}) ---\n{source}\n")
+        return "\n".join(parts)
+    
+    def retrieve(self, query: str, top_k: int = 8) -> List[Dict]:
+        """A query-hez leginkább hasonló kódrészletek (embedding index)
+        
+        A git szerint változott fájlok és a változott sortartományokat érintő részletek előrébb kerülnek.
+        """
+        results = self.retriever.search(query, top_k=top_k * 2)
+        for result in results:
+            boost = self.git.boost(result["path"])
+            if not boost:
+                continue
+            touched = any(start <= result["end_line"] and result["start_line"] <= end
+                          for start, end in self.git.hunks(result["path"]))
+            result["score"] = round(result["score"] + GIT_FILE_BOOST * boost + (GIT_HUNK_BOOST if touched else 0.0), 4)
+            result["git"] = self.git.status()[result["path"]].state
+        results.sort(key=lambda result: -result["score"])
+        return results[:top_k]
+    
+    def search(self, query: str, limit: int = 10, regex: bool = False,
+               case_sensitive: bool = False) -> List[Dict]:
+        """Teljes szöveges keresés soronkénti találatokkal (trigram index; a változott fájlok előrébb)"""
+        results = self.search_index.search(query, limit=limit * 2, regex=regex, case_sensitive=case_sensitive)
+        for result in results:
+            boost = self.git.boost(result["path"])
+            if boost:
+                result["score"] = round(result["score"] * (1 + boost), 4)
+                result["git"] = self.git.status()[result["path"]].state
+        results.sort(key=lambda result: (-result["score"], result["path"].count("/"), result["path"]))
+        return results[:limit]
+    
     def get_relevant_files(self, query: str, limit: int = 10) -> List[str]:
         """Releváns fájlok keresése query alapján"""
         try:
-            structure = self.get_project_structure(max_depth=3)
-            files = structure.get("files", [])
-            
-            query_lower = query.lower()
-            relevant = []
-            
-            for file_path in files:
-                if query_lower in file_path.lower():
-                    relevant.append(file_path)
-                    if len(relevant) >= limit:
-                        break
-                
-                # Content search (first 500 chars)
-                result = self.fm.read_file(file_path)
-                if result.get("content") and query_lower in result["content"][:500].lower():
-                    if file_path not in relevant:
-                        relevant.append(file_path)
-                        if len(relevant) >= limit:
-                            break
-            
-            return relevant
+            return [result["path"] for result in self.search(query, limit=limit)]
         except:
             return []
-
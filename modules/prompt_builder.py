@@ -102,3 +102,44 @@ Refaktorált kód (csak a kódot add vissza ```{language} blokkban):"""
     
     return prompt
 
+
+def build_summary_prompt(messages: List[Dict[str, str]], previous_summary: Optional[str] = None) -> str:
+    """Beszélgetés összefoglaló prompt építése (gördülő összefoglalás)"""
+    conversation = "".join(
+        f"{msg.get('role', 'user').capitalize()}: {msg.get('content', '')}\n" for msg in messages
+    )
+    
+    if previous_summary:
+        prompt = f"""Foglald össze tömören magyarul a beszélgetést. Egészítsd ki az eddigi összefoglalót
+az új üzenetekkel: tartsd meg a döntéseket, fájlneveket, kéréseket és a nyitott kérdéseket.
+
+Eddigi összefoglaló:
+{previous_summary}
+
+Új üzenetek:
+{conversation}
+Frissített összefoglaló:"""
+    else:
+        prompt = f"""Foglald össze tömören magyarul a beszélgetést: tartsd meg a döntéseket,
+fájlneveket, kéréseket és a nyitott kérdéseket.
+
+Üzenetek:
+{conversation}
+Összefoglaló:"""
+    
+    return prompt
+
+
+def build_file_summary_prompt(file_path: str, file_content: str, language: str = "python") -> str:
+    """Fájl összefoglaló prompt építése (kódbázis kontextushoz)"""
+    prompt = f"""Foglald össze tömören magyarul (legfeljebb 3 mondatban), mit csinál ez a fájl:
+a fő osztályok és függvények szerepe, és mire használja a projekt.
+
+Fájl: {file_path}
+```{language}
+{file_content}
+```
+
+Összefoglaló:"""
+    
+    return prompt